@@ -0,0 +1,158 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+from app.coindcx_rest_apis.fetch_candles import (
+    COINDCX_URL, covered_span, parse_candles, resolve_range, select_limit, with_fetched,
+)
+from app.services.candle_store import (
+    CANDLE_COLUMNS, candle_store, candles_to_columns, columns_to_candles, empty_arrays,
+)
+from app.services.candle_resampler import BASE_INTERVAL, plan_resample, resample_range
+from app.utils.intervals import INTERVAL_MS
+
+PAGE_LIMIT = 1000        # max candles CoinDCX returns per request
+MAX_CONCURRENCY = 4      # pages in flight per client
+MAX_RANGE_CANDLES = 200_000     # candles one request may page in (about 140 days of 1m)
+
+
+class AsyncCandleClient:
+    """
+    Non-blocking CoinDCX candle client on a pooled aiohttp session.
+    Long ranges are split into page-sized requests that run concurrently
+    under a semaphore and are stitched back into one sorted, deduplicated series.
+    """
+
+    def __init__(self, page_limit: int = PAGE_LIMIT, max_concurrency: int = MAX_CONCURRENCY, timeout: float = 10):
+        self.page_limit = page_limit
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency * 2, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    def _limiter(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_page(self, pair: str, interval: str, start: int = None, end: int = None,
+                         limit: int = None) -> List[Dict]:
+        """One request; same result shape as fetch_coindcx_candles_remote."""
+        session = await self._get_session()
+        params = {"pair": pair, "interval": interval, "limit": str(limit or self.page_limit)}
+        if start: params["startTime"] = str(start)
+        if end: params["endTime"] = str(end)
+        async with session.get(COINDCX_URL, params=params) as response:
+            response.raise_for_status()
+            raw = await response.json(content_type=None)
+        return parse_candles(raw)
+
+    async def _fetch_page_limited(self, pair: str, interval: str, start: int, end: int) -> List[Dict]:
+        # Every page of every range on this client shares the semaphore
+        async with self._limiter():
+            return await self.fetch_page(pair, interval, start, end, self.page_limit)
+
+    def plan_pages(self, interval: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Split [start, end] into windows of at most page_limit candles."""
+        step = INTERVAL_MS[interval]
+        span = self.page_limit * step
+        return [(page_start, min(page_start + span - step, end)) for page_start in range(start, end + 1, span)]
+
+    async def fetch_range(self, pair: str, interval: str, start: int, end: int):
+        """
+        Fetch every candle with open time in [start, end].
+        Returns (column arrays sorted by time, list of covered open-time ranges).
+        """
+        step = INTERVAL_MS[interval]
+        pages = self.plan_pages(interval, start, end)
+        results = await asyncio.gather(*[
+            self._fetch_page_limited(pair, interval, page_start, page_end) for page_start, page_end in pages
+        ])
+
+        covered = []
+        for (page_start, page_end), candles in zip(pages, results):
+            span = covered_span(candles_to_columns(candles), page_start, page_end, self.page_limit, step)
+            if span:
+                covered.append(span)
+
+        candles = [c for page in results for c in page]
+        if not candles:
+            return empty_arrays(), covered
+        arrays = candles_to_columns(candles)
+        _, first = np.unique(arrays["time"], return_index=True)
+        return {col: arrays[col][first] for col in CANDLE_COLUMNS}, covered
+
+
+candle_client = AsyncCandleClient()
+
+
+def range_candle_count(interval: str, limit: int, startTime=None, endTime=None) -> int:
+    """Most candles a request for this window can return (limit unless both ends are given)."""
+    if interval not in INTERVAL_MS:
+        return limit
+    start, end = resolve_range(interval, limit, startTime, endTime)
+    return max(0, (end - start) // INTERVAL_MS[interval] + 1)
+
+
+async def fetch_coindcx_candle_arrays_async(pair: str, interval: str, limit: int = 500,
+                                            startTime=None, endTime=None) -> Dict[str, np.ndarray]:
+    """
+    Async counterpart of fetch_coindcx_candle_arrays. Missing gaps are paged
+    concurrently, so when both startTime and endTime are given the whole
+    window is returned, even beyond a single call's limit. Intervals that can
+    be resampled are built from 1m candles (see plan_resample). Windows over
+    MAX_RANGE_CANDLES raise ValueError.
+    """
+    if range_candle_count(interval, limit, startTime, endTime) > MAX_RANGE_CANDLES:
+        raise ValueError(f"At most {MAX_RANGE_CANDLES} candles per request")
+    if interval not in INTERVAL_MS:
+        return candles_to_columns(await candle_client.fetch_page(pair, interval, startTime, endTime, limit))
+
+    step = INTERVAL_MS[interval]
+    start, end = resolve_range(interval, limit, startTime, endTime)
+
+    # Higher timeframes are built from the stored 1m series when possible
+    planned = plan_resample(pair, interval, start, end, allow_fetch=True, page_limit=candle_client.page_limit)
+    if planned:
+        base = await fetch_coindcx_candle_arrays_async(pair, BASE_INTERVAL, startTime=planned[0], endTime=planned[1])
+        arrays = resample_range(base, interval, start, end)
+        if startTime and endTime:
+            return arrays
+        return select_limit(arrays, limit, from_start=bool(startTime))
+
+    gaps = candle_store.missing_ranges(pair, interval, start, end, step)
+    fetched = []
+    if gaps:
+        fetched = await asyncio.gather(*[
+            candle_client.fetch_range(pair, interval, gap_start, gap_end) for gap_start, gap_end in gaps
+        ])
+        for arrays, covered in fetched:
+            print(f"🌐 Fetched {len(arrays['time'])} {pair} {interval} candles")
+            await asyncio.to_thread(candle_store.write, pair, interval, arrays, covered, step)
+
+    stored = await asyncio.to_thread(candle_store.read_range, pair, interval, start, end)
+    arrays = with_fetched(stored, [page for page, _ in fetched], start, end)
+    if startTime and endTime:
+        return arrays
+    return select_limit(arrays, limit, from_start=bool(startTime))
+
+
+async def fetch_coindcx_candles_async(pair: str, interval: str, limit: int = 500,
+                                      startTime=None, endTime=None) -> List[Dict]:
+    arrays = await fetch_coindcx_candle_arrays_async(pair, interval, limit, startTime, endTime)
+    return columns_to_candles(arrays)
@@ -1,15 +1,15 @@
-import requests
-
-def get_current_price(symbol):
-    response = requests.get("https://api.coindcx.com/exchange/ticker")  # full list
-    data = response.json()  # list of dicts
-    
-    # Loop through the list to find the matching symbol
-    for market_data in data:
-        if market_data.get('market') == symbol:
-            # Some markets may use 'last_price', some may use 'ask' if no 'last_price'
-            price = float(market_data.get('last_price') or market_data.get('ask'))
-            print(f"Current price of {symbol}: {price}")
-            return price
-    
-    raise ValueError(f"No data found for symbol {symbol}")
+from typing import Dict, Iterable, Optional
+
+from app.services.ticker_snapshot import ticker_snapshot
+
+
+async def get_current_price(symbol):
+    """Latest price of a market, from the ticker snapshot (re-downloaded only if missing or stale)."""
+    price = await ticker_snapshot.get_price(symbol)
+    print(f"Current price of {symbol}: {price}")
+    return price
+
+
+def get_current_prices(symbols: Iterable[str]) -> Dict[str, Optional[dict]]:
+    """Quotes ({price, bid, ask, updated_at, age, stale}) for many markets at once; None if unknown."""
+    return ticker_snapshot.get_many(symbols)
@@ -1,14 +1,24 @@
 import requests, time
 from typing import List, Dict
+import numpy as np
+from app.services.candle_store import (
+    candle_store, candles_to_columns, columns_to_candles, empty_arrays, merge_columns, select_times,
+)
+from app.services.candle_resampler import BASE_INTERVAL, plan_resample, resample_range
+from app.utils.intervals import INTERVAL_MS, to_ms, now_ms
 COINDCX_URL = "https://public.coindcx.com/market_data/candles/"
 
-def fetch_coindcx_candles(pair: str, interval: str, limit:int=500, startTime: int=None, endTime: int=None) -> List[Dict]:
+def fetch_coindcx_candles_remote(pair: str, interval: str, limit:int=500, startTime: int=None, endTime: int=None) -> List[Dict]:
+    """Single request to the CoinDCX candles API, bypassing the local store."""
     params = {"pair": pair, "interval": interval, "limit": str(limit)}
     if startTime: params["startTime"] = str(startTime)
     if endTime: params["endTime"] = str(endTime)
     r = requests.get(COINDCX_URL, params=params, timeout=10)
     r.raise_for_status()
-    raw = r.json()
+    return parse_candles(r.json())
+
+
+def parse_candles(raw: List[Dict]) -> List[Dict]:
     # Convert each item to {time, open, high, low, close, volume}
     candles = []
     for d in raw:
@@ -21,3 +31,82 @@ def fetch_coindcx_candles(pair: str, interval: str, limit:int=500, startTime: in
             "volume": float(d["volume"]),
         })
     return candles
+
+
+def resolve_range(interval: str, limit: int, startTime=None, endTime=None):
+    """Open-time window [start, end] in ms that a request covers, aligned to the interval."""
+    step = INTERVAL_MS[interval]
+    end = to_ms(endTime) if endTime else now_ms()
+    start = to_ms(startTime) if startTime else end - (limit - 1) * step
+    if step <= INTERVAL_MS["1d"]:
+        start = -(-start // step) * step   # first open time >= start
+        end = (end // step) * step         # last open time <= end
+    return start, end
+
+
+def covered_span(fetched: Dict[str, np.ndarray], gap_start: int, gap_end: int, limit: int, step: int):
+    """
+    Range a fetch can be trusted to have filled completely: the whole gap, or
+    only the returned span when the response hit `limit`. Still-forming
+    candles are never marked as fetched.
+    """
+    if len(fetched["time"]) >= limit:
+        gap_start = max(gap_start, int(fetched["time"].min()))
+        gap_end = min(gap_end, int(fetched["time"].max()))
+    last_closed = (now_ms() // step) * step - step
+    gap_end = min(gap_end, last_closed)
+    return (gap_start, gap_end) if gap_start <= gap_end else None
+
+
+def select_limit(arrays: Dict[str, np.ndarray], limit: int, from_start: bool) -> Dict[str, np.ndarray]:
+    if len(arrays["time"]) <= limit:
+        return arrays
+    window = slice(0, limit) if from_start else slice(-limit, None)
+    return {col: a[window] for col, a in arrays.items()}
+
+
+def with_fetched(stored: Dict[str, np.ndarray], fetched_parts: List[Dict[str, np.ndarray]],
+                 start: int, end: int) -> Dict[str, np.ndarray]:
+    """
+    Stored candles plus what this request just fetched, fresh rows winning.
+    The store keeps only fully fetched, closed candles, so the still-forming
+    one is served from the fetch itself.
+    """
+    arrays = stored
+    for fetched in fetched_parts:
+        fetched = merge_columns(fetched, empty_arrays())     # sorted, deduplicated
+        arrays = merge_columns(select_times(fetched, start, end), arrays)
+    return arrays
+
+
+def fetch_coindcx_candle_arrays(pair: str, interval: str, limit:int=500, startTime=None, endTime=None) -> Dict[str, np.ndarray]:
+    """
+    Candles as column arrays (time in ms), served from the local candle store.
+    Only the parts of the window that were never fetched go to CoinDCX.
+    """
+    if interval not in INTERVAL_MS:
+        return candles_to_columns(fetch_coindcx_candles_remote(pair, interval, limit, startTime, endTime))
+
+    step = INTERVAL_MS[interval]
+    start, end = resolve_range(interval, limit, startTime, endTime)
+
+    # Resample from stored 1m candles when they already cover the window
+    planned = plan_resample(pair, interval, start, end, allow_fetch=False)
+    if planned:
+        base = candle_store.read_range(pair, BASE_INTERVAL, planned[0], planned[1])
+        return select_limit(resample_range(base, interval, start, end), limit, from_start=bool(startTime))
+
+    fetched_parts = []
+    for gap_start, gap_end in candle_store.missing_ranges(pair, interval, start, end, step):
+        fetched = candles_to_columns(fetch_coindcx_candles_remote(pair, interval, limit, gap_start, gap_end))
+        print(f"🌐 Fetched {len(fetched['time'])} {pair} {interval} candles for gap {gap_start}-{gap_end}")
+        span = covered_span(fetched, gap_start, gap_end, limit, step)
+        candle_store.write(pair, interval, fetched, [span] if span else [], step)
+        fetched_parts.append(fetched)
+
+    arrays = with_fetched(candle_store.read_range(pair, interval, start, end), fetched_parts, start, end)
+    return select_limit(arrays, limit, from_start=bool(startTime))
+
+
+def fetch_coindcx_candles(pair: str, interval: str, limit:int=500, startTime: int=None, endTime: int=None) -> List[Dict]:
+    return columns_to_candles(fetch_coindcx_candle_arrays(pair, interval, limit, startTime, endTime))
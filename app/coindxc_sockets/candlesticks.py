@@ -1,88 +1,173 @@
-import socketio
-import json
-from datetime import datetime
-from app.utils.response_message import response_message
-from app.core.config import Settings
+import asyncio
+from typing import Optional
 
-url = Settings().COINDCX_WEBSOCKET_URL
+from app.core.config import settings
+from app.services.market_data_hub import market_data_hub
+
+
+def _open_time(parsed: dict):
+    return parsed.get("t")
+
+
+def _ohlcv(candle: dict) -> tuple:
+    return candle.get("t"), candle.get("o"), candle.get("h"), candle.get("l"), candle.get("c"), candle.get("v")
+
+
+class CandleThrottle:
+    """
+    Per-subscriber coalescing of intrabar updates.
+
+    Live updates go out at most once per `min_interval` seconds: one that
+    arrives sooner is held, replaced by anything newer, and delivered when
+    the interval is up, so the subscriber always ends on the latest state.
+    Updates whose OHLCV matches what was last delivered are skipped.
+    Closing (is_complete) candles are never throttled.
+    """
+
+    def __init__(self, callback, min_interval: float):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.last_sent_at: Optional[float] = None
+        self.last_ohlcv = None
+        self.pending: Optional[dict] = None
+        self.timer: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.coalesced = 0
+        self.unchanged = 0
+
+    async def update(self, candle: dict):
+        if candle.get("is_complete"):
+            # The closing candle supersedes any held intrabar state
+            self.cancel()
+            await self._deliver(candle)
+            return
+
+        if _ohlcv(candle) == self.last_ohlcv:
+            self.unchanged += 1
+            if self.pending is not None:
+                self.cancel()   # back to what the subscriber already has
+            return
+
+        if self.pending is not None:
+            self.coalesced += 1
+            if self.pending.get("is_new_candle") and not candle.get("is_new_candle"):
+                candle = {**candle, "is_new_candle": True}
+
+        now = asyncio.get_running_loop().time()
+        due = now if self.last_sent_at is None else self.last_sent_at + self.min_interval
+        if self.timer is None and now >= due:
+            await self._deliver(candle)
+            return
+        self.pending = candle
+        if self.timer is None:
+            self.timer = asyncio.create_task(self._trailing(due - now))
+
+    async def _trailing(self, delay: float):
+        await asyncio.sleep(delay)
+        self.timer = None
+        candle, self.pending = self.pending, None
+        if candle is not None:
+            await self._deliver(candle)
+
+    async def _deliver(self, candle: dict):
+        self.last_sent_at = asyncio.get_running_loop().time()
+        self.last_ohlcv = _ohlcv(candle)
+        self.delivered += 1
+        try:
+            await self.callback(candle)
+        except Exception as e:
+            kind = "final candle" if candle.get("is_complete") else "live update"
+            print(f"Callback error ({kind}): {e}")
+
+    def cancel(self):
+        """Drop the held update and its timer."""
+        self.pending = None
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
 
 
 class CandleStick:
-    def __init__(self, pair: str, timeframe: str):
+    """
+    Candle feed for one pair/timeframe. A thin subscription on the shared
+    market data hub: the upstream socket and JSON parsing are shared by
+    every feed on the same channel. Each callback gets its updates through
+    its own CandleThrottle.
+    """
+
+    def __init__(self, pair: str, timeframe: str, hub=market_data_hub):
         self.callbacks = []
-        self.sio = socketio.AsyncClient()
+        self.throttles = []
+        self.hub = hub
         self.pair = pair
         self.timeframe = timeframe
+        self.channel = f"{self.pair}_{self.timeframe}"
         self.current_candle_timestamp = None
         self.last_candle = None  # Store the last candle for "completion"
+        self.subscription = None
+
+    async def on_message(self, parsed: dict):
+        candle_timestamp = parsed.get("t")
+
+        # Check if this is a NEW candle
+        is_new_candle = candle_timestamp != self.current_candle_timestamp
 
-        @self.sio.event
-        async def connect():
-            print("✅ Connected to CoinDCX socket!")
-            channel = f"{self.pair}_{self.timeframe}"
-            await self.sio.emit("join", {"channelName": channel})
-            print(f"📡 Subscribed to: {channel}")
-
-        @self.sio.on("candlestick")
-        async def on_message(data):
-            raw_json = data.get("data")
-            if not raw_json:
-                return
-
-            parsed = json.loads(raw_json)
-            candle_timestamp = parsed.get("t")
-
-            # Check if this is a NEW candle
-            is_new_candle = candle_timestamp != self.current_candle_timestamp
-
-            if is_new_candle:
-                # If we already had a previous candle, mark it as COMPLETE
-                if self.last_candle:
-                    completed_candle = {
-                        **self.last_candle,
-                        "is_complete": True,
-                        "is_new_candle": False,
-                    }
-
-                    # ✅ Notify callbacks that the previous candle is finalized
-                    for cb in self.callbacks:
-                        try:
-                            await cb(completed_candle)
-                        except Exception as e:
-                            print(f"Callback error (final candle): {e}")
-
-                # Update current timestamp and replace last_candle
-                self.current_candle_timestamp = candle_timestamp
-                self.last_candle = parsed
-                print(f"🆕 New candle started: {candle_timestamp}")
-
-            else:
-                # Candle still forming (5s update)
-                self.last_candle = parsed
-                print(f"🔄 Candle update: {candle_timestamp}")
-
-            # Optional: also pass real-time updates to callbacks (not complete)
-            live_candle = {
-                **parsed,
-                "is_complete": False,
-                "is_new_candle": is_new_candle,
-            }
-            for cb in self.callbacks:
-                try:
-                    await cb(live_candle)
-                except Exception as e:
-                    print(f"Callback error (live update): {e}")
-
-        @self.sio.event
-        async def disconnect():
-            print("❌ Disconnected from CoinDCX WebSocket.")
-            return response_message(message="Disconnected from CoinDCX")
-
-    def register_callback(self, cb):
-        """Register async callback to receive candle data."""
+        if is_new_candle:
+            # If we already had a previous candle, mark it as COMPLETE
+            if self.last_candle:
+                completed_candle = {
+                    **self.last_candle,
+                    "is_complete": True,
+                    "is_new_candle": False,
+                }
+
+                # ✅ Notify callbacks that the previous candle is finalized
+                for throttle in self.throttles:
+                    await throttle.update(completed_candle)
+
+            # Update current timestamp and replace last_candle
+            self.current_candle_timestamp = candle_timestamp
+            self.last_candle = parsed
+            print(f"🆕 New candle started: {self.channel} {candle_timestamp}")
+
+        else:
+            # Candle still forming (5s update)
+            self.last_candle = parsed
+
+        # Optional: also pass real-time updates to callbacks (not complete)
+        live_candle = {
+            **parsed,
+            "is_complete": False,
+            "is_new_candle": is_new_candle,
+        }
+        for throttle in self.throttles:
+            await throttle.update(live_candle)
+
+    def register_callback(self, cb, min_interval: Optional[float] = None):
+        """
+        Register async callback to receive candle data, with live updates at
+        most every `min_interval` seconds (CANDLE_UPDATE_MIN_INTERVAL by default).
+        """
+        if min_interval is None:
+            min_interval = settings.CANDLE_UPDATE_MIN_INTERVAL
         self.callbacks.append(cb)
+        self.throttles.append(CandleThrottle(cb, min_interval))
 
     async def start(self):
-        """Start WebSocket connection and event loop."""
-        await self.sio.connect(url, transports=["websocket"])
-        await self.sio.wait()
+        """Subscribe on the hub and stay subscribed until the task is cancelled."""
+        # Per-bar coalescing on the hub: a backlog skips intrabar updates, never a bar's last one
+        self.subscription = await self.hub.subscribe(
+            self.channel, "candlestick", self.on_message, coalesce_key=_open_time
+        )
+        print(f"📡 Subscribed to: {self.channel}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        for throttle in self.throttles:
+            throttle.cancel()
+        if self.subscription is not None:
+            subscription, self.subscription = self.subscription, None
+            await self.hub.unsubscribe(subscription)
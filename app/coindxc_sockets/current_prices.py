@@ -1,38 +1,42 @@
-import socketio, asyncio, json
-from app.core.config import Settings
+import asyncio
+from app.services.market_data_hub import market_data_hub
 
-url = Settings().COINDCX_WEBSOCKET_URL
+CHANNEL = "currentPrices@spot@10s"
+EVENT = "currentPrices@spot#update"
 
 class CurrentPrices:
-     def __init__(self, symbol):
+     """
+     Spot price feed, as a subscription on the shared market data hub.
+     With a symbol, callbacks get that symbol's price; without one they get
+     the whole {symbol: price} map of each update.
+     """
+     def __init__(self, symbol=None, hub=market_data_hub):
         self.symbol = symbol
         self.callbacks = []
-        self.sio = socketio.AsyncClient()
+        self.hub = hub
+        self.subscription = None
 
-        @self.sio.event
-        async def connect():
-            print("✅ Connected to CoinDCX!")
-            await self.sio.emit('join', {'channelName': "currentPrices@spot@10s"})
-
-        @self.sio.on('currentPrices@spot#update')
-        async def on_message(data):
-            raw_json = data.get("data")
-            if not raw_json:
-                return
-            parsed = json.loads(raw_json)  # convert string -> dict
-            price_data = parsed.get("prices", {})
-            price = price_data.get(self.symbol)
-            if price is not None:
-                print(f"📈 {self.symbol} -> {price}")
-                for cb in self.callbacks:
-                    await cb(price)
-        @self.sio.event
-        async def disconnect():
-            print("❌ Disconnected from CoinDCX")
+     async def on_message(self, parsed: dict):
+        price_data = parsed.get("prices", {})
+        if self.symbol is None:
+            payload = price_data
+        else:
+            payload = price_data.get(self.symbol)
+        if payload:
+            for cb in self.callbacks:
+                await cb(payload)
 
      def register_callback(self, callback):
         self.callbacks.append(callback)
 
      async def start(self):
-        await self.sio.connect(url, transports=['websocket'])
-        await self.sio.wait()
\ No newline at end of file
+        self.subscription = await self.hub.subscribe(CHANNEL, EVENT, self.on_message)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+     async def stop(self):
+        if self.subscription is not None:
+            subscription, self.subscription = self.subscription, None
+            await self.hub.unsubscribe(subscription)
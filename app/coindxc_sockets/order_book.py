@@ -1,43 +1,33 @@
-import socketio,json
-from app.utils.response_message import response_message
-from app.core.config import Settings
-url=Settings().COINDCX_WEBSOCKET_URL
+import asyncio
+from app.services.market_data_hub import market_data_hub
+
 class OrderBook:
-    def __init__(self,pair):
+    """Order book snapshots for one pair, as a subscription on the shared market data hub."""
+    def __init__(self,pair,hub=market_data_hub):
         self.callbacks=[]
-        self.sio=socketio.AsyncClient()
+        self.hub=hub
         self.pair=pair
+        self.channel=f'{self.pair}@orderbook@10'
+        self.subscription=None
 
-        @self.sio.event
-        async def connect():
-            print("I'm connected!")
-            await self.sio.emit('join', {'channelName': f'{self.pair}@orderbook@10'})
+    async def on_message(self,parsed):
+        price_data = parsed.get("prices", {})
+        if price_data:
+            # Notify all registered callbacks
+            for cb in self.callbacks:
+                await cb(price_data)
 
-        @self.sio.on('depth-snapshot')
-        async def on_message(data):
-            print("sjdsjdsd",data)
-            raw_json = data.get("data")
-            if not raw_json:
-                return
-            parsed = json.loads(raw_json)  
-            price_data = parsed.get("prices", {})
-            print(price_data)
-            if price_data:
-                # Notify all registered callbacks
-                for cb in self.callbacks:
-                    await cb(price_data)
-        
-        @self.sio.event
-        async def disconnect():
-            return response_message(message="Disconnected from the coindcx")
-        
     def register_callback(self,cb):
         self.callbacks.append(cb)
 
-
     async def start(self):
-        await self.sio.connect(url, transports='websocket')
-        await self.sio.wait()
-
-
+        self.subscription=await self.hub.subscribe(self.channel,'depth-snapshot',self.on_message)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
 
+    async def stop(self):
+        if self.subscription is not None:
+            subscription,self.subscription=self.subscription,None
+            await self.hub.unsubscribe(subscription)
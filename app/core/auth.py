@@ -1,7 +1,11 @@
 # auth.py
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from jose import JWTError, jwt
-from app.core.config import Settings
+from app.core.config import Settings, settings
 from fastapi.security import  HTTPBearer,HTTPAuthorizationCredentials
 from fastapi import Depends, HTTPException, status
 SECRET_KEY = Settings().JWT_SECRET_KEY
@@ -9,6 +13,73 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 256
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 security=HTTPBearer()
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified access tokens: sha256(token) -> (sub, exp).
+
+    A hit skips jwt.decode until the token's own `exp`; tokens without an
+    `exp` claim are never cached. Only successfully verified tokens are
+    stored, so a rejected token is re-checked every time.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self.digest(token)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        username, exp = entry
+        if time.time() >= exp:
+            del self.entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return username
+
+    def put(self, token: str, username: str, exp):
+        if self.max_entries <= 0 or not isinstance(exp, (int, float)):
+            return
+        key = self.digest(token)
+        self.entries[key] = (username, float(exp))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+token_cache = TokenCache(settings.JWT_CACHE_MAX_ENTRIES)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode ={"sub":data["sub"]}
     expire = datetime.utcnow() + (expires_delta or timedelta(  minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -20,13 +91,18 @@ def create_refresh_token(data: dict):
     to_encode = {"sub": data["sub"], "exp": expire}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(credentials:HTTPAuthorizationCredentials=Depends(security)):
+async def get_current_user(credentials:HTTPAuthorizationCredentials=Depends(security)):
+    # async so FastAPI runs it on the event loop: a cache hit costs no threadpool hop
     try:
         token=credentials.credentials
+        username=token_cache.get(token)
+        if username is not None:
+            return username
         payload=jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
         username:str=payload.get('sub')
         if username is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Invalid authentication credentials", headers={"WWW-Authenticate": "Bearer"})
+        token_cache.put(token,username,payload.get('exp'))
         return username
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token",headers={"WWW-Authenticate": "Bearer"})
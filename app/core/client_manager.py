@@ -1,53 +1,109 @@
-from typing import Dict, Set
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
 from fastapi import WebSocket
-import json
+from app.core.fanout import fanout
+from app.core.outbox import OutboxGroup
 
 class ClientManager:
+    """
+    Websocket clients and their (channel, symbol) subscriptions.
+
+    `index` maps each (channel, symbol) to the websockets subscribed to it, so
+    broadcast only visits interested clients. `refcounts` counts subscribers
+    per channel/symbol and backs get_backend_channels. Each client gets
+    its own outbox, so broadcast never waits on a slow socket.
+    """
+
     def __init__(self):
-        self.clients: Dict[WebSocket, Dict[str, list]] = {}
+        self.clients: Dict[WebSocket, Dict[str, Set[str]]] = {}
+        self.index: Dict[Tuple[str, str], Set[WebSocket]] = defaultdict(set)
+        self.refcounts: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._backend_channels = None   # cached get_backend_channels() result
+        self.outboxes = OutboxGroup(on_close=self.disconnect)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.clients[websocket] = {}
+        self.outboxes.open(websocket, websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.clients.pop(websocket, None)
+        self.outboxes.close(websocket, close_socket=False)
+        subs = self.clients.pop(websocket, None)
+        if not subs:
+            return
+        for channel, symbols in subs.items():
+            for s in symbols:
+                self._remove(websocket, channel, s)
 
     def subscribe(self, websocket: WebSocket, channel: str, symbols: list):
-        self.clients[websocket].setdefault(channel, [])
+        subscribed = self.clients[websocket].setdefault(channel, set())
         for s in symbols:
-            if s not in self.clients[websocket][channel]:
-                self.clients[websocket][channel].append(s)
+            if s in subscribed:
+                continue
+            subscribed.add(s)
+            self.index[(channel, s)].add(websocket)
+            counts = self.refcounts[channel]
+            counts[s] = counts.get(s, 0) + 1
+            if counts[s] == 1:
+                self._backend_channels = None
 
     def unsubscribe(self, websocket: WebSocket, channel: str, symbols: list):
-        if channel in self.clients[websocket]:
-            self.clients[websocket][channel] = [
-                s for s in self.clients[websocket][channel] if s not in symbols
-            ]
+        subscribed = self.clients[websocket].get(channel)
+        if not subscribed:
+            return
+        for s in symbols:
+            if s in subscribed:
+                subscribed.discard(s)
+                self._remove(websocket, channel, s)
+
+    def _remove(self, websocket: WebSocket, channel: str, symbol: str):
+        key = (channel, symbol)
+        sockets = self.index.get(key)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.index[key]
+        counts = self.refcounts.get(channel, {})
+        if symbol in counts:
+            counts[symbol] -= 1
+            if counts[symbol] <= 0:
+                del counts[symbol]
+                if not counts:
+                    del self.refcounts[channel]
+                self._backend_channels = None
 
     def get_backend_channels(self):
         """Return combined subscriptions for CoinDCX."""
-        backend_channels = {}
-        for sub in self.clients.values():
-            for ch, symbols in sub.items():
-                backend_channels.setdefault(ch, set()).update(symbols)
-        return [{"name": ch, "symbols": list(symbols)} for ch, symbols in backend_channels.items() if symbols]
+        if self._backend_channels is None:
+            self._backend_channels = [
+                {"name": ch, "symbols": list(counts)} for ch, counts in self.refcounts.items() if counts
+            ]
+        return self._backend_channels
 
     async def broadcast(self, topic: str, data: dict):
-        dead_clients = []
-        for ws, subs in self.clients.items():
-            if topic in subs:
-                client_symbols = subs[topic]
-                filtered_data = [d for d in data.get("data", []) if d["s"] in client_symbols]
-                if filtered_data:
-                    out = data.copy()
-                    out["data"] = filtered_data
-                    try:
-                        await ws.send_text(json.dumps(out))
-                    except:
-                        dead_clients.append(ws)
-        for ws in dead_clients:
-            self.disconnect(ws)
+        # Item indices each interested client should get, via the index
+        items = data.get("data", [])
+        per_client: Dict[WebSocket, List[int]] = defaultdict(list)
+        for i, d in enumerate(items):
+            for ws in self.index.get((topic, d["s"]), ()):
+                per_client[ws].append(i)
+
+        # Clients with the same subset share one encoded frame
+        groups: Dict[Tuple[int, ...], List[WebSocket]] = defaultdict(list)
+        for ws, indices in per_client.items():
+            groups[tuple(indices)].append(ws)
+
+        for indices, sockets in groups.items():
+            out = data.copy()
+            out["data"] = [items[i] for i in indices]
+            text = fanout.encode(out)
+            for ws in sockets:
+                outbox = self.outboxes.get(ws)
+                if outbox is not None:
+                    outbox.put(text, topic)
+
+    def metrics(self) -> dict:
+        return {"outboxes": self.outboxes.metrics()}
 
 
 client_manager = ClientManager()
@@ -15,13 +15,66 @@ class Settings(BaseSettings):
     MONGODB_URL: str = ("mongodb://localhost:27017")
 
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "tradingbot")
+    # Motor connection pool
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: int = 60_000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30_000
+    # Create / verify the indexes in app/core/indexes.py at startup
+    MONGO_ENSURE_INDEXES: bool = True
     
     COINDCX_WEBSOCKET_URL:str= 'wss://stream.coindcx.com'
+    # Messages queued per market data hub subscriber before the oldest is dropped
+    HUB_SUBSCRIBER_MAX_PENDING: int = 1000
+
+    # Local candle store
+    CANDLE_STORE_DIR: str = os.getenv("CANDLE_STORE_DIR", "data/candles")
+    # Sorted runs per (pair, interval) before the smallest adjacent ones are merged
+    CANDLE_STORE_MAX_PARTS: int = 16
+    # Build 5m..1d candles from stored 1m data; fetch missing 1m only when that takes
+    # at most this many times the requests of fetching the interval directly
+    CANDLE_RESAMPLE_ENABLED: bool = True
+    CANDLE_RESAMPLE_MAX_FETCH_RATIO: float = 2.0
+    # Live (intrabar) candle updates per subscriber at most this often, in seconds
+    CANDLE_UPDATE_MIN_INTERVAL: float = 1.0
+
+    # CoinDCX market details (symbol -> pair), refreshed in the background
+    MARKET_METADATA_TTL: float = 3600.0
+    MARKET_METADATA_SNAPSHOT: str = os.getenv("MARKET_METADATA_SNAPSHOT", "data/markets.json")
+
+    # Ticker snapshot: full ticker poll interval, plus live currentPrices@spot updates when enabled
+    TICKER_REFRESH_INTERVAL: float = 10.0
+    TICKER_STALE_AFTER: float = 30.0
+    TICKER_USE_STREAM: bool = True
+
+    # Backtest result cache
+    BACKTEST_CACHE_DIR: str = os.getenv("BACKTEST_CACHE_DIR", "data/backtest_cache")
+    BACKTEST_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    BACKTEST_CACHE_DISK_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    BACKTEST_CACHE_OPEN_TTL: float = 30.0   # seconds, results whose range includes the forming candle
+
+    # Worker processes shared by all parameter sweeps / walk-forward runs
+    SWEEP_POOL_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+
+    # Write-behind persistence for paper wallets
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 0.5
+    WRITE_BEHIND_MAX_PENDING: int = 10000
+    # Failed writes: retries with backoff up to the max delay, then the dead-letter list
+    WRITE_BEHIND_MAX_RETRIES: int = 8
+    WRITE_BEHIND_MAX_RETRY_DELAY: float = 30.0
+    # Longest a trade-path write waits for queue room before it is dead-lettered
+    WRITE_BEHIND_ENQUEUE_TIMEOUT: float = 1.0
+
+    # Per-client websocket send queue; a client that falls this far behind is disconnected
+    WS_OUTBOX_MAX_SIZE: int = 256
 
     # JWT settings
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 3000
+    # Verified-token LRU used by get_current_user (0 disables it)
+    JWT_CACHE_MAX_ENTRIES: int = 10_000
 
     # # Stripe settings
     # STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY", "sk_test_51R4hFWEi7L0cpUmSD625gUIerHKn2bUgsydMVdFM9AybFylVCnKiRj2OnqiRBwGWacir3fno3nHwzNOWFykKWY4J00amGLjWKO")
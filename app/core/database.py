@@ -1,7 +1,13 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
 
-client = AsyncIOMotorClient(settings.MONGODB_URL)
+client = AsyncIOMotorClient(
+    settings.MONGODB_URL,
+    maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+    serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
 db = client[settings.DATABASE_NAME]
 
 db_paper=client["paper_trading"]
@@ -0,0 +1,93 @@
+# app/core/fanout.py
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional fast path, stdlib json otherwise
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode(payload: Any) -> bytes:
+    """Compact UTF-8 JSON for one websocket frame (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+class Fanout:
+    """
+    Serialize-once websocket sends.
+
+    Each distinct payload is encoded once and the same frame goes to every
+    recipient. Frames are sent as text: the browser clients JSON.parse
+    `event.data`, which a binary frame would turn into a Blob.
+
+    `encode_shared` memoizes by payload identity, for feeds that hand the
+    same parsed hub message to one callback per socket. Payloads must not be
+    mutated after they have been sent.
+    """
+
+    def __init__(self, memo_size: int = 256):
+        self.memo_size = memo_size
+        self._memo: Dict[Tuple[int, Optional[str]], Tuple[Any, str]] = {}
+        self.encodes = 0
+        self.memo_hits = 0
+        self.frames_sent = 0
+
+    def encode(self, payload: Any) -> str:
+        self.encodes += 1
+        return encode(payload).decode()
+
+    def encode_shared(self, payload: Any, envelope: Optional[str] = None) -> str:
+        """Frame for `payload` (wrapped as {envelope: payload} if given), reused while the same object is re-sent."""
+        key = (id(payload), envelope)
+        cached = self._memo.get(key)
+        if cached is not None and cached[0] is payload:
+            self.memo_hits += 1
+            return cached[1]
+        text = self.encode(payload if envelope is None else {envelope: payload})
+        if len(self._memo) >= self.memo_size:
+            del self._memo[next(iter(self._memo))]
+        # Holding the payload keeps its id from being reused while memoized
+        self._memo[key] = (payload, text)
+        return text
+
+    async def send(self, websocket, text: str):
+        await websocket.send_text(text)
+        self.frames_sent += 1
+
+    async def send_to_all(self, websockets: Iterable, payload: Any) -> List:
+        """Encode once, send to every socket; returns the sockets whose send failed."""
+        text = self.encode(payload)
+        dead = []
+        for ws in websockets:
+            try:
+                await self.send(ws, text)
+            except Exception:
+                dead.append(ws)
+        return dead
+
+    def metrics(self) -> dict:
+        return {
+            "encoder": "orjson" if orjson is not None else "json",
+            "encodes": self.encodes,
+            "memo_hits": self.memo_hits,
+            "frames_sent": self.frames_sent,
+        }
+
+
+fanout = Fanout()
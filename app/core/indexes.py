@@ -0,0 +1,130 @@
+# app/core/indexes.py
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from app.core.database import db_paper, db_user
+
+IndexKeys = Tuple[Tuple[str, int], ...]
+
+# (database, collection) -> [(keys, options)]
+INDEX_SPECS: Dict[Tuple[str, str], List[Tuple[IndexKeys, dict]]] = {
+    ("paper_trading", "wallets"): [
+        ((("user_id", ASCENDING),), {"name": "user_id_unique", "unique": True}),
+    ],
+    ("paper_trading", "positions"): [
+        ((("user_id", ASCENDING), ("symbol", ASCENDING)), {"name": "user_id_symbol_unique", "unique": True}),
+    ],
+    ("paper_trading", "trades"): [
+        ((("user_id", ASCENDING), ("timestamp", DESCENDING)), {"name": "user_id_timestamp"}),
+        ((("user_id", ASCENDING), ("_id", DESCENDING)), {"name": "user_id_id"}),
+    ],
+    ("users", "user"): [
+        ((("username", ASCENDING),), {"name": "username"}),
+    ],
+}
+
+# Queries on the request / trade path: (database, collection, filter, sort)
+HOT_QUERIES: List[Tuple[str, str, dict, Optional[Sequence[Tuple[str, int]]]]] = [
+    ("paper_trading", "wallets", {"user_id": "u"}, None),
+    ("paper_trading", "positions", {"user_id": "u"}, None),
+    ("paper_trading", "positions", {"user_id": "u", "symbol": "B-BTC_USDT"}, None),
+    ("paper_trading", "trades", {"user_id": "u"}, [("_id", ASCENDING)]),
+    ("paper_trading", "trades", {"user_id": "u", "timestamp": "2024-01-01"}, None),
+    ("users", "user", {"username": "u"}, None),
+]
+
+DATABASES = {"paper_trading": db_paper, "users": db_user}
+
+
+def index_covers(keys: IndexKeys, filter_fields: Sequence[str], sort: Optional[Sequence[Tuple[str, int]]]) -> bool:
+    """
+    Whether an index can serve an equality filter on `filter_fields` plus
+    `sort` without scanning: the filter fields make up a prefix of the index
+    and the sort keys follow it (all in index direction, or all reversed).
+    """
+    names = [k for k, _ in keys]
+    n = len(filter_fields)
+    if set(names[:n]) != set(filter_fields):
+        return False
+    if not sort:
+        return True
+    following = list(keys[n:n + len(sort)])
+    if [k for k, _ in following] != [k for k, _ in sort]:
+        return False
+    same = all(d == sd for (_, d), (_, sd) in zip(following, sort))
+    reversed_ = all(d == -sd for (_, d), (_, sd) in zip(following, sort))
+    return same or reversed_
+
+
+def uncovered_hot_queries() -> List[tuple]:
+    """Hot queries no declared index serves (static check against INDEX_SPECS)."""
+    missing = []
+    for database, collection, query, sort in HOT_QUERIES:
+        specs = INDEX_SPECS.get((database, collection), [])
+        if not any(index_covers(keys, list(query), sort) for keys, _ in specs):
+            missing.append((database, collection, query, sort))
+    return missing
+
+
+def plan_stages(plan: dict) -> List[str]:
+    """Every stage name in an explain() winning plan tree."""
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        for key in ("inputStage", "queryPlan"):
+            if key in node:
+                stack.append(node[key])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+def winning_plan(explain: dict) -> dict:
+    planner = explain.get("queryPlanner", {})
+    return planner.get("winningPlan", {})
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Create any missing index from INDEX_SPECS and return the index names present per collection."""
+    present = {}
+    for (database, collection), specs in INDEX_SPECS.items():
+        coll = DATABASES[database][collection]
+        for keys, options in specs:
+            try:
+                await coll.create_index(list(keys), **options)
+            except PyMongoError as e:
+                # e.g. existing duplicates for a unique index: keep serving, but say so
+                print(f"⚠️ Index {database}.{collection}.{options['name']} not created: {e}")
+        info = await coll.index_information()
+        present[f"{database}.{collection}"] = sorted(info)
+        missing = [o["name"] for _, o in specs if o["name"] not in info]
+        if missing:
+            print(f"⚠️ Missing indexes on {database}.{collection}: {missing}")
+    print("🗂️ Mongo indexes verified")
+    return present
+
+
+async def explain_hot_queries() -> List[dict]:
+    """Explain each hot query against the live database and report whether it uses an index."""
+    report = []
+    for database, collection, query, sort in HOT_QUERIES:
+        cursor = DATABASES[database][collection].find(query)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        stages = plan_stages(winning_plan(await cursor.explain()))
+        report.append({
+            "collection": f"{database}.{collection}",
+            "filter": sorted(query),
+            "sort": [k for k, _ in sort] if sort else [],
+            "stages": stages,
+            "indexed": "IXSCAN" in stages or "IDHACK" in stages or "EXPRESS_IXSCAN" in stages,
+            "collection_scan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages,
+        })
+    return report
@@ -0,0 +1,199 @@
+# app/core/outbox.py
+import asyncio
+from collections import deque
+from typing import Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+from app.core.fanout import fanout
+
+# What to do with a queued message when a newer one arrives / the queue is full
+COALESCE = "coalesce"   # keep only the latest pending message per (type, key)
+RELIABLE = "reliable"   # always delivered in order; overflow disconnects the client
+
+MESSAGE_POLICIES = {
+    "candle_update": COALESCE,
+    "depth_snapshot": COALESCE,
+    "trade_executed": RELIABLE,
+}   # anything not listed is RELIABLE as well
+
+
+def coalesce_key(message: dict) -> Hashable:
+    """
+    Key under which a COALESCE message replaces its pending predecessor.
+    Candle updates are keyed by symbol and candle open time, so only updates
+    of the same bar coalesce: a bar's closing update is never replaced by the
+    next bar's first live update.
+    """
+    if message.get("type") == "candle_update":
+        return message.get("symbol"), (message.get("candle") or {}).get("time")
+    return message.get("symbol")
+
+
+class ClientOutbox:
+    """
+    Bounded outbound queue and writer task for one websocket.
+
+    Producers call put() and never wait on the socket, so a stalled client
+    only backs up its own queue. COALESCE messages replace their pending
+    predecessor in place; anything else is appended, and a client whose
+    queue is full is disconnected rather than silently losing messages.
+    """
+
+    def __init__(self, websocket, max_size: int = None, on_close: Optional[Callable] = None):
+        self.websocket = websocket
+        self.max_size = max_size or settings.WS_OUTBOX_MAX_SIZE
+        self.on_close = on_close
+        self.queue = deque()            # [type, key, text] entries
+        self.pending: Dict[tuple, list] = {}   # coalesce (type, key) -> queued entry
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.overflowed = False
+        self.high_water = 0
+
+    def put(self, text: str, msg_type: Optional[str] = None, key: Hashable = None) -> bool:
+        """Queue an encoded frame; False if the client is gone or just overflowed."""
+        if self.closed:
+            return False
+        coalesce = MESSAGE_POLICIES.get(msg_type) == COALESCE
+        if coalesce:
+            entry = self.pending.get((msg_type, key))
+            if entry is not None:
+                entry[2] = text
+                self.coalesced += 1
+                return True
+        if len(self.queue) >= self.max_size:
+            print(f"⚠️ Outbox overflow ({len(self.queue)} queued), disconnecting client")
+            self.overflowed = True
+            self.close()
+            return False
+
+        entry = [msg_type, key, text]
+        self.queue.append(entry)
+        if coalesce:
+            self.pending[(msg_type, key)] = entry
+        self.high_water = max(self.high_water, len(self.queue))
+        self._idle.clear()
+        self._wake.set()
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self):
+        while not self.closed:
+            if not self.queue:
+                self._idle.set()
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            entry = self.queue.popleft()
+            msg_type, key, text = entry
+            if self.pending.get((msg_type, key)) is entry:
+                del self.pending[(msg_type, key)]
+            try:
+                await fanout.send(self.websocket, text)
+                self.sent += 1
+            except Exception as e:
+                print(f"WebSocket send error: {e}")
+                self.close()
+
+    def close(self, close_socket: bool = True):
+        """Stop the writer, drop what is queued and tell the owner; idempotent."""
+        if self.closed:
+            return
+        self.closed = True
+        self.dropped = len(self.queue)
+        self.queue.clear()
+        self.pending.clear()
+        self._idle.set()
+        self._wake.set()
+        if self.task is not None and not self.task.done() and self.task is not asyncio.current_task():
+            self.task.cancel()
+        if self.dropped:
+            print(f"🗑️ Dropped {self.dropped} queued messages for closed client")
+        if close_socket:
+            asyncio.create_task(self._close_socket())
+        if self.on_close is not None:
+            self.on_close(self)
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+    async def join(self):
+        """Wait until everything queued so far has been written (or the outbox closed)."""
+        await self._idle.wait()
+
+    def metrics(self) -> dict:
+        return {
+            "depth": len(self.queue),
+            "high_water": self.high_water,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "overflowed": self.overflowed,
+        }
+
+
+class OutboxGroup:
+    """
+    The outboxes of one owner (client manager, trading manager), keyed by
+    client. Keeps totals for clients that are already gone.
+    """
+
+    def __init__(self, max_size: int = None, on_close: Optional[Callable] = None):
+        self.max_size = max_size
+        self.on_close = on_close        # called with the key once an outbox closes itself
+        self.outboxes: Dict[Hashable, ClientOutbox] = {}
+        self.overflow_disconnects = 0
+        self.dropped = 0
+        self.sent = 0
+        self.coalesced = 0
+
+    def open(self, key: Hashable, websocket) -> ClientOutbox:
+        """Outbox for a newly connected socket; replaces (without closing its socket) any previous one for key."""
+        self.close(key, close_socket=False)
+        outbox = ClientOutbox(websocket, self.max_size, on_close=lambda o: self._closed(key, o))
+        self.outboxes[key] = outbox
+        return outbox
+
+    def get(self, key: Hashable) -> Optional[ClientOutbox]:
+        return self.outboxes.get(key)
+
+    def close(self, key: Hashable, close_socket: bool = True):
+        outbox = self.outboxes.get(key)
+        if outbox is not None:
+            outbox.on_close = None
+            outbox.close(close_socket)
+            self._closed(key, outbox, notify=False)
+
+    def _closed(self, key: Hashable, outbox: ClientOutbox, notify: bool = True):
+        if self.outboxes.get(key) is not outbox:
+            return
+        del self.outboxes[key]
+        self.overflow_disconnects += outbox.overflowed
+        self.dropped += outbox.dropped
+        self.sent += outbox.sent
+        self.coalesced += outbox.coalesced
+        if notify and self.on_close is not None:
+            self.on_close(key)
+
+    def metrics(self) -> dict:
+        live = list(self.outboxes.values())
+        return {
+            "clients": len(live),
+            "queued": sum(len(o.queue) for o in live),
+            "max_depth": max((len(o.queue) for o in live), default=0),
+            "high_water": max((o.high_water for o in live), default=0),
+            "sent": self.sent + sum(o.sent for o in live),
+            "coalesced": self.coalesced + sum(o.coalesced for o in live),
+            "dropped": self.dropped,
+            "overflow_disconnects": self.overflow_disconnects,
+        }
@@ -0,0 +1,107 @@
+# app/core/repository.py
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from app.core.database import positions, trades, wallets
+from app.utils.intervals import to_ms
+from app.utils.serialize_doc import serialize_doc
+
+# Projections: read only what the caller uses. Every query here is served
+# by an index from app/core/indexes.py.
+WALLET_FIELDS = {
+    "user_id": 1, "total_balance": 1, "available_balance": 1,
+    "currency": 1, "created_at": 1, "updated_at": 1,
+}
+BALANCE_FIELDS = {"_id": 0, "total_balance": 1, "available_balance": 1}
+POSITION_FIELDS = {
+    "user_id": 1, "symbol": 1, "qty": 1, "entry_price": 1, "current_price": 1, "side": 1,
+    "is_closed": 1, "realized_pnl": 1, "unrealized_pnl": 1, "fees": 1, "last_updated": 1,
+}
+TRADE_FIELDS = {
+    "symbol": 1, "side": 1, "price": 1, "qty": 1, "fee": 1,
+    "realized_pnl": 1, "timestamp": 1, "mode": 1,
+}
+
+
+async def get_wallet(user_id: str) -> Optional[dict]:
+    return serialize_doc(await wallets.find_one({"user_id": user_id}, WALLET_FIELDS))
+
+
+async def get_balances(user_id: str) -> Optional[dict]:
+    """{total_balance, available_balance} or None when the user has no wallet."""
+    return await wallets.find_one({"user_id": user_id}, BALANCE_FIELDS)
+
+
+async def wallet_exists(user_id: str) -> bool:
+    return await wallets.find_one({"user_id": user_id}, {"_id": 1}) is not None
+
+
+async def list_positions(user_id: str, limit: Optional[int] = 100) -> List[dict]:
+    docs = await positions.find({"user_id": user_id}, POSITION_FIELDS).to_list(limit)
+    return [serialize_doc(d) for d in docs]
+
+
+def _object_id_at(value) -> ObjectId:
+    """Smallest ObjectId generated at `value` (epoch s/ms or ISO string)."""
+    return ObjectId.from_datetime(datetime.fromtimestamp(to_ms(value) / 1000, tz=timezone.utc))
+
+
+def trade_filter(user_id: str, after: Optional[str] = None, start=None, end=None, descending: bool = False) -> dict:
+    """
+    Query for a user's trades past cursor `after` (a trade _id), created in
+    [start, end). Times filter on the _id creation time, so everything runs
+    on the (user_id, _id) index.
+    """
+    id_range = {}
+    if start is not None:
+        id_range["$gte"] = _object_id_at(start)
+    if end is not None:
+        id_range["$lt"] = _object_id_at(end)
+    if after is not None:
+        if not ObjectId.is_valid(after):
+            raise ValueError(f"Invalid cursor '{after}'")
+        id_range["$lt" if descending else "$gt"] = ObjectId(after)
+        if descending and end is not None:
+            id_range["$lt"] = min(ObjectId(after), _object_id_at(end))
+    query = {"user_id": user_id}
+    if id_range:
+        query["_id"] = id_range
+    return query
+
+
+def _trade(doc: dict) -> dict:
+    out = serialize_doc(doc)
+    out["created_at"] = doc["_id"].generation_time.isoformat()
+    return out
+
+
+async def page_trades(user_id: str, limit: int = 100, after: Optional[str] = None, start=None, end=None,
+                      descending: bool = False) -> Tuple[List[dict], Optional[str]]:
+    """One keyset page of trades and the cursor for the next page (None on the last one)."""
+    query = trade_filter(user_id, after, start, end, descending)
+    cursor = trades.find(query, TRADE_FIELDS).sort("_id", DESCENDING if descending else ASCENDING).limit(limit + 1)
+    docs = await cursor.to_list(limit + 1)
+    page = [_trade(d) for d in docs[:limit]]
+    next_cursor = page[-1]["_id"] if len(docs) > limit else None
+    return page, next_cursor
+
+
+async def iter_trade_batches(user_id: str, start=None, end=None, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+    """
+    Every matching trade, oldest first, in lists of at most `batch_size`.
+    Each batch is its own keyset query, so only one batch is ever held and
+    no server cursor stays open between batches.
+    """
+    after = None
+    while True:
+        query = trade_filter(user_id, after, start, end)
+        docs = await trades.find(query, TRADE_FIELDS).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+        if not docs:
+            return
+        yield [_trade(d) for d in docs]
+        if len(docs) < batch_size:
+            return
+        after = str(docs[-1]["_id"])
@@ -5,27 +5,27 @@ from app.routes import coindcx_socket_connection, paper_trading, strategies,back
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.services.trading_manager import trading_manager
-
-app=FastAPI(title="Trading Backend",version="0.117.1")
-
-# app.include_router(strategies.router,prefix="/strategies",tags=["Strategies"])
-app.include_router(backtest.backtest_router)
-app.include_router(paper_trading.paper_router)
-
-# app.include_router(live.router,prefix="/live",tags=["Live Trading"])
-# app.include_router(auto.router,prefix="/auto",tags=["Auto Trading"])
-app.include_router(user.auth_router)
-app.include_router(wallet.wallet_router)
-app.include_router(coindcx_socket_connection.router)
-
-@app.get('/')
-async def root():
-    return {"message": "Trading backend running 🚀"}
+from app.coindcx_rest_apis.async_candles import candle_client
+from app.services.market_data_hub import market_data_hub
+from app.services.write_behind import write_behind
+from app.services.market_metadata import market_metadata
+from app.services.ticker_snapshot import ticker_snapshot
+from app.core.indexes import ensure_indexes
+from app.services.parameter_sweep import shutdown_pool, start_pool
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Start GENTLE cleanup task (24h threshold)
     cleanup_task = asyncio.create_task(trading_manager.cleanup_old_users())
+    if settings.MONGO_ENSURE_INDEXES:
+        try:
+            await ensure_indexes()
+        except Exception as e:
+            print(f"⚠️ Index bootstrap failed: {e}")
+    write_behind.start()
+    market_metadata.start()
+    ticker_snapshot.start()
+    start_pool()
     yield
     # On shutdown: gracefully stop all trading
     # This is still important for server restarts/deployments
@@ -37,9 +37,32 @@ async def lifespan(app: FastAPI):
         await cleanup_task
     except asyncio.CancelledError:
         pass
+    # Flush queued wallet/position/trade writes before exiting
+    await write_behind.stop()
+    await candle_client.close()
+    await ticker_snapshot.close()
+    await market_data_hub.close()
+    await market_metadata.close()
+    await asyncio.to_thread(shutdown_pool)
     print("✅ All trading sessions stopped")
 
 
+app=FastAPI(title="Trading Backend",version="0.117.1",lifespan=lifespan)
+
+# app.include_router(strategies.router,prefix="/strategies",tags=["Strategies"])
+app.include_router(backtest.backtest_router)
+app.include_router(paper_trading.paper_router)
+
+# app.include_router(live.router,prefix="/live",tags=["Live Trading"])
+# app.include_router(auto.router,prefix="/auto",tags=["Auto Trading"])
+app.include_router(user.auth_router)
+app.include_router(wallet.wallet_router)
+app.include_router(coindcx_socket_connection.router)
+
+@app.get('/')
+async def root():
+    return {"message": "Trading backend running 🚀"}
+
 settings=Settings()
 app.add_middleware(
     CORSMiddleware,
@@ -47,4 +70,5 @@ app.add_middleware(
     allow_credentials=settings.CORS_CREDENTIALS,
     allow_methods=settings.CORS_METHODS,
     allow_headers=settings.CORS_HEADERS,
+    expose_headers=["X-Next-Cursor"],
 )
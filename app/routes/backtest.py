@@ -1,22 +1,113 @@
 # app/routes/backtest.py
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app.strategies import STRATEGY_REGISTRY
-from app.coindcx_rest_apis.fetch_candles import fetch_coindcx_candles
-from app.services.backtest_engine import run_backtest
-from app.schemas.backtest import BacktestRequest
+from app.coindcx_rest_apis.async_candles import (
+    MAX_RANGE_CANDLES, fetch_coindcx_candle_arrays_async, fetch_coindcx_candles_async, range_candle_count,
+)
+from app.services.backtest_engine import ENGINE_REGISTRY, candles_to_arrays, iter_backtest_chunks
+from app.services.backtest_cache import backtest_cache, backtest_request_key
+from app.services.backtest_analytics import compute_metrics, equity_curve_arrays
+from app.services.parameter_sweep import SWEEP_METRICS, build_param_grid, grid_size, run_sweep
+from app.services.monte_carlo import BAND_ELEMENTS, MONTE_CARLO_METHODS, run_monte_carlo
+from app.services.portfolio_backtest import ALLOCATION_RULES, run_portfolio_backtest
+from app.services.walk_forward import build_folds, run_walk_forward
+from app.schemas.backtest import (
+    BacktestMonteCarloRequest, BacktestPortfolioRequest, BacktestRequest, BacktestSweepRequest, BacktestWalkForwardRequest, StrategyParams,
+)
 from app.utils.response_message import response_message
 from app.utils.safe_float import safe_float
-import numpy as np
 from datetime import datetime
+import asyncio
+import json
+
+MAX_SIMULATIONS = 100_000
+MAX_BAND_POINTS = 500       # a chart's worth of x values
+MAX_PORTFOLIO_PAIRS = 50
+MAX_SWEEP_COMBOS = 5000     # server-side cap on top of the request's max_combos
 
 backtest_router = APIRouter(prefix="/api", tags=["BackTesting"])
 
 
+def _validate_candle_window(params):
+    """
+    Reject a candle window (interval, limit, startTime, endTime) that would
+    page in more than MAX_RANGE_CANDLES candles, with a 400, before fetching.
+    """
+    try:
+        count = range_candle_count(params.interval, params.limit, params.startTime, params.endTime)
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid startTime / endTime: {e}")
+    if count > MAX_RANGE_CANDLES:
+        raise HTTPException(
+            400, f"The requested window spans {count} {params.interval} candles, at most {MAX_RANGE_CANDLES} are allowed"
+        )
+
+
+def _report_sections(m: dict, initial_capital: float, final_balance: float) -> dict:
+    """Summary blocks of a backtest response, from compute_metrics output."""
+    return {
+        "overview": {
+            "total_trades": m["total_trades"],
+            "winning_trades": m["winning_trades"],
+            "losing_trades": m["losing_trades"],
+            "win_rate": round(m["win_rate"], 2),
+            "total_return": round(m["total_return"], 2),
+            "final_equity": round(final_balance, 2),
+            "initial_capital": round(initial_capital, 2),
+            "net_profit": round(m["net_profit"], 2),
+        },
+        "performance": {
+            "total_return_pct": round(m["total_return"], 2),
+            "annual_return": round(m["cagr"], 2),
+            "sharpe_ratio": safe_float(m["sharpe_ratio"]),
+            "max_drawdown": round(m["max_drawdown"], 2),
+            "volatility": round(m["volatility"], 2),
+            "annualized_volatility": round(m["annualized_volatility"], 2),
+            "exposure_pct": round(m["exposure_pct"], 2),
+        },
+        "risk_ratios": {
+            "sharpe": safe_float(m["sharpe_ratio"]),
+            "sortino": safe_float(m["sortino_ratio"]),
+            "calmar": safe_float(m["calmar_ratio"]),
+            "risk_reward_ratio": safe_float(m["risk_reward_ratio"]),
+        },
+        "trade_analysis": {
+            "avg_win": round(m["avg_win"], 2),
+            "avg_loss": round(m["avg_loss"], 2),
+            "largest_win": round(m["largest_win"], 2),
+            "largest_loss": round(m["largest_loss"], 2),
+            "avg_trade": round(m["avg_trade"], 2),
+            "profit_factor": safe_float(m["profit_factor"]),
+            "longest_win_streak": m["longest_win_streak"],
+            "longest_loss_streak": m["longest_loss_streak"],
+            "avg_holding_time": f"{round(m['avg_holding_hours'], 2)}h",
+        },
+    }
+
+
 @backtest_router.post("/backtest")
 async def run_backtest_endpoint(body: BacktestRequest):
+    strategy_cls = STRATEGY_REGISTRY.get(body.strategy)
+    if not strategy_cls:
+        raise HTTPException(400, f"Unknown strategy '{body.strategy}'")
+
+    engine = ENGINE_REGISTRY.get(body.engine)
+    if not engine:
+        raise HTTPException(400, f"Unknown engine '{body.engine}'")
+
+    # Identical requests are served from the result cache
+    key, expires_at = backtest_request_key(body)
+    if key:
+        cached = await run_in_threadpool(backtest_cache.get, key)
+        if cached is not None:
+            return response_message("Backtest successful", json.loads(cached))
+
     # 1️⃣ Fetch candle data
     candle_params = body.candle_params
-    candles = fetch_coindcx_candles(
+    _validate_candle_window(candle_params)
+    candles = await fetch_coindcx_candles_async(
         candle_params.pair,
         candle_params.interval,
         candle_params.limit,
@@ -27,13 +118,10 @@ async def run_backtest_endpoint(body: BacktestRequest):
     if not candles:
         raise HTTPException(502, "No candles fetched")
 
-    # 2️⃣ Load strategy and run backtest
-    strategy_cls = STRATEGY_REGISTRY.get(body.strategy)
-    if not strategy_cls:
-        raise HTTPException(400, f"Unknown strategy '{body.strategy}'")
-
+    # 2️⃣ Run backtest
     strategy = strategy_cls(body.params)
-    result = run_backtest(
+    result = await run_in_threadpool(
+        engine,
         candles,
         strategy,
         body.initial_capital,
@@ -42,149 +130,355 @@ async def run_backtest_endpoint(body: BacktestRequest):
     )
     
     trades = result.get("trades", [])
-    equity_curve_raw = result.get("equity_curve", [])
+    equity_curve = result.get("equity_curve", [])
     final_balance = result.get("final_balance", body.initial_capital)
     signals = result.get("signals", [])
-    
-    # 3️⃣ Normalize equity_curve
-    equity_curve = []
-    if len(equity_curve_raw) > 0:
-        if isinstance(equity_curve_raw[0], dict) and "value" in equity_curve_raw[0]:
-            equity_curve = equity_curve_raw
-            equity_values = [pt["value"] for pt in equity_curve]
-        else:  # assume list of floats
-            equity_values = equity_curve_raw
-            # assign timestamps based on candle times for proper equity curve
-            if candles and len(candles) == len(equity_values):
-                equity_curve = [
-                    {"time": candles[i]["time"], "value": v} for i, v in enumerate(equity_values)
-                ]
-            else:
-                equity_curve = [
-                    {"time": datetime.utcnow().isoformat(), "value": v} for v in equity_values
-                ]
+
+    # 3️⃣ Compute analytics
+    if equity_curve:
+        times, equity = equity_curve_arrays(equity_curve)
     else:
-        equity_values = [body.initial_capital]
+        times, equity = [], [body.initial_capital]
         equity_curve = [{"time": datetime.utcnow().isoformat(), "value": body.initial_capital}]
+    m = compute_metrics(equity, times, trades, body.initial_capital, final_balance, candle_params.interval)
 
-    # 4️⃣ Compute analytics
-    initial_balance = body.initial_capital
-    total_return = ((final_balance - initial_balance) / initial_balance) * 100
-    net_profit = final_balance - initial_balance
-
-    total_trades = len(trades)
-    pnl_list = [t.get("pnl", 0) or t.get("realized_pnl", 0) for t in trades]
-
-    winning_trades = [p for p in pnl_list if p > 0]
-    losing_trades = [p for p in pnl_list if p <= 0]
-    win_rate = (len(winning_trades) / total_trades * 100) if total_trades else 0
-
-    # Max drawdown
-    peak, max_drawdown = equity_values[0], 0
-    for v in equity_values:
-        if v > peak:
-            peak = v
-        drawdown = (peak - v) / peak
-        max_drawdown = max(max_drawdown, drawdown)
-
-    # Volatility & Sharpe
-    returns = np.diff(equity_values) / equity_values[:-1] if len(equity_values) > 1 else [0]
-    mean_return = np.mean(returns) if len(returns) > 0 else 0
-    std_return = np.std(returns) if len(returns) > 0 else 0
-    sharpe_ratio = (mean_return / std_return * np.sqrt(252)) if std_return > 0 else 0
-    
-    # Profit factor with safe division
-    total_wins = sum(winning_trades) if winning_trades else 0
-    total_losses = abs(sum(losing_trades)) if losing_trades else 0
-    profit_factor = total_wins / total_losses if total_losses > 0 else float("inf")
-
-    # CAGR
-    if len(equity_curve) >= 2:
-        try:
-            start_time = datetime.fromisoformat(equity_curve[0]["time"].replace('Z', '+00:00'))
-            end_time = datetime.fromisoformat(equity_curve[-1]["time"].replace('Z', '+00:00'))
-            years = max((end_time - start_time).days / 365, 0.01)
-            cagr = ((final_balance / initial_balance) ** (1 / years) - 1) * 100 if years > 0 else 0
-        except:
-            cagr = 0
-    else:
-        cagr = 0
-
-    # Trade streaks & avg holding time
-    longest_win_streak = longest_loss_streak = cur_win = cur_loss = 0
-    holding_times = []
-
-    for t in trades:
-        pnl = t.get("pnl", 0) or t.get("realized_pnl", 0)
-        if pnl > 0:
-            cur_win += 1
-            cur_loss = 0
-        else:
-            cur_loss += 1
-            cur_win = 0
-        longest_win_streak = max(longest_win_streak, cur_win)
-        longest_loss_streak = max(longest_loss_streak, cur_loss)
-
-        # Handle different timestamp field names
-        entry_time = t.get("entry_time") or t.get("time")
-        exit_time = t.get("exit_time")
-        if entry_time and exit_time:
-            try:
-                start = datetime.fromisoformat(entry_time.replace('Z', '+00:00'))
-                end = datetime.fromisoformat(exit_time.replace('Z', '+00:00'))
-                holding_times.append((end - start).total_seconds() / 3600)
-            except:
-                pass
-
-    avg_holding_time = f"{round(np.mean(holding_times), 2)}h" if holding_times else "0h"
-
-    # Calculate additional metrics for frontend
-    avg_win = np.mean(winning_trades) if winning_trades else 0
-    avg_loss = np.mean(losing_trades) if losing_trades else 0
-    largest_win = max(winning_trades) if winning_trades else 0
-    largest_loss = min(losing_trades) if losing_trades else 0
-    avg_trade = np.mean(pnl_list) if pnl_list else 0
-
-    # 5️⃣ Build response matching frontend expectations
+    # 4️⃣ Build response matching frontend expectations
     data = {
         "candles": candles,
         "signals": signals,  # Make sure your backtest engine returns signals
-        "overview": {
-            "total_trades": total_trades,
-            "winning_trades": len(winning_trades),
-            "losing_trades": len(losing_trades),
-            "win_rate": round(win_rate, 2),
-            "total_return": round(total_return, 2),
-            "final_equity": round(final_balance, 2),
-            "initial_capital": round(initial_balance, 2),
-            "net_profit": round(net_profit, 2),
-        },
-        "performance": {
-            "total_return_pct": round(total_return, 2),
-            "annual_return": round(cagr, 2),
-            "sharpe_ratio": safe_float(sharpe_ratio),
-            "max_drawdown": round(max_drawdown * 100, 2),
-            "volatility": round(std_return * 100, 2),
-        },
-        "risk_ratios": {
-            "sharpe": safe_float(sharpe_ratio),
-            "sortino": safe_float(sharpe_ratio),  # You might want to calculate proper Sortino ratio
-            "calmar": safe_float(cagr / (max_drawdown * 100)) if max_drawdown > 0 else 0,
-            "risk_reward_ratio": safe_float(avg_win / abs(avg_loss)) if avg_loss != 0 else float("inf"),
-        },
+        **_report_sections(m, body.initial_capital, final_balance),
         "trades": trades,
-        "trade_analysis": {
-            "avg_win": round(avg_win, 2),
-            "avg_loss": round(avg_loss, 2),
-            "largest_win": round(largest_win, 2),
-            "largest_loss": round(largest_loss, 2),
-            "avg_trade": round(avg_trade, 2),
-            "profit_factor": safe_float(profit_factor),
-            "longest_win_streak": longest_win_streak,
-            "longest_loss_streak": longest_loss_streak,
-            "avg_holding_time": avg_holding_time,
-        },
         "equity_curve": equity_curve,
     }
 
-    return response_message("Backtest successful", data)
\ No newline at end of file
+    if key:
+        await run_in_threadpool(backtest_cache.put, key, json.dumps(data).encode(), expires_at)
+    return response_message("Backtest successful", data)
+
+
+@backtest_router.get("/backtest/cache/stats")
+async def get_backtest_cache_stats():
+    return response_message("Backtest cache stats", backtest_cache.metrics())
+
+
+@backtest_router.delete("/backtest/cache")
+async def clear_backtest_cache():
+    await run_in_threadpool(backtest_cache.clear)
+    return response_message("Backtest cache cleared", backtest_cache.metrics())
+
+
+def _validated_param_ranges(body) -> dict:
+    """Shared checks for grid requests (sweep / walk-forward); returns plain param ranges."""
+    if body.strategy not in STRATEGY_REGISTRY:
+        raise HTTPException(400, f"Unknown strategy '{body.strategy}'")
+    if body.metric not in SWEEP_METRICS:
+        raise HTTPException(400, f"Unknown metric '{body.metric}', expected one of {list(SWEEP_METRICS)}")
+
+    unknown = [name for name in body.param_ranges if name not in StrategyParams.model_fields]
+    if unknown:
+        raise HTTPException(400, f"Unknown strategy params {unknown}")
+    param_ranges = {name: r.model_dump() for name, r in body.param_ranges.items()}
+    if any(r["step"] <= 0 for r in param_ranges.values()):
+        raise HTTPException(400, "Parameter range steps must be positive")
+
+    total = grid_size(param_ranges)
+    if total == 0:
+        raise HTTPException(400, "Parameter ranges produce no combinations")
+    max_combos = min(body.max_combos, MAX_SWEEP_COMBOS)
+    if total > max_combos:
+        raise HTTPException(400, f"Parameter grid has {total} combinations, above max_combos={max_combos}")
+    return param_ranges
+
+
+@backtest_router.post("/backtest/sweep")
+async def run_backtest_sweep(body: BacktestSweepRequest):
+    param_ranges = _validated_param_ranges(body)
+
+    # Fetch the candle series once for the whole grid
+    candle_params = body.candle_params
+    _validate_candle_window(candle_params)
+    candles = await fetch_coindcx_candles_async(
+        candle_params.pair,
+        candle_params.interval,
+        candle_params.limit,
+        candle_params.startTime,
+        candle_params.endTime
+    )
+    if not candles:
+        raise HTTPException(502, "No candles fetched")
+
+    arrays = candles_to_arrays(candles)
+    sweep = await run_in_threadpool(
+        run_sweep,
+        arrays,
+        body.strategy,
+        build_param_grid(param_ranges),
+        body.initial_capital,
+        body.fee_rate,
+        body.position_size_pct,
+        body.metric,
+        body.workers,
+        candle_params.interval,
+    )
+
+    data = {
+        "strategy": body.strategy,
+        "metric": body.metric,
+        "candles": len(candles),
+        "total_combos": sweep["total_combos"],
+        "workers": sweep["workers"],
+        "elapsed_sec": sweep["elapsed_sec"],
+        "combos_per_sec": sweep["combos_per_sec"],
+        "failed": sweep["failed"],
+        "results": sweep["results"][:body.top_n],
+    }
+    return response_message("Parameter sweep successful", data)
+
+
+@backtest_router.post("/backtest/walk_forward")
+async def run_backtest_walk_forward(body: BacktestWalkForwardRequest):
+    param_ranges = _validated_param_ranges(body)
+    if body.in_sample_bars <= 0 or body.out_of_sample_bars <= 0 or (body.step_bars is not None and body.step_bars <= 0):
+        raise HTTPException(400, "Window sizes must be positive")
+
+    # Fetch the candle series once; every fold works on views of it
+    candle_params = body.candle_params
+    _validate_candle_window(candle_params)
+    candles = await fetch_coindcx_candles_async(
+        candle_params.pair,
+        candle_params.interval,
+        candle_params.limit,
+        candle_params.startTime,
+        candle_params.endTime
+    )
+    if not candles:
+        raise HTTPException(502, "No candles fetched")
+
+    folds = build_folds(len(candles), body.in_sample_bars, body.out_of_sample_bars, body.step_bars, body.anchored)
+    if not folds:
+        raise HTTPException(
+            400,
+            f"{len(candles)} candles are not enough for one fold of "
+            f"{body.in_sample_bars} in-sample + {body.out_of_sample_bars} out-of-sample bars",
+        )
+
+    arrays = candles_to_arrays(candles)
+    report = await run_in_threadpool(
+        run_walk_forward,
+        arrays,
+        body.strategy,
+        build_param_grid(param_ranges),
+        folds,
+        body.initial_capital,
+        body.fee_rate,
+        body.position_size_pct,
+        body.metric,
+        body.workers,
+        candle_params.interval,
+    )
+
+    data = {
+        "strategy": body.strategy,
+        "metric": body.metric,
+        "anchored": body.anchored,
+        "candles": len(candles),
+        **report,
+    }
+    return response_message("Walk-forward optimization successful", data)
+
+
+def _validate_monte_carlo(body: BacktestMonteCarloRequest):
+    """Reject simulation settings run_monte_carlo can't handle with a 400 instead of a 500."""
+    if body.method not in MONTE_CARLO_METHODS:
+        raise HTTPException(400, f"Unknown method '{body.method}', expected one of {sorted(MONTE_CARLO_METHODS)}")
+    if not 0 < body.simulations <= MAX_SIMULATIONS:
+        raise HTTPException(400, f"simulations must be between 1 and {MAX_SIMULATIONS}")
+    if not 0 < body.band_points <= MAX_BAND_POINTS:
+        raise HTTPException(400, f"band_points must be between 1 and {MAX_BAND_POINTS}")
+    if body.simulations * body.band_points > BAND_ELEMENTS:
+        raise HTTPException(400, f"simulations x band_points must be at most {BAND_ELEMENTS}")
+    if not 0 <= body.fee_jitter_pct <= 100:
+        raise HTTPException(400, "fee_jitter_pct must be between 0 and 100")
+    if body.slippage_bps < 0:
+        raise HTTPException(400, "slippage_bps must not be negative")
+    if not 0 <= body.ruin_threshold_pct <= 100:
+        raise HTTPException(400, "ruin_threshold_pct must be between 0 and 100")
+
+
+@backtest_router.post("/backtest/monte_carlo")
+async def run_backtest_monte_carlo(body: BacktestMonteCarloRequest):
+    _validate_monte_carlo(body)
+    strategy_cls = STRATEGY_REGISTRY.get(body.strategy)
+    if not strategy_cls:
+        raise HTTPException(400, f"Unknown strategy '{body.strategy}'")
+    engine = ENGINE_REGISTRY.get(body.engine)
+    if not engine:
+        raise HTTPException(400, f"Unknown engine '{body.engine}'")
+
+    candle_params = body.candle_params
+    _validate_candle_window(candle_params)
+    candles = await fetch_coindcx_candles_async(
+        candle_params.pair,
+        candle_params.interval,
+        candle_params.limit,
+        candle_params.startTime,
+        candle_params.endTime
+    )
+    if not candles:
+        raise HTTPException(502, "No candles fetched")
+
+    result = await run_in_threadpool(
+        engine,
+        candles,
+        strategy_cls(body.params),
+        body.initial_capital,
+        body.fee_rate,
+        body.position_size_pct,
+    )
+    simulation = await run_in_threadpool(
+        run_monte_carlo,
+        result["trades"],
+        body.initial_capital,
+        body.fee_rate,
+        body.position_size_pct,
+        body.simulations,
+        body.method,
+        body.fee_jitter_pct,
+        body.slippage_bps,
+        body.ruin_threshold_pct,
+        body.band_points,
+        seed=body.seed,
+    )
+    if not simulation["trades"]:
+        raise HTTPException(400, "Backtest produced no closed trades to resample")
+
+    data = {
+        "strategy": body.strategy,
+        "backtest_final_balance": round(result["final_balance"], 2),
+        **simulation,
+    }
+    return response_message("Monte Carlo simulation successful", data)
+
+
+@backtest_router.post("/backtest/portfolio")
+async def run_backtest_portfolio(body: BacktestPortfolioRequest):
+    pairs = list(dict.fromkeys(body.pairs))
+    if not pairs:
+        raise HTTPException(400, "No pairs given")
+    if len(pairs) > MAX_PORTFOLIO_PAIRS:
+        raise HTTPException(400, f"At most {MAX_PORTFOLIO_PAIRS} pairs per portfolio backtest")
+    if body.allocation not in ALLOCATION_RULES:
+        raise HTTPException(400, f"Unknown allocation '{body.allocation}', expected one of {sorted(ALLOCATION_RULES)}")
+
+    strategies, weights = {}, {}
+    for pair in pairs:
+        config = body.pair_config.get(pair)
+        name = (config and config.strategy) or body.strategy
+        strategy_cls = STRATEGY_REGISTRY.get(name)
+        if not strategy_cls:
+            raise HTTPException(400, f"Unknown strategy '{name}' for {pair}")
+        strategies[pair] = strategy_cls((config and config.params) or body.params)
+        if config and config.weight is not None:
+            weights[pair] = config.weight
+
+    # Fetch all pairs concurrently
+    _validate_candle_window(body)
+    fetched = await asyncio.gather(*[
+        fetch_coindcx_candle_arrays_async(pair, body.interval, body.limit, body.startTime, body.endTime)
+        for pair in pairs
+    ])
+    pair_arrays = {pair: arrays for pair, arrays in zip(pairs, fetched) if len(arrays["time"])}
+    missing = [pair for pair in pairs if pair not in pair_arrays]
+    if not pair_arrays:
+        raise HTTPException(502, "No candles fetched")
+
+    report = await run_in_threadpool(
+        run_portfolio_backtest,
+        pair_arrays,
+        {pair: strategies[pair] for pair in pair_arrays},
+        body.initial_capital,
+        body.fee_rate,
+        body.allocation,
+        weights,
+        body.position_size_pct,
+        body.interval,
+    )
+
+    data = {
+        "allocation": body.allocation,
+        "missing_pairs": missing,
+        **report,
+    }
+    return response_message("Portfolio backtest successful", data)
+
+
+def _ndjson(frame: dict) -> bytes:
+    return (json.dumps(frame) + "\n").encode()
+
+
+def _stream_backtest_frames(body: BacktestRequest, arrays: dict, strategy, chunk_size: int):
+    """NDJSON frames of one run: header, one frame per bar chunk, summary (or error)."""
+    candle_params = body.candle_params
+    yield _ndjson({
+        "type": "header",
+        "strategy": body.strategy,
+        "engine": body.engine,
+        "pair": candle_params.pair,
+        "interval": candle_params.interval,
+        "bars": len(arrays["time"]),
+        "chunk_size": chunk_size,
+    })
+    try:
+        chunks = iter_backtest_chunks(
+            arrays, strategy, body.initial_capital, body.fee_rate, body.position_size_pct, chunk_size, body.engine
+        )
+        for index, chunk in enumerate(chunks):
+            if "final_balance" in chunk:
+                m = compute_metrics(
+                    chunk["equity"], arrays["time"], chunk["trades"],
+                    body.initial_capital, chunk["final_balance"], candle_params.interval,
+                )
+                yield _ndjson({
+                    "type": "summary",
+                    "closing_trades": chunk["closing_trades"],
+                    **_report_sections(m, body.initial_capital, chunk["final_balance"]),
+                })
+            else:
+                yield _ndjson({"type": "chunk", "index": index, **chunk})
+    except Exception as e:
+        print(f"Backtest stream failed: {e}")
+        yield _ndjson({"type": "error", "message": str(e)})
+
+
+@backtest_router.post("/backtest/stream")
+async def stream_backtest(body: BacktestRequest, chunk_size: int = 5000):
+    """
+    Same run as /backtest, streamed as NDJSON: a header frame, then
+    {"type": "chunk"} frames with candles, equity, signals and trades per
+    chunk of bars, then a {"type": "summary"} frame with the metrics.
+    """
+    strategy_cls = STRATEGY_REGISTRY.get(body.strategy)
+    if not strategy_cls:
+        raise HTTPException(400, f"Unknown strategy '{body.strategy}'")
+    if body.engine not in ENGINE_REGISTRY:
+        raise HTTPException(400, f"Unknown engine '{body.engine}'")
+    if chunk_size <= 0:
+        raise HTTPException(400, "chunk_size must be positive")
+
+    candle_params = body.candle_params
+    _validate_candle_window(candle_params)
+    arrays = await fetch_coindcx_candle_arrays_async(
+        candle_params.pair,
+        candle_params.interval,
+        candle_params.limit,
+        candle_params.startTime,
+        candle_params.endTime
+    )
+    if not len(arrays["time"]):
+        raise HTTPException(502, "No candles fetched")
+
+    # A sync generator: Starlette iterates it in a worker thread, chunk by chunk
+    return StreamingResponse(
+        _stream_backtest_frames(body, arrays, strategy_cls(body.params), chunk_size),
+        media_type="application/x-ndjson",
+    )
@@ -1,67 +1,81 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
 import asyncio
 from app.coindxc_sockets.current_prices import CurrentPrices
 from app.coindxc_sockets.order_book import OrderBook
 from app.coindxc_sockets.candlesticks import CandleStick
+from app.core.auth import get_current_user
+from app.core.client_manager import client_manager
+from app.core.fanout import fanout
+from app.core.outbox import OutboxGroup
+from app.services.ticker_snapshot import ticker_snapshot
+from app.services.trading_manager import trading_manager
+from app.utils.response_message import response_message
 router = APIRouter(prefix="/api", tags=["coindcx_socket_connections"])
 
-@router.websocket("/ws/current_prices")
-async def current_prices(websocket: WebSocket):
-    await websocket.accept()
-    prices = CurrentPrices()
+feed_outboxes = OutboxGroup()
 
-    # Define callback to push prices to this websocket
-    async def send_to_client(price_data):
-        try:
-            await websocket.send_json(price_data)
-        except WebSocketDisconnect:
-            # Client disconnected, remove this callback
-            if send_to_client in prices.callbacks:
-                prices.callbacks.remove(send_to_client)
 
-    prices.register_callback(send_to_client)
+async def _serve_feed(websocket: WebSocket, feed, envelope=None, msg_type=None):
+    """
+    Push a hub feed to one browser socket; drop the hub subscription when it goes away.
+    Every socket's feed gets the same parsed hub message, so it is encoded once for all of
+    them, and queued on the socket's own outbox so one slow tab can't hold up the hub.
+    """
+    outbox = feed_outboxes.open(websocket, websocket)
 
-    # Start the socketio client in background
-    asyncio.create_task(prices.start())
+    async def send_to_client(data):
+        outbox.put(fanout.encode_shared(data, envelope), msg_type)
+
+    feed.register_callback(send_to_client)
+
+    # Subscribe on the shared hub in background
+    feed_task = asyncio.create_task(feed.start())
 
     try:
-        # Keep connection alive
+        # Keep connection alive until the client goes away
         while True:
-            await asyncio.sleep(1)  # just keep the coroutine alive
+            await websocket.receive_text()
     except WebSocketDisconnect:
         print("Client disconnected")
-        if send_to_client in prices.callbacks:
-            prices.callbacks.remove(send_to_client)
-        websocket.close()
+    finally:
+        feed_outboxes.close(websocket, close_socket=False)
+        feed_task.cancel()
+        try:
+            await feed_task
+        except (asyncio.CancelledError, Exception):
+            pass
 
 
+@router.websocket("/ws/current_prices")
+async def current_prices(websocket: WebSocket):
+    await websocket.accept()
+    await _serve_feed(websocket, CurrentPrices())
 
 
 @router.websocket("/ws/order_book")
 async def order_book(websocket: WebSocket):
     await websocket.accept()
-    prices = OrderBook("B-TRX_BTC")
+    await _serve_feed(websocket, OrderBook("B-TRX_BTC"), envelope="data", msg_type="depth_snapshot")
 
-    # Define callback to push prices to this websocket
-    async def send_to_client(price_data):
-        try:
-            await websocket.send_json({"data":price_data})
-        except WebSocketDisconnect:
-            # Client disconnected, remove this callback
-            if send_to_client in prices.callbacks:
-                prices.callbacks.remove(send_to_client)
 
-    prices.register_callback(send_to_client)
+@router.get("/ws/metrics")
+async def websocket_metrics(current_user: str = Depends(get_current_user)):
+    """Per-client send queue depth, coalescing and drop counters"""
+    return response_message(message="Websocket metrics retrieved", data={
+        "encoding": fanout.metrics(),
+        "feeds": feed_outboxes.metrics(),
+        "paper_trading": trading_manager.outbox_metrics(),
+        "clients": client_manager.metrics(),
+    })
 
-    # Start the socketio client in background
-    asyncio.create_task(prices.start())
 
-    try:
-        # Keep connection alive
-        while True:
-            await asyncio.sleep(1)  # just keep the coroutine alive
-    except WebSocketDisconnect:
-        print("Client disconnected")
-        if send_to_client in prices.callbacks:
-            prices.callbacks.remove(send_to_client)
-        websocket.close()
+@router.get("/ticker")
+async def get_ticker(markets: str, current_user: str = Depends(get_current_user)):
+    """Latest quotes for comma-separated markets, with their age and a stale flag"""
+    symbols = [m.strip() for m in markets.split(",") if m.strip()]
+    if not symbols:
+        raise HTTPException(400, "No markets given")
+    return response_message(message="Ticker retrieved", data={
+        "quotes": ticker_snapshot.get_many(symbols),
+        "snapshot": ticker_snapshot.metrics(),
+    })
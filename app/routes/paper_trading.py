@@ -1,11 +1,17 @@
 # app/routes/paper_trading.py
-from fastapi import APIRouter, WebSocket, Depends
+from typing import Optional
+
+from fastapi import APIRouter, WebSocket, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from app.schemas.paper_trade import Trade, PaperTrading
 from app.core.database import db_paper
+from app.core import repository
 from app.services.trading_manager import trading_manager
 from app.services.trading_service import trading_service
+from app.services.signal_evaluator import signal_evaluator
+from app.services.write_behind import write_behind
+from app.services.trade_export import EXPORT_FORMATS, export_chunks
 from app.utils.response_message import response_message, error_message
-from app.utils.serialize_doc import serialize_doc
 from app.core.auth import get_current_user
 
 paper_router = APIRouter(prefix="/api/paper", tags=["PaperTrading"])
@@ -23,16 +29,56 @@ async def get_trading_state(user_id: str):
     except Exception as e:
         return {"status": "error", "msg": str(e)}
 @paper_router.get("/trades/{user_id}")
-async def get_trades(user_id: str, current_user: str = Depends(get_current_user)):
-    trades = await db_paper.trades.find({"user_id": user_id}).to_list(100)
-    return response_message(message="Trades fetched successfully", data=trades) 
+async def get_trades(
+    user_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    current_user: str = Depends(get_current_user),
+):
+    """
+    One page of trades created in [start, end). Pass the X-Next-Cursor header
+    of a response as `cursor` to get the next page; it is absent on the last one.
+    """
+    try:
+        trades, next_cursor = await repository.page_trades(
+            user_id, limit=limit, after=cursor, start=start, end=end, descending=order == "desc"
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response_message(message="Trades fetched successfully", data=trades)
+
+
+@paper_router.get("/trades/{user_id}/export")
+async def export_trades(
+    user_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    current_user: str = Depends(get_current_user),
+):
+    """Full trade history in [start, end), streamed in batches as NDJSON or CSV"""
+    try:
+        repository.trade_filter(user_id, start=start, end=end)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    batches = repository.iter_trade_batches(user_id, start=start, end=end)
+    return StreamingResponse(
+        export_chunks(format, batches),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="trades_{user_id}.{format}"'},
+    )
 
 @paper_router.get("/portfolio/{user_id}")
 async def get_portfolio(user_id: str, current_user: str = Depends(get_current_user)):
-    wallet = await db_paper.wallets.find_one({"user_id": str(user_id)})
-    positions = await db_paper.positions.find({"user_id": str(user_id)}).to_list(100)
-    wallet = serialize_doc(wallet)
-    positions = [serialize_doc(p) for p in positions]
+    wallet = await repository.get_wallet(str(user_id))
+    # One document per symbol, so the full list is small
+    positions = await repository.list_positions(str(user_id), limit=None)
     return response_message(message="Portfolio fetched successfully", data={"wallet": wallet, "positions": positions}) 
 
 @paper_router.post("/start_paper_trading")
@@ -97,6 +143,17 @@ async def get_active_sessions(current_user: str = Depends(get_current_user)):
         }
     )
 
+@paper_router.get("/persistence_metrics")
+async def get_persistence_metrics(current_user: str = Depends(get_current_user)):
+    """Write-behind queue depth, flush lag and batch counters"""
+    return response_message(message="Persistence metrics retrieved", data=write_behind.metrics())
+
+
+@paper_router.get("/evaluator_metrics")
+async def get_evaluator_metrics(current_user: str = Depends(get_current_user)):
+    """Shared strategy instances, sessions using them and how many evaluations were reused"""
+    return response_message(message="Evaluator metrics retrieved", data=signal_evaluator.metrics())
+
 # app/routes/paper_trading.py (only showing the WebSocket endpoint)
 @paper_router.websocket("/ws/paper_trades/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
@@ -119,7 +176,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                 # Send current status
                 is_running = trading_manager.is_trading_active(user_id)
                 current_state = trading_manager.get_trading_state(user_id)
-                await websocket.send_json({
+                await trading_manager.send_websocket_message(user_id, {
                     "type": "status_response",
                     "is_running": is_running,
                     "has_candle": current_state.get('candle') is not None,
@@ -130,5 +187,5 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         print(f"WebSocket error for user {user_id}: {e}")
     finally:
         # Clean up on disconnect
-        trading_manager.ws_connections.pop(user_id, None)
+        trading_manager.remove_websocket_connection(user_id, websocket)
         print(f"🔗 WebSocket disconnected for user {user_id}")
\ No newline at end of file
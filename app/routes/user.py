@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from datetime import timedelta
 from app.schemas.user import LoginResponse, LoginRequest
-from app.core.auth import create_access_token,create_refresh_token
+from fastapi import Depends
+from app.core.auth import create_access_token,create_refresh_token,get_current_user,token_cache
 from app.utils.response_message import response_message
 from app.core.database import db_user
 from  app.utils.serialize_doc import serialize_doc
@@ -48,3 +49,9 @@ async def login(request: LoginRequest):
         )
 
     return response_message(message="Login Successful", data=serialize_doc(response))
+
+
+@auth_router.get("/auth_metrics")
+async def auth_metrics(current_user: str = Depends(get_current_user)):
+    """Verified-token cache hits, misses and evictions"""
+    return response_message(message="Auth metrics retrieved", data=token_cache.metrics())
@@ -1,9 +1,9 @@
 from fastapi import APIRouter,Depends
-from  app.core.database import wallets,positions
+from  app.core.database import wallets
+from app.core import repository
 from app.schemas.paper_trade import CreateWalletRequest
 from app.services.paper_wallet import PaperWallet
 from app.utils.response_message import response_message, error_message
-from app.utils.serialize_doc import serialize_doc
 from app.core.auth import get_current_user
 from app.schemas.paper_trade import DepositRequest, WithdrawRequest
 import datetime
@@ -13,8 +13,8 @@ wallet_router=APIRouter(prefix="/api/wallet",tags=["Wallet"])
 
 @wallet_router.get("/{user_id}")
 async def get_wallet(user_id,current_user:str=Depends(get_current_user)):
-    response=await wallets.find_one({"user_id":user_id})
-    return response_message(message="Wallet fetched successfully",data=serialize_doc(response))
+    response=await repository.get_wallet(user_id)
+    return response_message(message="Wallet fetched successfully",data=response)
 
 
 @wallet_router.post('/')
@@ -22,8 +22,7 @@ async def create_wallet(request: CreateWalletRequest, current_user: str = Depend
     """Create a new paper wallet using PaperWallet class"""
     try:
         # Check if wallet already exists
-        existing = await wallets.find_one({"user_id": request.user_id})
-        if existing:
+        if await repository.wallet_exists(request.user_id):
             return response_message(code=400, message="Wallet already exists")
         
         # ✅ Create PaperWallet instance - this handles all the logic
@@ -69,7 +68,7 @@ async def deposit_funds(request: DepositRequest, current_user: str = Depends(get
     """Add funds to paper wallet"""
     try:
         # Get user's wallet
-        wallet_doc = await wallets.find_one({"user_id": request.user_id})
+        wallet_doc = await repository.get_balances(request.user_id)
         if not wallet_doc:
             return {"status": "error", "msg": "Wallet not found"}
         
@@ -103,7 +102,7 @@ async def deposit_funds(request: DepositRequest, current_user: str = Depends(get
 async def withdraw_funds(request: WithdrawRequest, current_user: str = Depends(get_current_user)):
     """Withdraw funds from paper wallet"""
     try:
-        wallet_doc = await wallets.find_one({"user_id": request.user_id})
+        wallet_doc = await repository.get_balances(request.user_id)
         if not wallet_doc:
             return {"status": "error", "msg": "Wallet not found"}
         
@@ -144,7 +143,7 @@ async def withdraw_funds(request: WithdrawRequest, current_user: str = Depends(g
 
 @wallet_router.get("/positions/{user_id}")
 async def get_positions(user_id,current_user: str = Depends(get_current_user)):
-    response=await positions.find_one({"user_id":user_id})
-    return response_message(message="Positions fetched successfully",data=[serialize_doc(response)])
+    response=await repository.list_positions(user_id)
+    return response_message(message="Positions fetched successfully",data=response)
 
 
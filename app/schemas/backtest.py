@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, Dict, List
 
 class StrategyParams(BaseModel):
     short:Optional[int]=None
@@ -8,7 +8,7 @@ class StrategyParams(BaseModel):
 
 class CandleParams(BaseModel):
     interval:str
-    limit:int=500
+    limit:int=500       # ignored when both startTime and endTime are set (full range is paged)
     pair:str
     startTime:Optional[str]
     endTime:Optional[str]
@@ -21,6 +21,67 @@ class BacktestRequest(BaseModel):
     position_size_pct:float=1.0
     params:StrategyParams
     candle_params:CandleParams
+    engine:str="vectorized"   # "vectorized" or "loop"
+
+class ParamRange(BaseModel):
+    start:int
+    stop:int            # inclusive
+    step:int=1
+
+class BacktestSweepRequest(BaseModel):
+    strategy:str
+    initial_capital:float
+    fee_rate:float=0.001
+    position_size_pct:float=1.0
+    param_ranges:Dict[str,ParamRange]   # keys are StrategyParams fields
+    candle_params:CandleParams
+    metric:str="total_return"
+    max_combos:int=1000
+    top_n:int=20
+    workers:Optional[int]=None
+
+class BacktestWalkForwardRequest(BaseModel):
+    strategy:str
+    initial_capital:float
+    fee_rate:float=0.001
+    position_size_pct:float=1.0
+    param_ranges:Dict[str,ParamRange]   # keys are StrategyParams fields
+    candle_params:CandleParams
+    in_sample_bars:int
+    out_of_sample_bars:int
+    step_bars:Optional[int]=None        # defaults to out_of_sample_bars
+    anchored:bool=False                 # True: in-sample windows all start at the first bar
+    metric:str="total_return"
+    max_combos:int=1000
+    workers:Optional[int]=None
+
+class BacktestMonteCarloRequest(BacktestRequest):
+    simulations:int=10000
+    method:str="bootstrap"              # "bootstrap" (with replacement) or "shuffle"
+    fee_jitter_pct:float=0.0            # fees scaled by U(1 - x%, 1 + x%)
+    slippage_bps:float=0.0              # adverse slippage U(0, x bps) on entry and exit
+    ruin_threshold_pct:float=50.0       # ruin = equity at or below this % of initial capital
+    band_points:int=100
+    seed:Optional[int]=None
+
+class PortfolioPairConfig(BaseModel):
+    strategy:Optional[str]=None         # defaults to the request's strategy / params
+    params:Optional[StrategyParams]=None
+    weight:Optional[float]=None         # relative weight for target_weight allocation (default 1)
+
+class BacktestPortfolioRequest(BaseModel):
+    pairs:List[str]
+    interval:str
+    limit:int=500
+    startTime:Optional[str]=None
+    endTime:Optional[str]=None
+    strategy:str
+    params:StrategyParams
+    pair_config:Dict[str,PortfolioPairConfig]={}
+    initial_capital:float
+    fee_rate:float=0.001
+    allocation:str="target_weight"      # "target_weight" or "cash_fraction"
+    position_size_pct:float=1.0         # cash_fraction only
 
 class BacktestResult(BaseModel):
     win_rate:float
@@ -0,0 +1,207 @@
+# app/services/backtest_analytics.py
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils.intervals import INTERVAL_MS
+
+YEAR_MS = 365 * 24 * 60 * 60 * 1000   # crypto trades every day of the year
+MIN_CAGR_YEARS = 0.01                 # avoid exploding CAGR on very short samples
+
+
+def to_seconds(times: np.ndarray) -> np.ndarray:
+    """Epoch timestamps (seconds or ms, same rule as to_ms) -> float seconds."""
+    times = np.asarray(times, dtype=np.float64)
+    if len(times) and times.max() >= 100_000_000_000:
+        return times / 1000.0
+    return times
+
+
+def periods_per_year(interval: Optional[str] = None, times: Optional[np.ndarray] = None) -> float:
+    """
+    Bars per year for annualizing returns: from the candle interval when it is
+    known, else from the median spacing of `times`. 1.0 (no scaling) if neither.
+    """
+    if interval in INTERVAL_MS:
+        return YEAR_MS / INTERVAL_MS[interval]
+    if times is not None and len(times) > 1:
+        step = float(np.median(np.diff(to_seconds(times))))
+        if step > 0:
+            return YEAR_MS / 1000.0 / step
+    return 1.0
+
+
+def drawdown_series(equity: np.ndarray) -> np.ndarray:
+    """Fractional distance below the running peak at every bar (0 at new highs)."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if not len(equity):
+        return equity
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    return drawdown
+
+
+def bar_returns(equity: np.ndarray) -> np.ndarray:
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        return np.zeros(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(equity) / equity[:-1]
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def longest_run(mask: np.ndarray) -> int:
+    """Length of the longest run of True values."""
+    if not len(mask):
+        return 0
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max()) if len(starts) else 0
+
+
+def round_trips(trades: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Closed trades as arrays: pnl, entry_time and exit_time. Engine trade
+    lists hold a BUY (entry) leg and a SELL (exit) leg per trade; only the
+    SELL carries pnl. Each SELL is paired with the open BUY of the same
+    "pair" (portfolio backtests interleave several pairs).
+    """
+    open_entries: Dict = {}
+    pnl, entry_time, exit_time = [], [], []
+    for t in trades:
+        key = t.get("pair")
+        if t.get("side") == "BUY":
+            open_entries[key] = t.get("entry_time", t.get("time"))
+        elif t.get("side") == "SELL":
+            pnl.append(t.get("pnl", 0.0) or 0.0)
+            if key in open_entries:
+                entry_time.append(open_entries.pop(key))
+                exit_time.append(t.get("exit_time", t.get("time")))
+    return {
+        "pnl": np.array(pnl, dtype=np.float64),
+        "entry_time": np.array(entry_time, dtype=np.float64),
+        "exit_time": np.array(exit_time, dtype=np.float64),
+    }
+
+
+def _ratio(numerator: float, denominator: float, default=0.0):
+    return numerator / denominator if denominator > 0 else default
+
+
+def compute_metrics(
+    equity: np.ndarray,
+    times: np.ndarray,
+    trades: List[Dict],
+    initial_capital: float,
+    final_balance: float,
+    interval: Optional[str] = None,
+) -> Dict:
+    """
+    Performance metrics for one backtest (or live session) from its per-bar
+    equity/time arrays and trade list. Returns a flat dict of plain floats;
+    ratios are annualized with periods_per_year(interval, times).
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    ppy = periods_per_year(interval, times)
+
+    # Equity path
+    drawdown = drawdown_series(equity)
+    max_drawdown = float(drawdown.max()) if len(drawdown) else 0.0
+    returns = bar_returns(equity)
+    mean_return = float(returns.mean()) if len(returns) else 0.0
+    std_return = float(returns.std()) if len(returns) else 0.0
+    downside = float(np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))) if len(returns) else 0.0
+
+    sharpe = _ratio(mean_return, std_return) * np.sqrt(ppy)
+    sortino = _ratio(mean_return, downside) * np.sqrt(ppy)
+
+    total_return = _ratio(final_balance - initial_capital, initial_capital) * 100
+    seconds = to_seconds(times)
+    years = (seconds[-1] - seconds[0]) / (YEAR_MS / 1000.0) if len(seconds) > 1 else 0.0
+    if years > 0 and initial_capital > 0 and final_balance > 0:
+        with np.errstate(over="ignore"):
+            cagr = float(np.power(final_balance / initial_capital, 1 / max(years, MIN_CAGR_YEARS)) - 1) * 100
+    else:
+        cagr = 0.0
+    calmar = _ratio(cagr, max_drawdown * 100)
+
+    # Closed trades
+    trips = round_trips(trades)
+    pnl = trips["pnl"]
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl <= 0]
+    total_wins = float(wins.sum())
+    total_losses = abs(float(losses.sum()))
+    avg_win = float(wins.mean()) if len(wins) else 0.0
+    avg_loss = float(losses.mean()) if len(losses) else 0.0
+
+    holding_hours = (to_seconds(trips["exit_time"]) - to_seconds(trips["entry_time"])) / 3600.0
+
+    # Exposure: share of bars that end with a position open
+    if len(times) and len(trips["entry_time"]):
+        opened = np.searchsorted(times, trips["entry_time"], side="left")
+        closed = np.searchsorted(times, trips["exit_time"], side="left")
+        exposure = float(np.sum(closed - opened)) / len(times) * 100
+    else:
+        exposure = 0.0
+
+    return {
+        "initial_capital": float(initial_capital),
+        "final_balance": float(final_balance),
+        "net_profit": float(final_balance - initial_capital),
+        "total_return": float(total_return),
+        "cagr": cagr,
+        "volatility": std_return * 100,                          # per-bar std of returns, %
+        "annualized_volatility": std_return * np.sqrt(ppy) * 100,
+        "max_drawdown": max_drawdown * 100,
+        "sharpe_ratio": float(sharpe),
+        "sortino_ratio": float(sortino),
+        "calmar_ratio": float(calmar),
+        "periods_per_year": float(ppy),
+        "total_trades": int(len(pnl)),
+        "winning_trades": int(len(wins)),
+        "losing_trades": int(len(losses)),
+        "win_rate": _ratio(len(wins), len(pnl)) * 100,
+        "profit_factor": _ratio(total_wins, total_losses, default=float("inf")),
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "largest_win": float(wins.max()) if len(wins) else 0.0,
+        "largest_loss": float(losses.min()) if len(losses) else 0.0,
+        "avg_trade": float(pnl.mean()) if len(pnl) else 0.0,
+        "risk_reward_ratio": _ratio(avg_win, abs(avg_loss), default=float("inf")),
+        "longest_win_streak": longest_run(pnl > 0),
+        "longest_loss_streak": longest_run(pnl <= 0),
+        "avg_holding_hours": float(holding_hours.mean()) if len(holding_hours) else 0.0,
+        "exposure_pct": exposure,
+    }
+
+
+def summarize(equity: np.ndarray, times: np.ndarray, trades: List[Dict], initial_capital: float,
+              final_balance: float, interval: str = None) -> Dict:
+    """Compact, rounded subset of compute_metrics used by sweeps, walk-forward and portfolio runs."""
+    m = compute_metrics(equity, times, trades, initial_capital, final_balance, interval)
+    profit_factor = m["profit_factor"]
+    return {
+        "final_balance": round(final_balance, 2),
+        "net_profit": round(m["net_profit"], 2),
+        "total_return": round(m["total_return"], 2),
+        "cagr": round(m["cagr"], 2),
+        "max_drawdown": round(m["max_drawdown"], 2),
+        "sharpe_ratio": round(m["sharpe_ratio"], 4),
+        "sortino_ratio": round(m["sortino_ratio"], 4),
+        "calmar_ratio": round(m["calmar_ratio"], 4),
+        "total_trades": m["total_trades"],
+        "win_rate": round(m["win_rate"], 2),
+        "profit_factor": round(profit_factor, 4) if profit_factor != float("inf") else None,
+        "exposure_pct": round(m["exposure_pct"], 2),
+    }
+
+
+def equity_curve_arrays(equity_curve: List[Dict]):
+    """[{"time", "value"}, ...] -> (times, equity) arrays."""
+    times = np.fromiter((pt["time"] for pt in equity_curve), dtype=np.float64, count=len(equity_curve))
+    equity = np.fromiter((pt["value"] for pt in equity_curve), dtype=np.float64, count=len(equity_curve))
+    return times, equity
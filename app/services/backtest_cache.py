@@ -0,0 +1,247 @@
+# app/services/backtest_cache.py
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.coindcx_rest_apis.fetch_candles import resolve_range
+from app.core.config import settings
+from app.services.backtest_engine import ENGINE_VERSION
+from app.utils.intervals import INTERVAL_MS, now_ms
+
+
+# Modules / packages whose code shapes a cached backtest response
+RESULT_SOURCES = [
+    "app.services.backtest_engine",
+    "app.services.backtest_analytics",
+    "app.services.candle_resampler",
+    "app.strategies",
+    "app.routes.backtest",
+]
+
+
+@lru_cache(maxsize=1)
+def source_fingerprint() -> str:
+    """sha256 over the source files in RESULT_SOURCES (a package counts all its .py files)."""
+    digest = hashlib.sha256()
+    for name in RESULT_SOURCES:
+        module = importlib.import_module(name)
+        path = Path(module.__file__)
+        files = sorted(path.parent.glob("*.py")) if path.name == "__init__.py" else [path]
+        for f in files:
+            digest.update(f"{name}/{f.name}".encode())
+            digest.update(f.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(payload: Dict) -> str:
+    """sha256 of the canonical JSON form of `payload` (sorted keys, no whitespace)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def backtest_request_key(body) -> Tuple[Optional[str], Optional[float]]:
+    """
+    (key, expires_at) for a BacktestRequest, or (None, None) if it can't be cached.
+
+    The time window is resolved to aligned open times, so requests for the
+    same candles share a key however they spell the range. Ranges that reach
+    the still-forming candle expire after BACKTEST_CACHE_OPEN_TTL seconds or
+    when that candle closes, whichever comes first.
+    """
+    candle_params = body.candle_params
+    interval = candle_params.interval
+    if interval not in INTERVAL_MS:
+        return None, None
+    step = INTERVAL_MS[interval]
+    start, end = resolve_range(interval, candle_params.limit, candle_params.startTime, candle_params.endTime)
+    full_range = bool(candle_params.startTime and candle_params.endTime)
+
+    key = cache_key({
+        "engine_version": ENGINE_VERSION,
+        "source": source_fingerprint(),
+        "engine": body.engine,
+        "pair": candle_params.pair,
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "limit": None if full_range else candle_params.limit,
+        "strategy": body.strategy,
+        "params": body.params.model_dump(exclude_none=True),
+        "initial_capital": body.initial_capital,
+        "fee_rate": body.fee_rate,
+        "position_size_pct": body.position_size_pct,
+    })
+
+    now = now_ms()
+    last_closed = (now // step) * step - step
+    if end <= last_closed:
+        return key, None
+    next_close = (now // step + 1) * step
+    return key, min(time.time() + settings.BACKTEST_CACHE_OPEN_TTL, next_close / 1000)
+
+
+class BacktestCache:
+    """
+    Content-addressed cache of serialized backtest results.
+
+    Memory tier: LRU bounded by the total size of the stored JSON bytes.
+    Disk tier: one file per key under `root`, bounded by `disk_max_bytes`
+    (oldest files removed first); a disk hit is promoted back into memory.
+    Entries can carry an expiry (epoch seconds); expiring entries are kept in
+    memory only, since they are results over a still-open time range.
+    """
+
+    def __init__(self, root: str, max_bytes: int, disk_max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self.bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stores": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    # -------------------------
+    # Memory tier
+    # -------------------------
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        body, expires_at = entry
+        if expires_at is not None and time.time() >= expires_at:
+            self._memory_drop(key)
+            self.stats["expired"] += 1
+            return None
+        self.entries.move_to_end(key)
+        return body
+
+    def _memory_put(self, key: str, body: bytes, expires_at: Optional[float]):
+        if len(body) > self.max_bytes:
+            return
+        self._memory_drop(key)
+        self.entries[key] = (body, expires_at)
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            _, (old, _) = self.entries.popitem(last=False)
+            self.bytes -= len(old)
+            self.stats["evictions"] += 1
+
+    def _memory_drop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+    # -------------------------
+    # Disk tier
+    # -------------------------
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _disk_usage(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(p.stat().st_size for p in self.root.glob("*/*.json")) if self.root.exists() else 0
+        return self._disk_bytes
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            body = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)   # mtime doubles as last-access time for disk eviction
+        return body
+
+    def _disk_put(self, key: str, body: bytes):
+        if len(body) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        existed = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        self._disk_bytes = self._disk_usage() + len(body) - existed
+        if self._disk_bytes > self.disk_max_bytes:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        files = sorted(self.root.glob("*/*.json"), key=lambda p: p.stat().st_mtime)
+        usage = sum(p.stat().st_size for p in files)
+        for path in files:
+            if usage <= self.disk_max_bytes * 0.9:
+                break
+            usage -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            self.stats["disk_evictions"] += 1
+        self._disk_bytes = usage
+
+    # -------------------------
+    # Public API (blocking on a disk hit/store: call from a thread in handlers)
+    # -------------------------
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._memory_get(key)
+            if body is not None:
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return body
+            body = self._disk_get(key)
+            if body is not None:
+                self._memory_put(key, body, None)
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return body
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, body: bytes, expires_at: Optional[float] = None):
+        with self._lock:
+            self._memory_put(key, body, expires_at)
+            if expires_at is None:
+                self._disk_put(key, body)
+            self.stats["stores"] += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+            for path in self.root.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+            self._disk_bytes = 0
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "disk_bytes": self._disk_usage(),
+                "disk_max_bytes": self.disk_max_bytes,
+            }
+
+
+backtest_cache = BacktestCache(
+    settings.BACKTEST_CACHE_DIR,
+    settings.BACKTEST_CACHE_MAX_BYTES,
+    settings.BACKTEST_CACHE_DISK_MAX_BYTES,
+)
@@ -1,6 +1,17 @@
 # app/services/backtest_engine.py
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
+import numpy as np
+
+from app.strategies.base import BUY, HOLD, effective_signals
+from app.services.candle_store import columns_to_candles as arrays_to_candles
+
+# Bump whenever a change alters backtest results or analytics: cached results
+# are keyed on it, together with a hash of the engine/strategy sources
+# (backtest_cache.source_fingerprint) in case a bump is forgotten.
+# 2: exact indicator window sums; 3: higher timeframes resampled from 1m candles;
+# 4: per-bar volatility restored, annualized_volatility added
+ENGINE_VERSION = 4
 
 def to_ts(time_val):
     """
@@ -13,141 +24,432 @@ def to_ts(time_val):
         return int(datetime.fromisoformat(time_val).timestamp())
     except:
         return int(datetime.utcnow().timestamp())
-def run_backtest(
-    candles: List[Dict],
-    strategy,
-    initial_capital: float = 1000.0,
-    fee_rate: float = 0.001,
-    position_size_pct: float = 1.0
-):
-    strategy.on_start({})
 
-    cash = initial_capital
-    position_qty = 0.0
-    entry_price = 0.0
-    entry_time = None
-    entry_fee = 0.0
 
-    trades = []
-    signals = []
-    equity_curve = []
+def _open_trade(cash: float, price: float, current_time, fee_rate: float, position_size_pct: float):
+    """Apply a BUY fill. Returns (cash, position_qty, entry_fee, trade)."""
+    allocation = cash * position_size_pct
+    position_qty = allocation / price
+    entry_fee = allocation * fee_rate
+    cash -= allocation + entry_fee
 
-    for candle in candles:
+    # BUY Entry - Only entry information
+    buy_trade = {
+        "time": current_time,
+        "side": "BUY",
+        "entry_price": price,           # Entry price
+        "entry_time": current_time,     # Entry time
+        "quantity": position_qty,       # Quantity bought
+        "fee": entry_fee,               # Entry fee
+        "status": "OPEN"
+        # NO exit information for BUY
+    }
+    return cash, position_qty, entry_fee, buy_trade
+
+
+def _close_trade(cash: float, position_qty: float, entry_price: float, entry_fee: float,
+                 price: float, current_time, fee_rate: float):
+    """Apply a SELL fill for the whole position. Returns (cash, trade)."""
+    trade_value = position_qty * price
+    exit_fee = trade_value * fee_rate
+    cash += trade_value - exit_fee
+
+    # Calculate PnL and return
+    total_investment = position_qty * entry_price
+    pnl = trade_value - total_investment - (entry_fee + exit_fee)
+    return_pct = (pnl / total_investment) * 100
+
+    # SELL Entry - Only exit information + calculated results
+    sell_trade = {
+        "time": current_time,
+        "side": "SELL",
+        "exit_price": price,            # Exit price
+        "exit_time": current_time,      # Exit time
+        "quantity": position_qty,       # Quantity sold
+        "fee": exit_fee,                # Exit fee
+        "pnl": pnl,                     # Calculated PnL
+        "return_pct": return_pct,       # Calculated Return %
+        "status": "CLOSED"
+        # NO entry information for SELL
+    }
+    return cash, sell_trade
+
+
+class BarLoop:
+    """
+    State of the bar-by-bar engine, advanced one candle at a time, so a run
+    can be consumed incrementally (see iter_backtest_chunks).
+    """
+
+    def __init__(self, strategy, initial_capital: float = 1000.0, fee_rate: float = 0.001,
+                 position_size_pct: float = 1.0):
+        strategy.on_start({})
+        self.strategy = strategy
+        self.fee_rate = fee_rate
+        self.position_size_pct = position_size_pct
+
+        self.cash = initial_capital
+        self.position_qty = 0.0
+        self.entry_price = 0.0
+        self.entry_time = None
+        self.entry_fee = 0.0
+
+    def step(self, candle: Dict):
+        """Process one candle. Returns (equity point, signal marker or None, trade or None)."""
         price = float(candle["close"])
-        current_time = to_ts(candle.get("time", datetime.utcnow().isoformat()))
+        current_time = to_ts(candle.get("time"))
 
         # Get strategy signal
-        signal_result = strategy.on_bar(candle)
+        signal_result = self.strategy.on_bar(candle)
         signal = getattr(signal_result, 'action', "HOLD").upper()
 
         # Record signal for chart markers
+        marker = None
         if signal in ["BUY", "SELL"]:
-            signals.append({
+            marker = {
                 "time": current_time,
                 "side": signal,
                 "price": price
-            })
+            }
 
+        trade = None
         # --- BUY ---
-        if signal == "BUY" and position_qty == 0:
-            allocation = cash * position_size_pct
-            position_qty = allocation / price
-            entry_fee = allocation * fee_rate
-            cash -= allocation + entry_fee
+        if signal == "BUY" and self.position_qty == 0:
+            self.cash, self.position_qty, self.entry_fee, trade = _open_trade(
+                self.cash, price, current_time, self.fee_rate, self.position_size_pct
+            )
+            self.entry_price = price
+            self.entry_time = current_time
 
-            entry_price = price
-            entry_time = current_time
-            
-            # BUY Entry - Only entry information
-            buy_trade = {
-                "time": entry_time,
-                "side": "BUY",
-                "entry_price": entry_price,      # Entry price
-                "entry_time": entry_time,       # Entry time
-                "quantity": position_qty,       # Quantity bought
-                "fee": entry_fee,               # Entry fee
-                "status": "OPEN"
-                # NO exit information for BUY
-            }
-            trades.append(buy_trade)
-            
-            print(f"✅ BUY executed: {position_qty:.6f} units at {price}")
+            print(f"✅ BUY executed: {self.position_qty:.6f} units at {price}")
 
         # --- SELL ---
-        elif signal == "SELL" and position_qty > 0:
-            trade_value = position_qty * price
-            exit_fee = trade_value * fee_rate
-            cash += trade_value - exit_fee
-
-            # Calculate PnL and return
-            total_investment = position_qty * entry_price
-            pnl = trade_value - total_investment - (entry_fee + exit_fee)
-            return_pct = (pnl / total_investment) * 100
-
-            # SELL Entry - Only exit information + calculated results
-            sell_trade = {
-                "time": current_time,
-                "side": "SELL", 
-                "exit_price": price,            # Exit price
-                "exit_time": current_time,      # Exit time
-                "quantity": position_qty,       # Quantity sold
-                "fee": exit_fee,               # Exit fee
-                "pnl": pnl,                    # Calculated PnL
-                "return_pct": return_pct,      # Calculated Return %
-                "status": "CLOSED"
-                # NO entry information for SELL
-            }
-            trades.append(sell_trade)
-            
-            print(f"✅ SELL executed: {position_qty:.6f} units at {price}, PnL: {pnl:.2f}")
+        elif signal == "SELL" and self.position_qty > 0:
+            self.cash, trade = _close_trade(
+                self.cash, self.position_qty, self.entry_price, self.entry_fee, price, current_time, self.fee_rate
+            )
+
+            print(f"✅ SELL executed: {self.position_qty:.6f} units at {price}, PnL: {trade['pnl']:.2f}")
 
             # Reset position
-            position_qty = 0.0
-            entry_price = 0.0
-            entry_time = None
-            entry_fee = 0.0
+            self.position_qty = 0.0
+            self.entry_price = 0.0
+            self.entry_time = None
+            self.entry_fee = 0.0
 
         # --- Equity ---
-        current_equity = cash + (position_qty * price)
-        equity_curve.append({
+        current_equity = self.cash + (self.position_qty * price)
+        point = {
             "time": current_time,
             "value": current_equity
-        })
+        }
+        return point, marker, trade
 
-    # Close any remaining open position at last candle
-    if position_qty > 0:
-        last_candle = candles[-1]
+    def finish(self, last_candle: Dict) -> Optional[Dict]:
+        """Close any remaining open position at the last candle; returns that trade."""
+        if self.position_qty <= 0:
+            return None
         last_price = float(last_candle["close"])
-        last_time = to_ts(last_candle.get("time", datetime.utcnow().isoformat()))
-
-        trade_value = position_qty * last_price
-        exit_fee = trade_value * fee_rate
-        cash += trade_value - exit_fee
-
-        # Calculate final PnL and return
-        total_investment = position_qty * entry_price
-        pnl = trade_value - total_investment - (entry_fee + exit_fee)
-        return_pct = (pnl / total_investment) * 100
-
-        # Final SELL Entry
-        sell_trade = {
-            "time": last_time,
-            "side": "SELL",
-            "exit_price": last_price,
-            "exit_time": last_time,
-            "quantity": position_qty,
-            "fee": exit_fee,
-            "pnl": pnl,
-            "return_pct": return_pct,
-            "status": "CLOSED"
-        }
-        trades.append(sell_trade)
+        last_time = to_ts(last_candle.get("time"))
+
+        self.cash, sell_trade = _close_trade(
+            self.cash, self.position_qty, self.entry_price, self.entry_fee, last_price, last_time, self.fee_rate
+        )
+        self.position_qty = 0.0
+        return sell_trade
 
-    final_balance = cash
+
+def run_backtest(
+    candles: List[Dict],
+    strategy,
+    initial_capital: float = 1000.0,
+    fee_rate: float = 0.001,
+    position_size_pct: float = 1.0
+):
+    loop = BarLoop(strategy, initial_capital, fee_rate, position_size_pct)
+
+    trades = []
+    signals = []
+    equity_curve = []
+
+    for candle in candles:
+        point, signal, trade = loop.step(candle)
+        if signal:
+            signals.append(signal)
+        if trade:
+            trades.append(trade)
+        equity_curve.append(point)
+
+    # Close any remaining open position at last candle
+    if candles:
+        sell_trade = loop.finish(candles[-1])
+        if sell_trade:
+            trades.append(sell_trade)
+
+    final_balance = loop.cash
 
     return {
         "final_balance": final_balance,
         "trades": trades,
         "equity_curve": equity_curve,
         "signals": signals
-    }
\ No newline at end of file
+    }
+
+
+# -------------------------
+# Vectorized engine
+# -------------------------
+def candles_to_arrays(candles: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Load candle dicts into contiguous columns:
+    time (int64 epoch seconds, same as to_ts) and open/high/low/close/volume (float64).
+    """
+    times = [candle.get("time") for candle in candles]
+    if all(isinstance(t, int) for t in times):
+        time_arr = np.array(times, dtype=np.int64)
+    else:
+        time_arr = np.array([to_ts(t) for t in times], dtype=np.int64)
+
+    arrays = {"time": time_arr}
+    for field in ("open", "high", "low", "close", "volume"):
+        arrays[field] = np.array([float(candle.get(field, 0.0)) for candle in candles], dtype=np.float64)
+    return arrays
+
+
+def simulate_signals(
+    arrays: Dict[str, np.ndarray],
+    raw_signals: np.ndarray,
+    initial_capital: float = 1000.0,
+    fee_rate: float = 0.001,
+    position_size_pct: float = 1.0,
+):
+    """
+    Turn a signal array into fills and a per-bar equity array. Fills are only
+    computed at the (few) bars where the position changes; cash/position/equity
+    are broadcast across every bar with array ops.
+    Returns {"final_balance", "trades", "equity"} with equity as float64 array.
+    """
+    times = arrays["time"]
+    closes = arrays["close"]
+    n = len(closes)
+
+    # Walk only the fills; everything in between is constant.
+    fill_idx = effective_signals(raw_signals)
+    fill_times = times[fill_idx].tolist()
+    fill_prices = closes[fill_idx].tolist()
+    cash_after = np.empty(len(fill_idx), dtype=np.float64)
+    qty_after = np.empty(len(fill_idx), dtype=np.float64)
+
+    cash = initial_capital
+    position_qty = 0.0
+    entry_price = 0.0
+    entry_fee = 0.0
+    trades = []
+    for k, (current_time, price) in enumerate(zip(fill_times, fill_prices)):
+        if position_qty == 0:
+            cash, position_qty, entry_fee, trade = _open_trade(
+                cash, price, current_time, fee_rate, position_size_pct
+            )
+            entry_price = price
+        else:
+            cash, trade = _close_trade(
+                cash, position_qty, entry_price, entry_fee, price, current_time, fee_rate
+            )
+            position_qty = 0.0
+            entry_price = 0.0
+            entry_fee = 0.0
+        trades.append(trade)
+        cash_after[k] = cash
+        qty_after[k] = position_qty
+
+    # Broadcast state to every bar: segment k covers bars from fill k up to fill k+1
+    cash_bar = np.full(n, initial_capital, dtype=np.float64)
+    qty_bar = np.zeros(n, dtype=np.float64)
+    if len(fill_idx):
+        segment = np.searchsorted(fill_idx, np.arange(n), side="right") - 1
+        held = segment >= 0
+        cash_bar[held] = cash_after[segment[held]]
+        qty_bar[held] = qty_after[segment[held]]
+    equity = cash_bar + (qty_bar * closes)
+
+    # Close any remaining open position at last candle
+    if position_qty > 0:
+        cash, sell_trade = _close_trade(
+            cash, position_qty, entry_price, entry_fee,
+            float(closes[-1]), int(times[-1]), fee_rate
+        )
+        trades.append(sell_trade)
+
+    return {
+        "final_balance": cash,
+        "trades": trades,
+        "equity": equity,
+    }
+
+
+def run_backtest_arrays(
+    arrays: Dict[str, np.ndarray],
+    strategy,
+    initial_capital: float = 1000.0,
+    fee_rate: float = 0.001,
+    position_size_pct: float = 1.0,
+    raw_signals: np.ndarray = None,
+):
+    """
+    Vectorized backtest over candle arrays, with signals from the strategy's
+    generate_signals(). Produces the same output as run_backtest().
+    """
+    if raw_signals is None:
+        strategy.on_start({})
+        raw_signals = strategy.generate_signals(arrays)
+
+    times = arrays["time"]
+    closes = arrays["close"]
+
+    signal_idx = np.flatnonzero(raw_signals != HOLD)
+    signals = [
+        {"time": t, "side": "BUY" if s == BUY else "SELL", "price": p}
+        for t, s, p in zip(
+            times[signal_idx].tolist(),
+            raw_signals[signal_idx].tolist(),
+            closes[signal_idx].tolist(),
+        )
+    ]
+
+    sim = simulate_signals(arrays, raw_signals, initial_capital, fee_rate, position_size_pct)
+    equity_curve = [
+        {"time": t, "value": v}
+        for t, v in zip(times.tolist(), sim["equity"].tolist())
+    ]
+
+    return {
+        "final_balance": sim["final_balance"],
+        "trades": sim["trades"],
+        "equity_curve": equity_curve,
+        "signals": signals
+    }
+
+
+def run_backtest_vectorized(
+    candles: List[Dict],
+    strategy,
+    initial_capital: float = 1000.0,
+    fee_rate: float = 0.001,
+    position_size_pct: float = 1.0
+):
+    """
+    Array-based engine mode. Falls back to the bar loop for strategies that
+    only implement on_bar (generate_signals returns None).
+    """
+    # Empty series and zero-sized allocations keep the bar loop's exact semantics
+    if not candles or initial_capital <= 0 or position_size_pct <= 0:
+        return run_backtest(candles, strategy, initial_capital, fee_rate, position_size_pct)
+
+    arrays = candles_to_arrays(candles)
+    strategy.on_start({})
+    generate = getattr(strategy, "generate_signals", None)
+    raw_signals = generate(arrays) if generate else None
+    if raw_signals is None:
+        return run_backtest(candles, strategy, initial_capital, fee_rate, position_size_pct)
+
+    return run_backtest_arrays(
+        arrays, strategy, initial_capital, fee_rate, position_size_pct, raw_signals=raw_signals
+    )
+
+
+# -------------------------
+# Chunked (streaming) runs
+# -------------------------
+def iter_backtest_chunks(
+    arrays: Dict[str, np.ndarray],
+    strategy,
+    initial_capital: float = 1000.0,
+    fee_rate: float = 0.001,
+    position_size_pct: float = 1.0,
+    chunk_size: int = 5000,
+    engine: str = "vectorized",
+) -> Iterator[Dict]:
+    """
+    Run a backtest over candle arrays and yield it in bar chunks, so callers
+    can stream results without building every candle/equity dict at once:
+      {"start", "end", "candles", "equity_curve", "signals", "trades"} per chunk,
+    then one last item {"final_balance", "closing_trades", "equity", "trades"}
+    with the closing fill, the full equity array and all trades for the summary.
+    Same fills and equity as run_backtest / run_backtest_vectorized.
+    """
+    n = len(arrays["time"])
+    times = arrays["time"]
+    closes = arrays["close"]
+
+    raw_signals = None
+    if engine == "vectorized" and n and initial_capital > 0 and position_size_pct > 0:
+        strategy.on_start({})
+        generate = getattr(strategy, "generate_signals", None)
+        raw_signals = generate(arrays) if generate else None
+
+    if raw_signals is not None:
+        sim = simulate_signals(arrays, raw_signals, initial_capital, fee_rate, position_size_pct)
+        equity = sim["equity"]
+        fill_idx = effective_signals(raw_signals)
+        signal_idx = np.flatnonzero(raw_signals != HOLD)
+        for lo in range(0, n, chunk_size):
+            hi = min(lo + chunk_size, n)
+            s_lo, s_hi = np.searchsorted(signal_idx, [lo, hi])
+            f_lo, f_hi = np.searchsorted(fill_idx, [lo, hi])
+            idx = signal_idx[s_lo:s_hi]
+            yield {
+                "start": lo,
+                "end": hi,
+                "candles": arrays_to_candles({col: a[lo:hi] for col, a in arrays.items()}),
+                "equity_curve": [
+                    {"time": t, "value": v} for t, v in zip(times[lo:hi].tolist(), equity[lo:hi].tolist())
+                ],
+                "signals": [
+                    {"time": t, "side": "BUY" if code == BUY else "SELL", "price": p}
+                    for t, code, p in zip(times[idx].tolist(), raw_signals[idx].tolist(), closes[idx].tolist())
+                ],
+                "trades": sim["trades"][f_lo:f_hi],
+            }
+        yield {
+            "final_balance": sim["final_balance"],
+            "closing_trades": sim["trades"][len(fill_idx):],
+            "equity": equity,
+            "trades": sim["trades"],
+        }
+        return
+
+    # Bar loop: the strategy sees one candle at a time
+    loop = BarLoop(strategy, initial_capital, fee_rate, position_size_pct)
+    equity = np.empty(n, dtype=np.float64)
+    trades = []
+    last_candle = None
+    for lo in range(0, n, chunk_size):
+        hi = min(lo + chunk_size, n)
+        candles = arrays_to_candles({col: a[lo:hi] for col, a in arrays.items()})
+        chunk = {"start": lo, "end": hi, "candles": candles, "equity_curve": [], "signals": [], "trades": []}
+        for candle in candles:
+            point, signal, trade = loop.step(candle)
+            if signal:
+                chunk["signals"].append(signal)
+            if trade:
+                chunk["trades"].append(trade)
+            chunk["equity_curve"].append(point)
+        equity[lo:hi] = [pt["value"] for pt in chunk["equity_curve"]]
+        trades.extend(chunk["trades"])
+        last_candle = candles[-1]
+        yield chunk
+
+    closing = loop.finish(last_candle) if last_candle else None
+    closing_trades = [closing] if closing else []
+    yield {
+        "final_balance": loop.cash,
+        "closing_trades": closing_trades,
+        "equity": equity,
+        "trades": trades + closing_trades,
+    }
+
+
+ENGINE_REGISTRY = {
+    "loop": run_backtest,
+    "vectorized": run_backtest_vectorized,
+}
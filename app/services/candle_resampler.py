@@ -0,0 +1,91 @@
+# app/services/candle_resampler.py
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.candle_store import CANDLE_COLUMNS, candle_store, empty_arrays
+from app.utils.intervals import INTERVAL_MS
+
+BASE_INTERVAL = "1m"
+BASE_STEP = INTERVAL_MS[BASE_INTERVAL]
+
+# Targets whose buckets line up with UTC epoch multiples (they divide a day).
+# 3d / 1w / 1M buckets follow exchange calendar rules and are always fetched.
+RESAMPLABLE_INTERVALS = {
+    interval for interval, step in INTERVAL_MS.items()
+    if step > BASE_STEP and INTERVAL_MS["1d"] % step == 0
+}
+
+
+def resample(arrays: Dict[str, np.ndarray], target_step: int) -> Dict[str, np.ndarray]:
+    """
+    Aggregate time-sorted candles into `target_step` ms buckets aligned to
+    the epoch: open = first, high = max, low = min, close = last, volume = sum.
+
+    Buckets are built from whatever base candles exist: a bucket with missing
+    base candles (a gap, or the still-forming last bucket) aggregates the
+    ones it has, and a bucket with none is not emitted, the same as the
+    exchange returns no candle for a period without trades.
+    """
+    times = arrays["time"]
+    if not len(times):
+        return empty_arrays()
+    buckets = (times // target_step) * target_step
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(times)) - 1
+    return {
+        "time": buckets[starts],
+        "open": arrays["open"][starts],
+        "high": np.maximum.reduceat(arrays["high"], starts),
+        "low": np.minimum.reduceat(arrays["low"], starts),
+        "close": arrays["close"][ends],
+        "volume": np.add.reduceat(arrays["volume"], starts),
+    }
+
+
+def bucket_counts(arrays: Dict[str, np.ndarray], target_step: int) -> np.ndarray:
+    """Number of base candles behind each resampled bucket (target_step / base step when complete)."""
+    times = arrays["time"]
+    if not len(times):
+        return np.empty(0, dtype=np.int64)
+    buckets = (times // target_step) * target_step
+    return np.unique(buckets, return_counts=True)[1]
+
+
+def base_range(interval: str, start: int, end: int) -> Tuple[int, int]:
+    """Open-time range of the base candles behind target buckets opening in [start, end]."""
+    return start, end + INTERVAL_MS[interval] - BASE_STEP
+
+
+def plan_resample(pair: str, interval: str, start: int, end: int, allow_fetch: bool,
+                  page_limit: int = 1000) -> Optional[Tuple[int, int]]:
+    """
+    Base range to resample from, or None to fetch `interval` directly.
+    Resamples when the base candles are already stored, or (allow_fetch)
+    when the missing ones take at most CANDLE_RESAMPLE_MAX_FETCH_RATIO times
+    as many `page_limit`-sized requests as fetching `interval` directly.
+    A cold store therefore fetches a 1h window as 1h candles, not 60x as
+    many 1m candles; a mostly stored window only tops up the 1m series.
+    """
+    if interval not in RESAMPLABLE_INTERVALS or not settings.CANDLE_RESAMPLE_ENABLED:
+        return None
+    base_start, base_end = base_range(interval, start, end)
+    gaps = candle_store.missing_ranges(pair, BASE_INTERVAL, base_start, base_end, BASE_STEP)
+    if not gaps:
+        return base_start, base_end
+    if not allow_fetch:
+        return None
+    # Each gap is paged separately; ceil(candles / page_limit) requests apiece
+    base_pages = sum(-(-((gap_end - gap_start) // BASE_STEP + 1) // page_limit) for gap_start, gap_end in gaps)
+    direct_pages = -(-((end - start) // INTERVAL_MS[interval] + 1) // page_limit)
+    if base_pages <= settings.CANDLE_RESAMPLE_MAX_FETCH_RATIO * direct_pages:
+        return base_start, base_end
+    return None
+
+
+def resample_range(base: Dict[str, np.ndarray], interval: str, start: int, end: int) -> Dict[str, np.ndarray]:
+    """Resample base candles and keep the buckets opening in [start, end]."""
+    resampled = resample(base, INTERVAL_MS[interval])
+    keep = (resampled["time"] >= start) & (resampled["time"] <= end)
+    return {col: resampled[col][keep] for col in CANDLE_COLUMNS}
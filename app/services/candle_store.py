@@ -0,0 +1,280 @@
+# app/services/candle_store.py
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+CANDLE_COLUMNS = ("time", "open", "high", "low", "close", "volume")
+COLUMN_DTYPES = {"time": np.int64, "open": np.float64, "high": np.float64,
+                 "low": np.float64, "close": np.float64, "volume": np.float64}
+
+
+def empty_arrays() -> Dict[str, np.ndarray]:
+    return {col: np.empty(0, dtype=COLUMN_DTYPES[col]) for col in CANDLE_COLUMNS}
+
+
+def candles_to_columns(candles: List[Dict]) -> Dict[str, np.ndarray]:
+    """Candle dicts (time in ms) -> column arrays, in the order given."""
+    return {
+        col: np.array([candle[col] for candle in candles], dtype=COLUMN_DTYPES[col])
+        for col in CANDLE_COLUMNS
+    }
+
+
+def columns_to_candles(arrays: Dict[str, np.ndarray]) -> List[Dict]:
+    columns = {col: arrays[col].tolist() for col in CANDLE_COLUMNS}
+    return [
+        {col: columns[col][i] for col in CANDLE_COLUMNS}
+        for i in range(len(columns["time"]))
+    ]
+
+
+def merge_ranges(ranges: List[Tuple[int, int]], step: int) -> List[Tuple[int, int]]:
+    """Merge inclusive [start, end] open-time ranges that overlap or are adjacent."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + step:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start: int, end: int, covered: List[Tuple[int, int]], step: int) -> List[Tuple[int, int]]:
+    """Parts of [start, end] not inside any covered range."""
+    gaps = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, min(c_start - step, end)))
+        cursor = max(cursor, c_end + step)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return [(s, e) for s, e in gaps if s <= e]
+
+
+def select_times(arrays: Dict[str, np.ndarray], start: int, end: int) -> Dict[str, np.ndarray]:
+    """Rows of time-sorted columns with start <= open time <= end."""
+    lo = int(np.searchsorted(arrays["time"], start, side="left"))
+    hi = int(np.searchsorted(arrays["time"], end, side="right"))
+    return {col: arrays[col][lo:hi] for col in CANDLE_COLUMNS}
+
+
+def merge_columns(newer: Dict[str, np.ndarray], older: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Union of two candle column sets, sorted by time; `newer` wins on equal open time."""
+    combined = {col: np.concatenate([np.asarray(newer[col], dtype=COLUMN_DTYPES[col]),
+                                     np.asarray(older[col], dtype=COLUMN_DTYPES[col])])
+                for col in CANDLE_COLUMNS}
+    # np.unique keeps the first occurrence, i.e. the newer row
+    _, first = np.unique(combined["time"], return_index=True)
+    return {col: np.ascontiguousarray(combined[col][first]) for col in CANDLE_COLUMNS}
+
+
+def _within(times: np.ndarray, ranges: List[Tuple[int, int]]) -> np.ndarray:
+    keep = np.zeros(len(times), dtype=bool)
+    for start, end in ranges:
+        keep |= (times >= start) & (times <= end)
+    return keep
+
+
+class CandleStore:
+    """
+    On-disk columnar candle store, one segment per (pair, interval).
+
+    A segment is a directory of parts plus meta.json. A part is a directory
+    holding one .npy file per column for a sorted run of candles (open time
+    in epoch ms). Parts never overlap in time, so a read memory-maps the
+    parts that touch the range and concatenates their slices. meta.json
+    lists the parts and the open-time ranges that have been fetched.
+
+    A write only touches the rows it changes. New rows that fall outside
+    every part (appends, backfills) go to a new part, and only the parts
+    they overlap are merged and rewritten. Once a segment has more than
+    CANDLE_STORE_MAX_PARTS parts, the smallest adjacent pair is merged.
+    Only rows inside the fetched (covered) ranges are stored, so a
+    still-forming candle is never persisted or rewritten.
+
+    Parts are swapped in by replacing meta.json, so readers always see a
+    complete set. Writers are serialized per segment across threads and
+    processes (uvicorn workers share the directory) by an flock on the
+    segment's .lock file, so a read-modify-write of meta.json never loses
+    another writer's rows or coverage.
+    """
+
+    def __init__(self, root: str, max_parts: int = None):
+        self.root = Path(root)
+        self.max_parts = max_parts or settings.CANDLE_STORE_MAX_PARTS
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # -------------------------
+    # Layout
+    # -------------------------
+    def _segment_dir(self, pair: str, interval: str) -> Path:
+        safe = lambda s: re.sub(r"[^A-Za-z0-9_.-]", "_", s)
+        return self.root / safe(pair) / safe(interval)
+
+    def _lock(self, pair: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((pair, interval), threading.Lock())
+
+    @contextmanager
+    def _write_lock(self, pair: str, interval: str, segment: Path):
+        # flock is per open file, so the thread lock still orders writers inside
+        # this process; the file lock orders them against other processes
+        with self._lock(pair, interval):
+            segment.mkdir(parents=True, exist_ok=True)
+            with open(segment / ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self, segment: Path) -> Optional[Dict]:
+        try:
+            with open(segment / "meta.json") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        if "parts" not in meta:
+            # Single-version layout written before parts existed
+            meta["parts"] = []
+            if meta["rows"]:
+                times = np.load(segment / f"v{meta['version']}" / "time.npy", mmap_mode="r")
+                meta["parts"] = [{"dir": f"v{meta['version']}", "start": int(times[0]),
+                                  "end": int(times[-1]), "rows": int(len(times))}]
+            meta["next_part"] = 1
+        return meta
+
+    def _load_part(self, segment: Path, part: Dict) -> Dict[str, np.ndarray]:
+        part_dir = segment / part["dir"]
+        return {col: np.load(part_dir / f"{col}.npy", mmap_mode="r") for col in CANDLE_COLUMNS}
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def coverage(self, pair: str, interval: str) -> List[Tuple[int, int]]:
+        meta = self._read_meta(self._segment_dir(pair, interval))
+        return [tuple(r) for r in meta["coverage"]] if meta else []
+
+    def missing_ranges(self, pair: str, interval: str, start: int, end: int, step: int) -> List[Tuple[int, int]]:
+        """Open-time ranges inside [start, end] that were never fetched."""
+        return subtract_ranges(start, end, self.coverage(pair, interval), step)
+
+    def read_range(self, pair: str, interval: str, start: int, end: int) -> Dict[str, np.ndarray]:
+        """Candles with start <= open time <= end, as column arrays."""
+        segment = self._segment_dir(pair, interval)
+        for _ in range(3):
+            meta = self._read_meta(segment)
+            if not meta:
+                return empty_arrays()
+            parts = [p for p in meta["parts"] if p["start"] <= end and p["end"] >= start]
+            try:
+                slices = [select_times(self._load_part(segment, p), start, end) for p in parts]
+                break
+            except FileNotFoundError:
+                # A writer replaced parts between reading meta and the columns
+                continue
+        else:
+            return empty_arrays()
+        if not slices:
+            return empty_arrays()
+        return {col: np.concatenate([np.asarray(s[col]) for s in slices]) for col in CANDLE_COLUMNS}
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def _write_part(self, segment: Path, meta: Dict, arrays: Dict[str, np.ndarray]) -> Dict:
+        name = f"p{meta['next_part']}"
+        meta["next_part"] += 1
+        part_dir = segment / name
+        part_dir.mkdir(parents=True, exist_ok=True)
+        for col in CANDLE_COLUMNS:
+            np.save(part_dir / f"{col}.npy", arrays[col])
+        return {"dir": name, "start": int(arrays["time"][0]), "end": int(arrays["time"][-1]),
+                "rows": int(len(arrays["time"]))}
+
+    def _merge_parts(self, segment: Path, meta: Dict, parts: List[Dict],
+                     newer: Dict[str, np.ndarray] = None) -> Dict:
+        """One new part holding `parts` (oldest data) and `newer` rows, which win on equal time."""
+        merged = newer if newer is not None else empty_arrays()
+        for part in parts:
+            merged = merge_columns(merged, {col: np.asarray(a) for col, a in self._load_part(segment, part).items()})
+        return self._write_part(segment, meta, merged)
+
+    def write(self, pair: str, interval: str, arrays: Dict[str, np.ndarray],
+              covered: List[Tuple[int, int]], step: int):
+        """
+        Merge candles into the segment (new rows win on equal open time) and
+        record the `covered` open-time ranges as fetched. Only rows inside
+        `covered` are stored; anything else (e.g. a still-forming candle) is
+        left for the caller to serve and will be fetched again.
+        """
+        covered = [tuple(r) for r in covered]
+        segment = self._segment_dir(pair, interval)
+        keep = _within(np.asarray(arrays["time"]), covered)
+        rows = {col: np.asarray(arrays[col])[keep] for col in CANDLE_COLUMNS}
+        if not covered:
+            return
+
+        with self._write_lock(pair, interval, segment):
+            # Re-read under the lock: another process may have written since our caller looked
+            meta = self._read_meta(segment) or {"pair": pair, "interval": interval, "rows": 0,
+                                                 "coverage": [], "parts": [], "next_part": 1}
+            parts = list(meta["parts"])
+            replaced = []
+
+            if len(rows["time"]):
+                rows = merge_columns(rows, empty_arrays())
+                first, last = int(rows["time"][0]), int(rows["time"][-1])
+                overlapping = [p for p in parts if p["start"] <= last and p["end"] >= first]
+                if overlapping:
+                    parts = [p for p in parts if p not in overlapping]
+                    replaced += overlapping
+                    parts.append(self._merge_parts(segment, meta, overlapping, rows))
+                else:
+                    parts.append(self._write_part(segment, meta, rows))
+                parts.sort(key=lambda p: p["start"])
+
+                while len(parts) > self.max_parts:
+                    # Compact: merge the smallest adjacent pair
+                    k = min(range(len(parts) - 1), key=lambda i: parts[i]["rows"] + parts[i + 1]["rows"])
+                    pair_parts = parts[k:k + 2]
+                    replaced += pair_parts
+                    parts[k:k + 2] = [self._merge_parts(segment, meta, pair_parts)]
+
+            coverage = merge_ranges([tuple(r) for r in meta["coverage"]] + covered, step)
+            new_meta = {
+                "pair": pair,
+                "interval": interval,
+                "rows": sum(p["rows"] for p in parts),
+                "coverage": [list(r) for r in coverage],
+                "parts": parts,
+                "next_part": meta["next_part"],
+            }
+            tmp = segment / "meta.json.tmp"
+            with open(tmp, "w") as f:
+                json.dump(new_meta, f)
+            os.replace(tmp, segment / "meta.json")
+
+            for part in replaced:
+                shutil.rmtree(segment / part["dir"], ignore_errors=True)
+
+
+candle_store = CandleStore(settings.CANDLE_STORE_DIR)
@@ -0,0 +1,255 @@
+# app/services/market_data_hub.py
+import asyncio
+import json
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import socketio
+
+from app.core.config import settings
+
+Callback = Callable[[dict], Awaitable[None]]
+
+
+class Subscription:
+    """
+    One in-process subscriber with its own bounded queue and delivery task.
+
+    The hub only appends to the queue, so a subscriber whose callback is
+    slow (wallet writes, strategy evaluation, ...) delays its own messages
+    and nobody else's. Messages are delivered in order.
+
+    With a `coalesce_key` (e.g. the candle open time), a message replaces the
+    queued one right before it when both have the same key, so a subscriber
+    that falls behind skips stale intrabar updates but still gets the last
+    state of every key, i.e. every closing candle; those are never dropped.
+    Without one, the oldest message is dropped once `max_pending` are waiting.
+    """
+
+    def __init__(self, channel: str, event: str, callback: Callback, max_pending: int = None,
+                 coalesce_key: Optional[Callable[[dict], Hashable]] = None):
+        self.channel = channel
+        self.event = event
+        self.callback = callback
+        self.max_pending = max_pending or settings.HUB_SUBSCRIBER_MAX_PENDING
+        self.coalesce_key = coalesce_key
+        self.queue = deque()            # [key, parsed] entries
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def put(self, parsed):
+        if self.closed:
+            return
+        key = None
+        if self.coalesce_key is not None:
+            key = self.coalesce_key(parsed) if isinstance(parsed, dict) else None
+            if key is not None and self.queue and self.queue[-1][0] == key:
+                # Newer state of the same item: replace it in place
+                self.queue[-1][1] = parsed
+                self.coalesced += 1
+                return
+        if len(self.queue) >= self.max_pending:
+            if key is None:
+                self.queue.popleft()
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    print(f"⚠️ Hub subscriber on {self.channel} is behind, {self.dropped} messages dropped")
+            elif len(self.queue) % self.max_pending == 0:
+                # Every entry is the last state of its key: keep them all
+                print(f"⚠️ Hub subscriber on {self.channel} is {len(self.queue)} items behind")
+        self.queue.append([key, parsed])
+        self._wake.set()
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self.closed:
+            if not self.queue:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            _, parsed = self.queue.popleft()
+            try:
+                await self.callback(parsed)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Hub callback error ({self.channel}): {e}")
+
+    def close(self):
+        """Stop delivering; a callback already running is left to finish."""
+        self.closed = True
+        self.queue.clear()
+        self._wake.set()
+
+
+def _compact_pair(pair: str) -> str:
+    """'B-BTC_USDT' -> 'BTCUSDT', to compare against the 's' symbol field."""
+    return pair.split("-", 1)[-1].replace("_", "").upper()
+
+
+class MarketDataHub:
+    """
+    One upstream CoinDCX Socket.IO connection shared by the whole process.
+
+    Each channel is joined once and reference counted across subscribers;
+    each message is parsed once and queued for every in-process subscriber
+    of its channel, each delivered by its own task. The channel is left when
+    its last subscriber goes away.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.sio: Optional[socketio.AsyncClient] = None
+        self.refcounts: Dict[str, int] = {}
+        self.subscribers: Dict[Tuple[str, str], List[Subscription]] = defaultdict(list)
+        self.events: Dict[str, set] = defaultdict(set)   # event -> channels
+        self._handled_events = set()
+        self._lock = asyncio.Lock()
+        self.messages_received = 0
+
+    # -------------------------
+    # Connection
+    # -------------------------
+    def _build_client(self) -> socketio.AsyncClient:
+        sio = socketio.AsyncClient()
+
+        @sio.event
+        async def connect():
+            print(f"✅ Market data hub connected to CoinDCX ({len(self.refcounts)} channels)")
+            # (Re)join everything that still has subscribers, e.g. after a reconnect
+            for channel in list(self.refcounts):
+                await sio.emit("join", {"channelName": channel})
+
+        @sio.event
+        async def disconnect():
+            print("❌ Market data hub disconnected from CoinDCX")
+
+        return sio
+
+    async def _ensure_connected(self):
+        if self.sio is None:
+            self.sio = self._build_client()
+            self._handled_events.clear()
+        if not self.sio.connected:
+            await self.sio.connect(self.url, transports=["websocket"])
+
+    def _ensure_handler(self, event: str):
+        if event in self._handled_events:
+            return
+
+        async def handler(data):
+            await self._dispatch(event, data)
+
+        self.sio.on(event, handler)
+        self._handled_events.add(event)
+
+    async def close(self):
+        async with self._lock:
+            if self.sio is not None and self.sio.connected:
+                await self.sio.disconnect()
+            self.sio = None
+
+    # -------------------------
+    # Subscriptions
+    # -------------------------
+    async def subscribe(self, channel: str, event: str, callback: Callback,
+                        coalesce_key: Optional[Callable[[dict], Hashable]] = None) -> Subscription:
+        async with self._lock:
+            await self._ensure_connected()
+            self._ensure_handler(event)
+            subscription = Subscription(channel, event, callback, coalesce_key=coalesce_key)
+            self.subscribers[(event, channel)].append(subscription)
+            self.events[event].add(channel)
+            self.refcounts[channel] = self.refcounts.get(channel, 0) + 1
+            if self.refcounts[channel] == 1:
+                await self.sio.emit("join", {"channelName": channel})
+                print(f"📡 Hub joined: {channel}")
+            return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        async with self._lock:
+            key = (subscription.event, subscription.channel)
+            subs = self.subscribers.get(key, [])
+            if subscription not in subs:
+                return
+            subs.remove(subscription)
+            subscription.close()
+            if not subs:
+                del self.subscribers[key]
+                self.events[subscription.event].discard(subscription.channel)
+
+            channel = subscription.channel
+            self.refcounts[channel] -= 1
+            if self.refcounts[channel] == 0:
+                del self.refcounts[channel]
+                if self.sio is not None and self.sio.connected:
+                    await self.sio.emit("leave", {"channelName": channel})
+                print(f"👋 Hub left: {channel}")
+
+    # -------------------------
+    # Dispatch
+    # -------------------------
+    def _resolve_channel(self, event: str, message: dict, parsed: dict) -> Optional[str]:
+        channels = self.events.get(event)
+        if not channels:
+            return None
+        for candidate in (message.get("channel"), parsed.get("channel")):
+            if candidate in channels:
+                return candidate
+        if len(channels) == 1:
+            return next(iter(channels))
+
+        # Match on the pair / symbol carried in the payload
+        pair = parsed.get("pair")
+        symbol = (parsed.get("s") or "").upper()
+        interval = parsed.get("i")
+        for channel in channels:
+            channel_pair = channel.split("@", 1)[0]
+            if interval and channel_pair.endswith(f"_{interval}"):
+                channel_pair = channel_pair[: -len(interval) - 1]
+            elif interval:
+                continue
+            if channel_pair == pair or (symbol and _compact_pair(channel_pair) == symbol):
+                return channel
+        return None
+
+    async def _dispatch(self, event: str, message):
+        self.messages_received += 1
+        raw = message.get("data") if isinstance(message, dict) else None
+        if not raw:
+            return
+        try:
+            parsed = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        except ValueError as e:
+            print(f"Hub parse error on {event}: {e}")
+            return
+
+        channel = self._resolve_channel(event, message, parsed if isinstance(parsed, dict) else {})
+        if channel is None:
+            print(f"⚠️ Hub could not route {event} message")
+            return
+
+        # Never awaits a callback: one slow subscriber must not hold up the rest
+        for subscription in self.subscribers.get((event, channel), ()):
+            subscription.put(parsed)
+
+    def stats(self) -> dict:
+        subscriptions = [s for subs in self.subscribers.values() for s in subs]
+        return {
+            "connected": bool(self.sio and self.sio.connected),
+            "channels": dict(self.refcounts),
+            "messages_received": self.messages_received,
+            "max_subscriber_backlog": max((len(s.queue) for s in subscriptions), default=0),
+            "coalesced": sum(s.coalesced for s in subscriptions),
+            "dropped": sum(s.dropped for s in subscriptions),
+        }
+
+
+market_data_hub = MarketDataHub(settings.COINDCX_WEBSOCKET_URL)
@@ -0,0 +1,202 @@
+# app/services/market_metadata.py
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+MARKETS_URL = "https://api.coindcx.com/exchange/v1/markets_details"
+MISS_REFRESH_INTERVAL = 60.0   # seconds between refreshes triggered by unknown symbols
+
+
+class MarketMetadataService:
+    """
+    CoinDCX market details, loaded in one request into symbol -> pair and
+    pair -> market indexes.
+
+    Refreshes run every `ttl` seconds in the background (and when a lookup
+    finds the data stale); concurrent refreshes share one request. The last
+    download is kept on disk, so a cold start answers from the snapshot
+    instead of waiting on the network.
+    """
+
+    def __init__(self, snapshot_path: str, ttl: float, timeout: float = 10):
+        self.snapshot_path = Path(snapshot_path)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.by_symbol: Dict[str, str] = {}     # active markets only
+        self.by_pair: Dict[str, dict] = {}
+        self.loaded_at: Optional[float] = None  # when the current data was downloaded
+        self._snapshot_checked = False
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_miss_refresh = 0.0
+
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.shared_refreshes = 0
+        self.snapshot_loads = 0
+
+    # -------------------------
+    # Indexes
+    # -------------------------
+    def _index(self, markets: List[dict], fetched_at: float):
+        by_symbol, by_pair = {}, {}
+        for market in markets:
+            pair = market.get("pair")
+            if not pair:
+                continue
+            by_pair[pair] = market
+            if market.get("status") == "active" and market.get("symbol"):
+                by_symbol[market["symbol"]] = pair
+        # Swap whole dicts so readers never see a half-built index
+        self.by_symbol, self.by_pair = by_symbol, by_pair
+        self.loaded_at = fetched_at
+
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.time() - self.loaded_at >= self.ttl
+
+    # -------------------------
+    # Snapshot
+    # -------------------------
+    def load_snapshot(self) -> bool:
+        self._snapshot_checked = True
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            self._index(snapshot["markets"], snapshot["fetched_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self.snapshot_loads += 1
+        print(f"📦 Loaded {len(self.by_pair)} markets from snapshot")
+        return True
+
+    def _save_snapshot(self, markets: List[dict], fetched_at: float):
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"fetched_at": fetched_at, "markets": markets}, f)
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            print(f"⚠️ Could not write market snapshot: {e}")
+
+    # -------------------------
+    # Network
+    # -------------------------
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def _fetch(self) -> List[dict]:
+        session = await self._get_session()
+        async with session.get(MARKETS_URL) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def _do_refresh(self):
+        try:
+            markets = await self._fetch()
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"⚠️ Market metadata refresh failed: {e}")
+            raise
+        fetched_at = time.time()
+        self._index(markets, fetched_at)
+        self.refreshes += 1
+        await asyncio.to_thread(self._save_snapshot, markets, fetched_at)
+
+    async def refresh(self):
+        """Download markets now; callers arriving while a download runs wait for that one."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+            # Background refreshes may have no awaiter; don't warn about their errors
+            self._inflight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        else:
+            self.shared_refreshes += 1
+        await asyncio.shield(self._inflight)
+
+    def _refresh_in_background(self):
+        if self._inflight is None or self._inflight.done():
+            asyncio.ensure_future(self.refresh()).add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    async def ensure_loaded(self):
+        if self.loaded_at is None and not self._snapshot_checked:
+            self.load_snapshot()
+        if self.loaded_at is None:
+            await self.refresh()
+        elif self.is_stale():
+            self._refresh_in_background()
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    async def get_pair(self, symbol: str) -> str:
+        """Pair of an active market, e.g. 'BTCUSDT' -> 'B-BTC_USDT'."""
+        await self.ensure_loaded()
+        pair = self.by_symbol.get(symbol)
+        if pair is None and time.time() - self._last_miss_refresh >= MISS_REFRESH_INTERVAL:
+            # Possibly listed since the last download
+            self._last_miss_refresh = time.time()
+            await self.refresh()
+            pair = self.by_symbol.get(symbol)
+        if pair is None:
+            raise ValueError(f"Symbol {symbol} not found in active markets")
+        return pair
+
+    async def get_market(self, pair: str) -> Optional[dict]:
+        await self.ensure_loaded()
+        return self.by_pair.get(pair)
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    async def _run(self):
+        while True:
+            try:
+                await self.ensure_loaded()
+                delay = self.ttl - (time.time() - self.loaded_at) if self.loaded_at else self.ttl
+                await asyncio.sleep(max(delay, 1.0))
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(min(self.ttl, 60.0))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def metrics(self) -> dict:
+        return {
+            "markets": len(self.by_pair),
+            "active_symbols": len(self.by_symbol),
+            "age_seconds": time.time() - self.loaded_at if self.loaded_at else None,
+            "stale": self.is_stale(),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "shared_refreshes": self.shared_refreshes,
+            "snapshot_loads": self.snapshot_loads,
+        }
+
+
+market_metadata = MarketMetadataService(settings.MARKET_METADATA_SNAPSHOT, settings.MARKET_METADATA_TTL)
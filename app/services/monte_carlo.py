@@ -0,0 +1,152 @@
+# app/services/monte_carlo.py
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MONTE_CARLO_METHODS = {"bootstrap", "shuffle"}
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_ELEMENTS = 4_000_000     # sims x trades cells held in memory at once
+BAND_ELEMENTS = 10_000_000     # sims x band points kept for the percentile bands
+
+
+def trade_returns(trades: List[Dict]) -> np.ndarray:
+    """Gross price return (exit / entry - 1) of every closed round trip, in order."""
+    entries = [t["entry_price"] for t in trades if t.get("side") == "BUY"]
+    exits = [t["exit_price"] for t in trades if t.get("side") == "SELL"]
+    closed = min(len(entries), len(exits))
+    entry = np.array(entries[:closed], dtype=np.float64)
+    exit_ = np.array(exits[:closed], dtype=np.float64)
+    return exit_ / entry - 1.0
+
+
+def _cash_multipliers(returns: np.ndarray, fee_rate: float, position_size_pct: float,
+                      fee_jitter: float, slippage: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Per-trade cash growth factor, same accounting as the backtest engine:
+    allocation = cash * pct, fee charged on entry and exit notional.
+    Fees are scaled by U(1 - fee_jitter, 1 + fee_jitter); slippage is an
+    adverse U(0, slippage) fraction on both the entry and the exit price.
+    """
+    shape = returns.shape
+    entry_fee = np.full(shape, fee_rate)
+    exit_fee = np.full(shape, fee_rate)
+    if fee_jitter > 0:
+        entry_fee *= rng.uniform(1 - fee_jitter, 1 + fee_jitter, shape)
+        exit_fee *= rng.uniform(1 - fee_jitter, 1 + fee_jitter, shape)
+    growth = 1.0 + returns
+    if slippage > 0:
+        growth = growth * (1 - rng.uniform(0, slippage, shape)) / (1 + rng.uniform(0, slippage, shape))
+    return 1.0 + position_size_pct * (growth * (1 - exit_fee) - 1 - entry_fee)
+
+
+def _histogram(values: np.ndarray, bins: int) -> Dict:
+    lo, hi = float(values.min()), float(values.max())
+    if hi - lo <= 1e-9 * max(1.0, abs(hi)):
+        # (Near-)constant values, e.g. shuffle without fee/slippage noise
+        bins, hist_range = 1, (lo - 0.5, hi + 0.5)
+    else:
+        hist_range = (lo, hi)
+    counts, edges = np.histogram(values, bins=bins, range=hist_range)
+    return {"edges": np.round(edges, 4).tolist(), "counts": counts.tolist()}
+
+
+def _percentiles(values: np.ndarray) -> Dict:
+    return {f"p{p}": round(float(v), 4) for p, v in zip(BAND_PERCENTILES, np.percentile(values, BAND_PERCENTILES))}
+
+
+def run_monte_carlo(
+    trades: List[Dict],
+    initial_capital: float,
+    fee_rate: float = 0.001,
+    position_size_pct: float = 1.0,
+    simulations: int = 10_000,
+    method: str = "bootstrap",
+    fee_jitter_pct: float = 0.0,
+    slippage_bps: float = 0.0,
+    ruin_threshold_pct: float = 50.0,
+    band_points: int = 100,
+    bins: int = 30,
+    seed: Optional[int] = None,
+) -> Dict:
+    """
+    Resample the closed trades of a backtest into `simulations` equity paths
+    and summarize them. "bootstrap" draws trades with replacement, "shuffle"
+    permutes their order. Paths are built as a simulations x trades matrix
+    (cumprod of cash multipliers), processed in row chunks to bound memory.
+    Ruin means equity touching ruin_threshold_pct of the initial capital.
+    The band samples of every path are kept for the percentiles, so
+    simulations x band_points is bounded by BAND_ELEMENTS.
+    """
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {sorted(MONTE_CARLO_METHODS)}")
+    if simulations * band_points > BAND_ELEMENTS:
+        raise ValueError(f"simulations x band_points must be at most {BAND_ELEMENTS}")
+
+    started = time.perf_counter()
+    returns = trade_returns(trades)
+    n = len(returns)
+    if n == 0:
+        return {"trades": 0, "simulations": 0}
+
+    rng = np.random.default_rng(seed)
+    ruin_level = initial_capital * ruin_threshold_pct / 100
+    # Equity is sampled at these trade counts for the percentile bands (0 = start)
+    band_idx = np.unique(np.linspace(0, n, min(band_points, n + 1)).round().astype(np.int64))
+
+    final_equity = np.empty(simulations)
+    max_drawdown = np.empty(simulations)
+    ruined = np.empty(simulations, dtype=bool)
+    band_equity = np.empty((simulations, len(band_idx)))
+
+    chunk = max(1, CHUNK_ELEMENTS // n)
+    for lo in range(0, simulations, chunk):
+        hi = min(lo + chunk, simulations)
+        rows = hi - lo
+        if method == "bootstrap":
+            sampled = returns[rng.integers(0, n, size=(rows, n))]
+        else:
+            sampled = rng.permuted(np.broadcast_to(returns, (rows, n)), axis=1)
+
+        multipliers = _cash_multipliers(
+            sampled, fee_rate, position_size_pct, fee_jitter_pct / 100, slippage_bps / 10_000, rng
+        )
+        equity = np.empty((rows, n + 1))
+        equity[:, 0] = initial_capital
+        np.cumprod(multipliers, axis=1, out=equity[:, 1:])
+        equity[:, 1:] *= initial_capital
+
+        peak = np.maximum.accumulate(equity, axis=1)
+        final_equity[lo:hi] = equity[:, -1]
+        max_drawdown[lo:hi] = ((peak - equity) / peak).max(axis=1) * 100
+        ruined[lo:hi] = (equity <= ruin_level).any(axis=1)
+        band_equity[lo:hi] = equity[:, band_idx]
+
+    bands = np.percentile(band_equity, BAND_PERCENTILES, axis=0)
+    total_return = (final_equity / initial_capital - 1) * 100
+
+    return {
+        "trades": int(n),
+        "simulations": int(simulations),
+        "method": method,
+        "final_equity": {
+            **_percentiles(final_equity),
+            "mean": round(float(final_equity.mean()), 4),
+            "histogram": _histogram(final_equity, bins),
+        },
+        "total_return_pct": _percentiles(total_return),
+        "max_drawdown_pct": {
+            **_percentiles(max_drawdown),
+            "mean": round(float(max_drawdown.mean()), 4),
+            "histogram": _histogram(max_drawdown, bins),
+        },
+        "probability_of_loss": round(float((final_equity < initial_capital).mean()), 4),
+        "risk_of_ruin": round(float(ruined.mean()), 4),
+        "ruin_threshold_pct": ruin_threshold_pct,
+        # Compact chart form: one shared x axis, one list per percentile
+        "equity_bands": {
+            "trade_index": band_idx.tolist(),
+            **{f"p{p}": np.round(band, 2).tolist() for p, band in zip(BAND_PERCENTILES, bands)},
+        },
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -1,5 +1,8 @@
 from datetime import datetime
+from app.core import repository
 from app.core.database import wallets, positions, trades
+from app.services.position_book import PositionBook
+from app.services.write_behind import write_behind
 from app.utils.time_date_format import format_date
 
 class PaperWallet:
@@ -7,7 +10,39 @@ class PaperWallet:
         self.user_id = user_id
         self.total_balance = initial_cash      # never changes unless deposit/withdraw
         self.available_balance = initial_cash  # changes with trades
-        self.positions = {}                    # symbol -> qty
+        self.book = PositionBook()             # qty, average entry, PnL and fees per symbol
+
+    @property
+    def positions(self) -> dict:
+        """symbol -> held qty"""
+        return {s: p.qty for s, p in self.book.positions.items() if p.is_open}
+
+    async def load_positions(self):
+        """Read the user's stored positions once, at session start; trades never read the DB after this."""
+        docs = await repository.list_positions(self.user_id, limit=None)
+        self.book = PositionBook.from_docs(docs)
+
+    async def _persist_position(self, symbol: str):
+        await write_behind.set(
+            positions,
+            {"user_id": self.user_id, "symbol": symbol},
+            {**self.book.get(symbol).to_doc(), "last_updated": format_date(datetime.now())},
+            upsert=True
+        )
+
+    # In-memory state is authoritative for the session; Mongo writes go
+    # through the write-behind queue and are flushed in batches.
+    async def _persist_wallet(self):
+        await write_behind.set(
+            wallets,
+            {"user_id": self.user_id},
+            {
+                "total_balance": self.total_balance,
+                "available_balance": self.available_balance,
+                "updated_at": format_date(datetime.now())
+            },
+            upsert=True
+        )
 
     # -------------------------
     # BUY
@@ -18,7 +53,7 @@ class PaperWallet:
             return False
 
         self.available_balance -= cost
-        self.positions[symbol] = self.positions.get(symbol, 0) + trade_qty
+        self.book.apply_buy(symbol, price, trade_qty, fee)
 
         # Log trade
         trade_doc = {
@@ -31,37 +66,13 @@ class PaperWallet:
             "timestamp": format_date(datetime.now()),
             "mode": "paper"
         }
-        await trades.insert_one(trade_doc)
+        await write_behind.insert(trades, trade_doc)
 
         # Update position
-        await positions.update_one(
-            {"user_id": self.user_id, "symbol": symbol},
-            {
-                "$set": {
-                    "qty": trade_qty,
-                    "entry_price": price,
-                    "current_price": price,
-                    "side": "BUY",
-                    "is_closed": False,
-                    "realized_pnl": 0,
-                    "last_updated": format_date(datetime.now())
-                }
-            },
-            upsert=True
-        )
+        await self._persist_position(symbol)
 
         # Update wallet balances
-        await wallets.update_one(
-            {"user_id": self.user_id},
-            {
-                "$set": {
-                    "total_balance": self.total_balance,
-                    "available_balance": self.available_balance,
-                    "updated_at": format_date(datetime.now())
-                }
-            },
-            upsert=True
-        )
+        await self._persist_wallet()
 
         return True
 
@@ -69,31 +80,18 @@ class PaperWallet:
     # SELL
     # -------------------------
     async def sell(self, symbol: str, price: float, trade_qty: float, fee: float = 0.0):
-        current_qty = self.positions.get(symbol, 0)
-        if current_qty < trade_qty:
+        current_qty = self.book.qty(symbol)
+        if trade_qty <= 0 or current_qty < trade_qty:
             return False
 
-        # Calculate proceeds & realized PnL
+        # Calculate proceeds & realized PnL against the average entry
         proceeds = price * trade_qty - fee
-        entry_price = await self._get_entry_price(symbol)
-        realized_pnl = (price - entry_price) * trade_qty
+        realized_pnl = self.book.apply_sell(symbol, price, trade_qty, fee)
 
         self.available_balance += proceeds
-        self.positions[symbol] -= trade_qty
 
         # Update position in DB
-        await positions.update_one(
-            {"user_id": self.user_id, "symbol": symbol},
-            {
-                "$set": {
-                    "qty":trade_qty,
-                    "current_price": price,
-                    "is_closed": self.positions[symbol] <= 0,
-                    "realized_pnl": realized_pnl,
-                    "last_updated": format_date(datetime.now())
-                }
-            }
-        )
+        await self._persist_position(symbol)
 
         # Log trade
         trade_doc = {
@@ -107,43 +105,18 @@ class PaperWallet:
             "timestamp": format_date(datetime.now()),
             "mode": "paper"
         }
-        await trades.insert_one(trade_doc)
+        await write_behind.insert(trades, trade_doc)
 
         # Update wallet balances
-        await wallets.update_one(
-            {"user_id": self.user_id},
-            {
-                "$set": {
-                    "total_balance": self.total_balance,
-                    "available_balance": self.available_balance,
-                    "updated_at": format_date(datetime.now())
-                }
-            },
-            upsert=True
-        )
+        await self._persist_wallet()
 
         return True
 
-    # -------------------------
-    # Get entry price from DB
-    # -------------------------
-    async def _get_entry_price(self, symbol: str) -> float:
-        pos = await positions.find_one({"user_id": self.user_id, "symbol": symbol})
-        if pos:
-            return pos.get("entry_price", 0.0)
-        return 0.0
-
     # -------------------------
     # Calculate portfolio value
     # -------------------------
     async def portfolio_value(self, current_prices: dict) -> float:
-        value = self.available_balance
-        for sym, qty in self.positions.items():
-            if qty > 0:
-                entry_price = await self._get_entry_price(sym)
-                current_price = current_prices.get(sym, entry_price)
-                value += qty * current_price
-        return value
+        return self.available_balance + self.book.market_value(current_prices)
 
     # -------------------------
     # Deposit / Withdraw
@@ -151,28 +124,12 @@ class PaperWallet:
     async def deposit(self, amount: float):
         self.total_balance += amount
         self.available_balance += amount
-        await wallets.update_one(
-            {"user_id": self.user_id},
-            {"$set": {
-                "total_balance": self.total_balance,
-                "available_balance": self.available_balance,
-                "updated_at": format_date(datetime.now())
-            }},
-            upsert=True
-        )
+        await self._persist_wallet()
 
     async def withdraw(self, amount: float) -> bool:
         if self.available_balance >= amount:
             self.total_balance -= amount
             self.available_balance -= amount
-            await wallets.update_one(
-                {"user_id": self.user_id},
-                {"$set": {
-                    "total_balance": self.total_balance,
-                    "available_balance": self.available_balance,
-                    "updated_at": format_date(datetime.now())
-                }},
-                upsert=True
-            )
+            await self._persist_wallet()
             return True
         return False
@@ -0,0 +1,274 @@
+# app/services/parameter_sweep.py
+import itertools
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.backtest import StrategyParams
+from app.services.backtest_analytics import summarize
+from app.services.backtest_engine import arrays_to_candles, run_backtest, simulate_signals
+from app.strategies import STRATEGY_REGISTRY
+
+# metric -> True if higher is better
+SWEEP_METRICS = {
+    "total_return": True,
+    "net_profit": True,
+    "final_balance": True,
+    "cagr": True,
+    "sharpe_ratio": True,
+    "sortino_ratio": True,
+    "calmar_ratio": True,
+    "win_rate": True,
+    "profit_factor": True,
+    "max_drawdown": False,
+}
+
+# One process pool shared by every sweep / walk-forward request, so CPU use
+# is bounded by SWEEP_POOL_WORKERS however many requests run at once.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Worker-side: candle arrays of recent jobs, memory-mapped from the job
+# directory the first time a chunk of that job lands on this process.
+_worker_jobs: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+_WORKER_JOB_CACHE = 2
+_worker_arrays = None
+_worker_candles = None
+
+
+def build_param_grid(param_ranges: Dict[str, Dict]) -> List[Dict]:
+    """Expand {"short": {"start", "stop", "step"}, ...} (stop inclusive) into a list of param dicts."""
+    names = list(param_ranges)
+    values = []
+    for name in names:
+        r = param_ranges[name]
+        step = r.get("step") or 1
+        values.append(list(range(r["start"], r["stop"] + 1, step)))
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def grid_size(param_ranges: Dict[str, Dict]) -> int:
+    total = 1
+    for r in param_ranges.values():
+        step = r.get("step") or 1
+        total *= len(range(r["start"], r["stop"] + 1, step))
+    return total
+
+
+# -------------------------
+# Shared pool
+# -------------------------
+def start_pool(workers: int = None) -> ProcessPoolExecutor:
+    """
+    Create the shared pool (idempotent). Workers come from a forkserver (or
+    spawn) context: forking the multi-threaded server process would copy
+    its event loop, Motor threads and held locks into every worker.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool_workers = max(1, workers or settings.SWEEP_POOL_WORKERS)
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=context)
+            print(f"🧮 Sweep pool started ({_pool_workers} workers, {context.get_start_method()})")
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def pool_size() -> int:
+    """Worker processes of the shared pool (the configured size until it is started)."""
+    return _pool_workers if _pool is not None else max(1, settings.SWEEP_POOL_WORKERS)
+
+
+def clamp_workers(workers: Optional[int], tasks: int) -> int:
+    """Requested worker count, capped at the pool size and the number of tasks."""
+    size = pool_size()
+    return max(1, min(workers or size, size, tasks))
+
+
+def _publish_arrays(arrays: Dict[str, np.ndarray]) -> str:
+    """Write the columns to a job directory the workers memory-map (nothing is pickled per task)."""
+    job_dir = tempfile.mkdtemp(prefix="sweep-")
+    for col, a in arrays.items():
+        np.save(Path(job_dir) / f"{col}.npy", np.ascontiguousarray(a))
+    return job_dir
+
+
+def _job_arrays(job_dir: str) -> Dict[str, np.ndarray]:
+    global _worker_arrays, _worker_candles
+    arrays = _worker_jobs.get(job_dir)
+    if arrays is None:
+        arrays = {p.stem: np.load(p, mmap_mode="r") for p in Path(job_dir).glob("*.npy")}
+        _worker_jobs[job_dir] = arrays
+        while len(_worker_jobs) > _WORKER_JOB_CACHE:
+            _worker_jobs.popitem(last=False)
+    else:
+        _worker_jobs.move_to_end(job_dir)
+    if arrays is not _worker_arrays:
+        _worker_arrays, _worker_candles = arrays, None
+    return arrays
+
+
+def _run_chunk(job_dir: str, config: Dict, evaluate: Callable, tasks: List) -> List[Dict]:
+    arrays = _job_arrays(job_dir)
+    return [evaluate(arrays, config, task) for task in tasks]
+
+
+def evaluate_grid(arrays: Dict[str, np.ndarray], config: Dict, tasks: List, workers: int = None,
+                  evaluate: Callable = None) -> List[Dict]:
+    """
+    Run `evaluate(arrays, config, task)` for every task on the shared pool and
+    return the results in task order. `evaluate` must be a module-level
+    function (it is pickled by reference); the default scores a param dict
+    with evaluate_params. At most `workers` chunks of this call run at once,
+    capped at the pool size. Blocking: call it from a thread in a request
+    handler.
+    """
+    evaluate = evaluate or evaluate_params
+    if not tasks:
+        return []
+    pool = start_pool()
+    workers = clamp_workers(workers, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+
+    job_dir = _publish_arrays(arrays)
+    try:
+        results: List[Optional[List[Dict]]] = [None] * len(chunks)
+        running = {}
+        queued = iter(enumerate(chunks))
+        for k, chunk in itertools.islice(queued, workers):
+            running[pool.submit(_run_chunk, job_dir, config, evaluate, chunk)] = k
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+                for k, chunk in itertools.islice(queued, 1):
+                    running[pool.submit(_run_chunk, job_dir, config, evaluate, chunk)] = k
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed): drop the pool so the next request gets a fresh one
+        print("⚠️ Sweep pool broken, restarting it on the next request")
+        shutdown_pool()
+        raise
+    finally:
+        for future in running:
+            future.cancel()
+        shutil.rmtree(job_dir, ignore_errors=True)
+    return [r for chunk in results for r in chunk]
+
+
+def backtest_arrays(arrays: Dict[str, np.ndarray], strategy, config: Dict) -> Dict:
+    """
+    Run one backtest on candle arrays and return {"final_balance", "trades", "equity"}.
+    Uses generate_signals when the strategy has it, otherwise the bar loop.
+    """
+    global _worker_candles
+    initial_capital = config["initial_capital"]
+    fee_rate = config["fee_rate"]
+    position_size_pct = config["position_size_pct"]
+
+    strategy.on_start({})
+    raw_signals = None
+    if initial_capital > 0 and position_size_pct > 0:
+        raw_signals = strategy.generate_signals(arrays) if hasattr(strategy, "generate_signals") else None
+    if raw_signals is not None:
+        return simulate_signals(arrays, raw_signals, initial_capital, fee_rate, position_size_pct)
+
+    if arrays is _worker_arrays:
+        if _worker_candles is None:
+            _worker_candles = arrays_to_candles(arrays)
+        candles = _worker_candles
+    else:
+        candles = arrays_to_candles(arrays)
+    result = run_backtest(candles, strategy, initial_capital, fee_rate, position_size_pct)
+    return {
+        "final_balance": result["final_balance"],
+        "trades": result["trades"],
+        "equity": np.array([pt["value"] for pt in result["equity_curve"]], dtype=np.float64),
+    }
+
+
+def evaluate_params(arrays: Dict[str, np.ndarray], config: Dict, params: Dict) -> Dict:
+    """Score one param combo over the whole series."""
+    strategy = STRATEGY_REGISTRY[config["strategy"]](StrategyParams(**params))
+    try:
+        result = backtest_arrays(arrays, strategy, config)
+    except Exception as e:
+        return {"params": params, "error": str(e)}
+    metrics = summarize(
+        result["equity"], arrays["time"], result["trades"],
+        config["initial_capital"], result["final_balance"], config.get("interval"),
+    )
+    return {"params": params, **metrics}
+
+
+def rank_results(results: List[Dict], metric: str) -> List[Dict]:
+    """Results sorted best first by `metric` (results missing it go last)."""
+    higher_is_better = SWEEP_METRICS[metric]
+    missing = float("-inf") if higher_is_better else float("inf")
+    return sorted(
+        results,
+        key=lambda r: r[metric] if r[metric] is not None else missing,
+        reverse=higher_is_better,
+    )
+
+
+def run_sweep(
+    arrays: Dict[str, np.ndarray],
+    strategy: str,
+    param_grid: List[Dict],
+    initial_capital: float,
+    fee_rate: float,
+    position_size_pct: float,
+    metric: str = "total_return",
+    workers: int = None,
+    interval: str = None,
+) -> Dict:
+    """
+    Fan a parameter grid out over the shared process pool. Blocking: call it
+    from a thread (run_in_threadpool) when used from a request handler.
+    """
+    config = {
+        "strategy": strategy,
+        "initial_capital": initial_capital,
+        "fee_rate": fee_rate,
+        "position_size_pct": position_size_pct,
+        "interval": interval,
+    }
+    start_pool()
+    workers = clamp_workers(workers, len(param_grid))
+
+    started = time.perf_counter()
+    results = evaluate_grid(arrays, config, param_grid, workers)
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if "error" not in r]
+    failed = [r for r in results if "error" in r]
+
+    return {
+        "results": rank_results(ok, metric),
+        "failed": failed,
+        "total_combos": len(param_grid),
+        "workers": workers,
+        "elapsed_sec": round(elapsed, 4),
+        "combos_per_sec": round(len(param_grid) / elapsed, 2) if elapsed > 0 else None,
+    }
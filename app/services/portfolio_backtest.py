@@ -0,0 +1,218 @@
+# app/services/portfolio_backtest.py
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.backtest_analytics import summarize
+from app.services.backtest_engine import _close_trade, _open_trade
+from app.services.candle_store import columns_to_candles
+from app.strategies.base import BUY, HOLD, SELL, effective_signals
+
+ALLOCATION_RULES = {"target_weight", "cash_fraction"}
+SIGNAL_CODES = {"BUY": BUY, "SELL": SELL}
+
+
+def align_closes(pair_arrays: Dict[str, Dict[str, np.ndarray]]):
+    """
+    Put every pair's closes on the union of their open times.
+    Returns (times, closes) with closes shaped (time, pair): a pair's last close
+    is carried forward over bars it has no candle for, NaN before its first one.
+    """
+    pairs = list(pair_arrays)
+    times = np.unique(np.concatenate([pair_arrays[p]["time"] for p in pairs]))
+    closes = np.full((len(times), len(pairs)), np.nan)
+    for j, pair in enumerate(pairs):
+        rows = np.searchsorted(times, pair_arrays[pair]["time"])
+        closes[rows, j] = pair_arrays[pair]["close"]
+
+    # Forward fill: index of the last row with a value, per column
+    last = np.where(~np.isnan(closes), np.arange(len(times))[:, None], 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    return times, closes[last, np.arange(len(pairs))]
+
+
+def strategy_signals(strategy, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """BUY / SELL / HOLD codes per candle: generate_signals, or on_bar replayed for bar-loop strategies."""
+    strategy.on_start({})
+    generate = getattr(strategy, "generate_signals", None)
+    signals = generate(arrays) if generate else None
+    if signals is not None:
+        return signals
+
+    strategy.on_start({})
+    actions = (getattr(strategy.on_bar(candle), "action", "HOLD").upper() for candle in columns_to_candles(arrays))
+    return np.fromiter((SIGNAL_CODES.get(a, HOLD) for a in actions), dtype=np.int8, count=len(arrays["time"]))
+
+
+def run_portfolio_backtest(
+    pair_arrays: Dict[str, Dict[str, np.ndarray]],
+    strategies: Dict[str, object],
+    initial_capital: float = 1000.0,
+    fee_rate: float = 0.001,
+    allocation: str = "target_weight",
+    weights: Optional[Dict[str, float]] = None,
+    position_size_pct: float = 1.0,
+    interval: str = None,
+) -> Dict:
+    """
+    Backtest many pairs against one shared cash balance on a common time index.
+
+    Each pair trades long-only on its own strategy's signals. Allocation rules:
+      - target_weight: a BUY invests weight * current portfolio equity
+        (relative weights, 1 for pairs not in `weights`), capped by the available cash
+      - cash_fraction: a BUY invests position_size_pct of the available cash
+    Within a bar, exits are filled before entries so freed cash can be reused.
+    Only bars with fills are stepped; cash and holdings are then broadcast over
+    the whole (time x pair) grid to value the portfolio. Positions still open
+    at the end are closed at each pair's last price.
+    """
+    if allocation not in ALLOCATION_RULES:
+        raise ValueError(f"Unknown allocation '{allocation}', expected one of {sorted(ALLOCATION_RULES)}")
+
+    pairs = list(pair_arrays)
+    n_pairs = len(pairs)
+    times, closes = align_closes(pair_arrays)
+    marks = np.nan_to_num(closes)          # value of a position before its pair starts trading is 0 anyway
+    T = len(times)
+
+    weight = np.full(n_pairs, 1.0 / n_pairs)
+    if weights:
+        raw = np.array([max(float(weights.get(p, 1.0)), 0.0) for p in pairs])
+        if raw.sum() > 0:
+            weight = raw / raw.sum()
+
+    # Signals on the shared index; fills are the long-only alternation per pair
+    signals = np.zeros((T, n_pairs), dtype=np.int8)
+    for j, pair in enumerate(pairs):
+        rows = np.searchsorted(times, pair_arrays[pair]["time"])
+        signals[rows, j] = strategy_signals(strategies[pair], pair_arrays[pair])
+    fill_rows, fill_cols = [], []
+    for j in range(n_pairs):
+        idx = effective_signals(signals[:, j])
+        fill_rows.append(idx)
+        fill_cols.append(np.full(len(idx), j))
+    fill_rows = np.concatenate(fill_rows)
+    fill_cols = np.concatenate(fill_cols)
+    # Sort by bar, SELL before BUY, then pair order
+    order = np.lexsort((fill_cols, signals[fill_rows, fill_cols] == BUY, fill_rows))
+    fill_rows, fill_cols = fill_rows[order], fill_cols[order]
+    event_rows = np.unique(fill_rows)
+
+    cash = initial_capital
+    qty = np.zeros(n_pairs)
+    cost = np.zeros(n_pairs)           # allocation + entry fee of the open position
+    realized = np.zeros(n_pairs)
+    fees = np.zeros(n_pairs)
+    trade_count = np.zeros(n_pairs, dtype=np.int64)
+    entry = [None] * n_pairs            # (entry_price, entry_fee) per open position
+    trades: List[Dict] = []
+
+    cash_after = np.empty(len(event_rows))
+    qty_after = np.empty((len(event_rows), n_pairs))
+    cost_after = np.empty((len(event_rows), n_pairs))
+    realized_after = np.empty((len(event_rows), n_pairs))
+
+    def close_position(j: int, price: float, current_time: int):
+        nonlocal cash
+        entry_price, entry_fee = entry[j]
+        cash, trade = _close_trade(cash, qty[j], entry_price, entry_fee, price, current_time, fee_rate)
+        trade["pair"] = pairs[j]
+        trades.append(trade)
+        realized[j] += trade["pnl"]
+        fees[j] += trade["fee"]
+        trade_count[j] += 1
+        qty[j] = cost[j] = 0.0
+        entry[j] = None
+
+    k = 0
+    for e, row in enumerate(event_rows.tolist()):
+        current_time = int(times[row])
+        row_marks = marks[row]
+        while k < len(fill_rows) and fill_rows[k] == row:
+            j = int(fill_cols[k])
+            k += 1
+            price = float(closes[row, j])
+            if signals[row, j] == SELL:
+                # No position if the matching BUY found no cash
+                if qty[j] > 0:
+                    close_position(j, price, current_time)
+                continue
+            if allocation == "target_weight":
+                equity_now = cash + float(qty @ row_marks)
+                budget = min(weight[j] * equity_now, cash / (1 + fee_rate))
+            else:
+                budget = cash * position_size_pct
+            if budget <= 0 or cash <= 0:
+                continue
+            cash, qty[j], entry_fee, trade = _open_trade(cash, price, current_time, fee_rate, budget / cash)
+            trade["pair"] = pairs[j]
+            trades.append(trade)
+            entry[j] = (price, entry_fee)
+            cost[j] = budget + entry_fee
+            fees[j] += entry_fee
+        cash_after[e] = cash
+        qty_after[e] = qty
+        cost_after[e] = cost
+        realized_after[e] = realized
+
+    # Broadcast state to every bar: segment e covers bars from event e up to event e+1
+    cash_bar = np.full(T, initial_capital)
+    qty_bar = np.zeros((T, n_pairs))
+    cost_bar = np.zeros((T, n_pairs))
+    realized_bar = np.zeros((T, n_pairs))
+    if len(event_rows):
+        segment = np.searchsorted(event_rows, np.arange(T), side="right") - 1
+        held = segment >= 0
+        cash_bar[held] = cash_after[segment[held]]
+        qty_bar[held] = qty_after[segment[held]]
+        cost_bar[held] = cost_after[segment[held]]
+        realized_bar[held] = realized_after[segment[held]]
+    position_value = qty_bar * marks
+    equity = cash_bar + position_value.sum(axis=1)
+    pair_pnl = realized_bar + position_value - cost_bar      # cumulative PnL per pair, marked to market
+
+    # Close whatever is still open at the last bar
+    for j in np.flatnonzero(qty > 0).tolist():
+        close_position(j, float(closes[-1, j]), int(times[-1]))
+    final_balance = cash
+    total_pnl = final_balance - initial_capital
+
+    attribution = []
+    for j, pair in enumerate(pairs):
+        attribution.append({
+            "pair": pair,
+            "weight": round(float(weight[j]), 4),
+            "trades": int(trade_count[j]),
+            "pnl": round(float(realized[j]), 4),
+            "fees": round(float(fees[j]), 4),
+            "contribution_pct": round(float(realized[j] / total_pnl * 100), 2) if total_pnl else 0.0,
+            "exposure_pct": round(float((qty_bar[:, j] > 0).mean() * 100), 2) if T else 0.0,
+        })
+
+    metrics = summarize(equity, times, trades, initial_capital, final_balance, interval)
+    # Share of bars with any position open (the per-trade figure would add up across pairs)
+    metrics["exposure_pct"] = round(float((qty_bar > 0).any(axis=1).mean() * 100), 2) if T else 0.0
+
+    return {
+        "pairs": pairs,
+        "final_balance": final_balance,
+        "metrics": metrics,
+        "attribution": attribution,
+        "correlation": {
+            "pnl": _correlation(np.diff(pair_pnl, axis=0)),
+            "returns": _correlation(np.diff(np.log(closes), axis=0)),
+        },
+        "equity_curve": [{"time": t, "value": v} for t, v in zip(times.tolist(), equity.tolist())],
+        "trades": trades,
+    }
+
+
+def _correlation(changes: np.ndarray) -> List[List[Optional[float]]]:
+    """Pairwise correlation of per-bar changes (time x pair); None where undefined."""
+    if changes.shape[0] < 2:
+        return [[None] * changes.shape[1] for _ in range(changes.shape[1])]
+    changes = np.nan_to_num(changes, nan=0.0, posinf=0.0, neginf=0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.corrcoef(changes, rowvar=False)
+    corr = np.atleast_2d(corr)
+    return [[round(float(c), 4) if np.isfinite(c) else None for c in row] for row in corr]
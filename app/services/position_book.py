@@ -0,0 +1,132 @@
+# app/services/position_book.py
+from typing import Dict, Iterable, Optional
+
+
+class Position:
+    """
+    One symbol's long position: quantity at a volume-weighted average entry,
+    plus the realized PnL (price PnL of closed quantity) and fees paid so far.
+    """
+
+    __slots__ = ("symbol", "qty", "avg_entry", "realized_pnl", "fees", "last_price")
+
+    def __init__(self, symbol: str, qty: float = 0.0, avg_entry: float = 0.0,
+                 realized_pnl: float = 0.0, fees: float = 0.0, last_price: Optional[float] = None):
+        self.symbol = symbol
+        self.qty = qty
+        self.avg_entry = avg_entry
+        self.realized_pnl = realized_pnl
+        self.fees = fees
+        self.last_price = last_price
+
+    @property
+    def is_open(self) -> bool:
+        return self.qty > 0
+
+    @property
+    def cost_basis(self) -> float:
+        return self.qty * self.avg_entry
+
+    def mark_price(self, price: Optional[float] = None) -> float:
+        if price is not None:
+            return price
+        return self.last_price if self.last_price is not None else self.avg_entry
+
+    def unrealized_pnl(self, price: Optional[float] = None) -> float:
+        return (self.mark_price(price) - self.avg_entry) * self.qty
+
+    def to_doc(self) -> dict:
+        """Fields persisted to the positions collection."""
+        return {
+            "qty": self.qty,
+            "entry_price": self.avg_entry,
+            "current_price": self.last_price,
+            "side": "BUY",
+            "is_closed": not self.is_open,
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.unrealized_pnl(),
+            "fees": self.fees,
+        }
+
+
+class PositionBook:
+    """
+    In-memory positions of one wallet, loaded once and updated per fill so
+    neither trading nor valuation reads the database.
+    """
+
+    def __init__(self):
+        self.positions: Dict[str, Position] = {}
+
+    @classmethod
+    def from_docs(cls, docs: Iterable[dict]) -> "PositionBook":
+        """Rebuild from positions collection documents."""
+        book = cls()
+        for doc in docs:
+            symbol = doc.get("symbol")
+            if not symbol:
+                continue
+            qty = float(doc.get("qty") or 0.0) if not doc.get("is_closed") else 0.0
+            book.positions[symbol] = Position(
+                symbol,
+                qty=qty,
+                avg_entry=float(doc.get("entry_price") or 0.0),
+                realized_pnl=float(doc.get("realized_pnl") or 0.0),
+                fees=float(doc.get("fees") or 0.0),
+                last_price=doc.get("current_price"),
+            )
+        return book
+
+    def get(self, symbol: str) -> Optional[Position]:
+        return self.positions.get(symbol)
+
+    def qty(self, symbol: str) -> float:
+        position = self.positions.get(symbol)
+        return position.qty if position else 0.0
+
+    def apply_buy(self, symbol: str, price: float, qty: float, fee: float = 0.0) -> Position:
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = Position(symbol)
+        total = position.qty + qty
+        if total > 0:
+            position.avg_entry = (position.qty * position.avg_entry + qty * price) / total
+        position.qty = total
+        position.fees += fee
+        position.last_price = price
+        return position
+
+    def apply_sell(self, symbol: str, price: float, qty: float, fee: float = 0.0) -> float:
+        """Reduce a position; returns the realized PnL of this fill. Caller checks qty is held."""
+        position = self.positions[symbol]
+        realized = (price - position.avg_entry) * qty
+        position.qty -= qty
+        if position.qty <= 1e-12:
+            position.qty = 0.0
+        position.realized_pnl += realized
+        position.fees += fee
+        position.last_price = price
+        return realized
+
+    def mark(self, prices: Dict[str, float]):
+        """Record latest prices for unrealized PnL."""
+        for symbol, price in prices.items():
+            position = self.positions.get(symbol)
+            if position is not None and price is not None:
+                position.last_price = price
+
+    def market_value(self, prices: Optional[Dict[str, float]] = None) -> float:
+        prices = prices or {}
+        return sum(p.qty * p.mark_price(prices.get(s)) for s, p in self.positions.items() if p.is_open)
+
+    def summary(self, prices: Optional[Dict[str, float]] = None) -> dict:
+        prices = prices or {}
+        realized = sum(p.realized_pnl for p in self.positions.values())
+        fees = sum(p.fees for p in self.positions.values())
+        return {
+            "market_value": self.market_value(prices),
+            "unrealized_pnl": sum(p.unrealized_pnl(prices.get(s)) for s, p in self.positions.items() if p.is_open),
+            "realized_pnl": realized,
+            "fees": fees,
+            "net_realized_pnl": realized - fees,
+        }
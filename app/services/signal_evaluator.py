@@ -0,0 +1,90 @@
+# app/services/signal_evaluator.py
+from typing import Dict, Optional, Tuple
+
+from app.schemas.backtest import StrategyParams
+from app.services.backtest_cache import cache_key
+from app.strategies import STRATEGY_REGISTRY
+
+EvaluatorKey = Tuple[str, str, str, str]
+
+
+class SharedStrategy:
+    """One strategy instance and the last signal it produced, shared by every matching session."""
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.sessions = 0
+        self.last_time = None
+        self.last_signal: Optional[str] = None
+        self.evaluations = 0
+        self.reuses = 0
+
+
+class SignalEvaluator:
+    """
+    Live strategy evaluation shared across paper trading sessions.
+
+    Sessions running the same strategy with the same params on the same
+    pair/timeframe share one strategy instance, keyed by
+    (strategy name, canonical params, pair, timeframe). Each closed candle is
+    run through on_bar once; every other session asking about the same candle
+    gets the cached signal and trades it on its own wallet.
+
+    A session joining a running instance inherits its warmed-up indicator
+    state instead of starting cold.
+    """
+
+    def __init__(self):
+        self.entries: Dict[EvaluatorKey, SharedStrategy] = {}
+
+    @staticmethod
+    def canonical_params(params) -> StrategyParams:
+        if isinstance(params, StrategyParams):
+            return params
+        return StrategyParams(**(params or {}))
+
+    def key(self, strategy_name: str, params, pair: str, timeframe: str) -> EvaluatorKey:
+        params = self.canonical_params(params)
+        return strategy_name, cache_key(params.model_dump()), pair, timeframe
+
+    def acquire(self, strategy_name: str, params, pair: str, timeframe: str) -> EvaluatorKey:
+        """Join (or create) the shared instance for a session; pair with release()."""
+        key = self.key(strategy_name, params, pair, timeframe)
+        entry = self.entries.get(key)
+        if entry is None:
+            strategy = STRATEGY_REGISTRY[strategy_name](self.canonical_params(params))
+            entry = self.entries[key] = SharedStrategy(strategy)
+            print(f"🧠 Shared evaluator created: {strategy_name} {pair} {timeframe}")
+        entry.sessions += 1
+        return key
+
+    def release(self, key: EvaluatorKey):
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry.sessions -= 1
+        if entry.sessions <= 0:
+            del self.entries[key]
+
+    def evaluate(self, key: EvaluatorKey, candle: dict) -> str:
+        """Signal action for a closed candle, computed once per candle time."""
+        entry = self.entries[key]
+        if entry.last_time is not None and candle.get("time") == entry.last_time:
+            entry.reuses += 1
+            return entry.last_signal
+        signal_obj = entry.strategy.on_bar(candle)
+        entry.last_time = candle.get("time")
+        entry.last_signal = getattr(signal_obj, "action", "")
+        entry.evaluations += 1
+        return entry.last_signal
+
+    def metrics(self) -> dict:
+        return {
+            "instances": len(self.entries),
+            "sessions": sum(e.sessions for e in self.entries.values()),
+            "evaluations": sum(e.evaluations for e in self.entries.values()),
+            "reuses": sum(e.reuses for e in self.entries.values()),
+        }
+
+
+signal_evaluator = SignalEvaluator()
@@ -1,29 +1,16 @@
-import aiohttp
+from app.services.market_metadata import market_metadata
+
+
 class SymbolService:
-    def __init__(self):
-        self.symbol_cache = {}
-    
+    """Symbol -> pair lookups, served from the shared market metadata indexes."""
+
+    def __init__(self, metadata=market_metadata):
+        self.metadata = metadata
+
     async def get_pair_for_symbol(self, symbol: str) -> str:
-        """Get pair from symbol using CoinDCX API"""
-        if symbol in self.symbol_cache:
-            return self.symbol_cache[symbol]
-        
+        """Get pair from symbol using CoinDCX market details"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # CoinDCX markets API
-                url = "https://api.coindcx.com/exchange/v1/markets_details"
-                async with session.get(url) as response:
-                    markets = await response.json()
-                    
-                    # Find the pair for this symbol
-                    for market in markets:
-                        if market.get('symbol') == symbol and market.get('status') == 'active':
-                            pair = market['pair']
-                            self.symbol_cache[symbol] = pair
-                            return pair
-                    
-                    raise ValueError(f"Symbol {symbol} not found in active markets")
-                    
+            return await self.metadata.get_pair(symbol)
         except Exception as e:
             print(f"Error fetching pair for {symbol}: {e}")
-            raise
\ No newline at end of file
+            raise
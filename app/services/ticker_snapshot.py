@@ -0,0 +1,206 @@
+# app/services/ticker_snapshot.py
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+
+from app.coindxc_sockets.current_prices import CHANNEL as PRICES_CHANNEL, EVENT as PRICES_EVENT
+from app.core.config import settings
+from app.services.market_data_hub import market_data_hub
+
+TICKER_URL = "https://api.coindcx.com/exchange/ticker"
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TickerSnapshotService:
+    """
+    Latest price per market, kept in a dict for O(1) lookups.
+
+    The full /exchange/ticker list is re-downloaded every `interval` seconds
+    on a persistent session; with `use_stream`, currentPrices@spot updates
+    from the market data hub are applied in between. Every quote carries
+    the time it was last updated, and lookups report it as stale once that
+    is more than `stale_after` seconds ago.
+    """
+
+    def __init__(self, interval: float, stale_after: float, use_stream: bool = False,
+                 hub=market_data_hub, timeout: float = 10):
+        self.interval = interval
+        self.stale_after = stale_after
+        self.use_stream = use_stream
+        self.hub = hub
+        self.timeout = timeout
+        self.quotes: Dict[str, dict] = {}       # market -> {price, bid, ask, updated_at}
+        self.refreshed_at: Optional[float] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self.subscription = None
+
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.stream_updates = 0
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def apply_ticker(self, rows: List[dict], at: Optional[float] = None):
+        """Index a full /exchange/ticker response."""
+        at = at or time.time()
+        for row in rows:
+            market = row.get("market")
+            price = _to_float(row.get("last_price")) or _to_float(row.get("ask"))
+            if not market or price is None:
+                continue
+            self.quotes[market] = {
+                "price": price,
+                "bid": _to_float(row.get("bid")),
+                "ask": _to_float(row.get("ask")),
+                "updated_at": at,
+            }
+        self.refreshed_at = at
+
+    async def on_prices(self, parsed: dict):
+        """currentPrices@spot update: {"prices": {market: price}}."""
+        at = time.time()
+        for market, value in (parsed.get("prices") or {}).items():
+            price = _to_float(value)
+            if price is None:
+                continue
+            quote = self.quotes.get(market)
+            if quote is None:
+                self.quotes[market] = {"price": price, "bid": None, "ask": None, "updated_at": at}
+            else:
+                quote["price"] = price
+                quote["updated_at"] = at
+        self.stream_updates += 1
+
+    # -------------------------
+    # Network
+    # -------------------------
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def _fetch(self) -> List[dict]:
+        session = await self._get_session()
+        async with session.get(TICKER_URL) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def _do_refresh(self):
+        try:
+            rows = await self._fetch()
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"⚠️ Ticker refresh failed: {e}")
+            raise
+        self.apply_ticker(rows)
+        self.refreshes += 1
+
+    async def refresh(self):
+        """Download the full ticker; concurrent callers share one request."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+            self._inflight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        await asyncio.shield(self._inflight)
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def is_stale(self, quote: Optional[dict], now: Optional[float] = None) -> bool:
+        if quote is None:
+            return True
+        return (now or time.time()) - quote["updated_at"] > self.stale_after
+
+    def get(self, market: str) -> Optional[dict]:
+        """{price, bid, ask, updated_at, age, stale} for one market, or None if unknown."""
+        quote = self.quotes.get(market)
+        if quote is None:
+            return None
+        now = time.time()
+        return {**quote, "age": now - quote["updated_at"], "stale": self.is_stale(quote, now)}
+
+    def get_many(self, markets: Iterable[str]) -> Dict[str, Optional[dict]]:
+        now = time.time()
+        out = {}
+        for market in markets:
+            quote = self.quotes.get(market)
+            out[market] = None if quote is None else {
+                **quote, "age": now - quote["updated_at"], "stale": self.is_stale(quote, now)
+            }
+        return out
+
+    def prices(self, markets: Iterable[str]) -> Dict[str, float]:
+        """market -> price for the markets that have a quote (e.g. for PositionBook valuation)."""
+        return {m: self.quotes[m]["price"] for m in markets if m in self.quotes}
+
+    async def get_price(self, market: str, max_age: Optional[float] = None) -> float:
+        """Price of one market, refreshing first if its quote is missing or older than max_age."""
+        max_age = self.stale_after if max_age is None else max_age
+        quote = self.quotes.get(market)
+        if quote is None or time.time() - quote["updated_at"] > max_age:
+            await self.refresh()
+            quote = self.quotes.get(market)
+        if quote is None:
+            raise ValueError(f"No data found for symbol {market}")
+        return quote["price"]
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    async def _run(self):
+        if self.use_stream:
+            try:
+                self.subscription = await self.hub.subscribe(PRICES_CHANNEL, PRICES_EVENT, self.on_prices)
+            except Exception as e:
+                print(f"⚠️ Ticker stream unavailable, polling only: {e}")
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.subscription is not None:
+            subscription, self.subscription = self.subscription, None
+            await self.hub.unsubscribe(subscription)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def metrics(self) -> dict:
+        return {
+            "markets": len(self.quotes),
+            "age_seconds": time.time() - self.refreshed_at if self.refreshed_at else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "stream_updates": self.stream_updates,
+        }
+
+
+ticker_snapshot = TickerSnapshotService(
+    settings.TICKER_REFRESH_INTERVAL, settings.TICKER_STALE_AFTER, use_stream=settings.TICKER_USE_STREAM
+)
@@ -0,0 +1,33 @@
+# app/services/trade_export.py
+import csv
+import io
+import json
+from typing import AsyncIterator, List
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CSV_COLUMNS = ["_id", "created_at", "symbol", "side", "price", "qty", "fee", "realized_pnl", "timestamp", "mode"]
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """One NDJSON chunk per batch of trades."""
+    async for batch in batches:
+        yield "".join(json.dumps(trade) + "\n" for trade in batch).encode()
+
+
+async def csv_chunks(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """Header, then one CSV chunk per batch of trades (missing fields left empty)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+
+
+def export_chunks(fmt: str, batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    if fmt == "csv":
+        return csv_chunks(batches)
+    return ndjson_chunks(batches)
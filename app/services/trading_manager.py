@@ -3,10 +3,15 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 import asyncio
 from typing import Optional, Dict, Any
+from app.core.fanout import fanout
+from app.core.outbox import OutboxGroup, coalesce_key
+from app.services.signal_evaluator import signal_evaluator
 
 class TradingManager:
     def __init__(self):
         self.ws_connections = {}
+        # One bounded send queue per user socket; overflow drops the connection
+        self.outboxes = OutboxGroup(on_close=lambda user_id: self.ws_connections.pop(user_id, None))
         self.trading_tasks = {}
         self.trading_state = defaultdict(lambda: {'price': None, 'candle': None, 'last_update': datetime.utcnow()})
         self.trading_sessions = {}
@@ -18,6 +23,7 @@ class TradingManager:
     async def add_websocket_connection(self, user_id: str, websocket):
         """Add WebSocket connection and handle reconnection"""
         self.ws_connections[user_id] = websocket
+        self.outboxes.open(user_id, websocket)
         print(f"🔗 WebSocket connected for user {user_id}")
         
         # Send immediate status update
@@ -28,7 +34,7 @@ class TradingManager:
         """Send current trading status to WebSocket"""
         try:
             current_state = self.get_trading_state(user_id)
-            await websocket.send_json({
+            self._queue(user_id, {
                 "type": "connection_established",
                 "message": "Connected to running trading session",
                 # "has_price": current_state.get('price') is not None,
@@ -43,16 +49,26 @@ class TradingManager:
         """Get WebSocket connection if it exists and is connected"""
         return self.ws_connections.get(user_id)
     
+    def remove_websocket_connection(self, user_id: str, websocket):
+        """Forget a closed socket, unless the user has already reconnected on another one"""
+        if self.ws_connections.get(user_id) is websocket:
+            self.ws_connections.pop(user_id, None)
+            self.outboxes.close(user_id, close_socket=False)
+
+    def _queue(self, user_id: str, message: dict):
+        outbox = self.outboxes.get(user_id)
+        if outbox is not None:
+            outbox.put(fanout.encode(message), message.get("type"), coalesce_key(message))
+
     async def send_websocket_message(self, user_id: str, message: dict):
-        """Safely send message to WebSocket"""
-        websocket = self.get_websocket(user_id)
-        if websocket:
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                print(f"WebSocket send error for user {user_id}: {e}")
-                # Remove disconnected WebSocket
-                self.ws_connections.pop(user_id, None)
+        """Queue a message on the user's socket; the outbox writer does the actual send"""
+        try:
+            self._queue(user_id, message)
+        except Exception as e:
+            print(f"WebSocket send error for user {user_id}: {e}")
+
+    def outbox_metrics(self) -> dict:
+        return self.outboxes.metrics()
     
     async def start_trading(self, user_id: str, tasks_data: dict):
         """Start trading tasks for user"""
@@ -89,6 +105,8 @@ class TradingManager:
             except asyncio.CancelledError:
                 pass
             
+            if tasks.get('strategy_key'):
+                signal_evaluator.release(tasks['strategy_key'])
             del self.trading_tasks[user_id]
         
         if user_id in self.trading_sessions:
@@ -5,8 +5,9 @@ from app.utils.safe_float import safe_float
 from app.coindxc_sockets.candlesticks import CandleStick
 from app.services.paper_wallet import PaperWallet
 from app.services.symbol_service import SymbolService
-from app.strategies import STRATEGY_REGISTRY
-from app.core.database import wallets
+from app.services.signal_evaluator import signal_evaluator
+from app.core import repository
+from app.services.write_behind import write_behind
 import asyncio
 
 class TradingService:
@@ -35,7 +36,7 @@ class TradingService:
             "timestamp": candle_timestamp
         }
 
-    async def trading_callback(self, candle=None, wallet=None, strategy=None, qty=None, symbol=None, user_id=None):
+    async def trading_callback(self, candle=None, wallet=None, strategy_key=None, qty=None, symbol=None, user_id=None):
         if not user_id:
             return
 
@@ -43,7 +44,6 @@ class TradingService:
             processed_candle = self.safe_process_candle(candle)
             if processed_candle:
                 trading_manager.update_trading_state(user_id, candle=processed_candle)
-                print(f"📊 Candle update: {symbol} -> {processed_candle}")
 
                 candle_timestamp = processed_candle.get('timestamp')
                 candle_data = {k: v for k, v in processed_candle.items() if k != 'timestamp'}
@@ -52,6 +52,7 @@ class TradingService:
                     "type": "candle_update",
                     "symbol": symbol,
                     "candle": candle_data,
+                    "is_complete": bool(candle.get("is_complete")),
                     "timestamp": candle_timestamp
                 })
             else:
@@ -63,8 +64,8 @@ class TradingService:
                 return
 
             try:
-                signal_obj = strategy.on_bar(current_state['candle'])
-                signal = getattr(signal_obj, 'action', '')
+                # Computed once per closed candle for all sessions sharing this strategy
+                signal = signal_evaluator.evaluate(strategy_key, current_state['candle'])
                 current_price = current_state['candle']['close']
 
                 print(f">>> Trading: Signal={signal}, Price={current_price}")
@@ -156,7 +157,9 @@ class TradingService:
         if trading_manager.is_trading_active(user_id):
             return {"status": "error", "msg": "Trading already running"}
 
-        wallet_doc = await wallets.find_one({"user_id": user_id})
+        # Make sure queued writes from a previous session are in the DB first
+        await write_behind.flush()
+        wallet_doc = await repository.get_balances(user_id)
         if not wallet_doc:
             return {"status": "error", "msg": "Wallet not found for user"}
 
@@ -170,8 +173,8 @@ class TradingService:
             return {"status": "error", "msg": f"Failed to get pair for symbol: {e}"}
 
         wallet = PaperWallet(user_id=user_id, initial_cash=available_balance)
-        strategy_cls = STRATEGY_REGISTRY[strategy_name]
-        strategy = strategy_cls(strategy_params)
+        await wallet.load_positions()
+        strategy_key = signal_evaluator.acquire(strategy_name, strategy_params, pair, timeframe)
 
         trading_manager.update_trading_state(user_id)
 
@@ -179,15 +182,17 @@ class TradingService:
 
         print(f"🚀 Starting paper trading for {symbol} (pair: {pair}) with available balance: {available_balance}")
 
+        # Runs on this feed's own hub delivery task: a slow session only delays
+        # its own candles, and its trades are processed one at a time, in order
         candle_feed.register_callback(
-            lambda candle: asyncio.create_task(self.trading_callback(
+            lambda candle: self.trading_callback(
                 candle=candle,
                 wallet=wallet,
-                strategy=strategy,
+                strategy_key=strategy_key,
                 qty=qty,
                 symbol=symbol,
                 user_id=user_id
-            ))
+            )
         )
 
         candle_task = asyncio.create_task(candle_feed.start())
@@ -195,7 +200,7 @@ class TradingService:
         await trading_manager.start_trading(user_id, {
             'candle_task': candle_task,
             'wallet': wallet,
-            'strategy': strategy,
+            'strategy_key': strategy_key,
             'symbol': symbol,
             'strategy_name': strategy_name,
             'timeframe': timeframe
@@ -0,0 +1,174 @@
+# app/services/walk_forward.py
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.schemas.backtest import StrategyParams
+from app.services.backtest_analytics import summarize
+from app.services.backtest_engine import simulate_signals
+from app.services.parameter_sweep import SWEEP_METRICS, backtest_arrays, clamp_workers, evaluate_grid
+from app.strategies import STRATEGY_REGISTRY
+
+Fold = Tuple[int, int, int, int]   # in-sample [start, end), out-of-sample [start, end) bar indices
+
+
+def build_folds(n: int, in_sample: int, out_of_sample: int, step: int = None, anchored: bool = False) -> List[Fold]:
+    """
+    Split n bars into walk-forward folds. Each out-of-sample window directly
+    follows its in-sample window; windows advance by `step` bars (default:
+    the out-of-sample length, so OOS windows tile the series). Anchored folds
+    keep the in-sample start at bar 0 and grow, rolling folds slide.
+    """
+    step = step or out_of_sample
+    folds = []
+    is_end = in_sample
+    while is_end + out_of_sample <= n:
+        is_start = 0 if anchored else is_end - in_sample
+        folds.append((is_start, is_end, is_end, is_end + out_of_sample))
+        is_end += step
+    return folds
+
+
+def slice_arrays(arrays: Dict[str, np.ndarray], start: int, end: int) -> Dict[str, np.ndarray]:
+    """Views (no copy) of every column over bars [start, end)."""
+    return {col: a[start:end] for col, a in arrays.items()}
+
+
+def evaluate_window(arrays: Dict[str, np.ndarray], config: Dict, task: Tuple[int, int, int, Dict]) -> Dict:
+    """evaluate_grid task: score one param combo on one in-sample window."""
+    fold, start, end, params = task
+    window = slice_arrays(arrays, start, end)
+    strategy = STRATEGY_REGISTRY[config["strategy"]](StrategyParams(**params))
+    try:
+        result = backtest_arrays(window, strategy, config)
+    except Exception as e:
+        return {"fold": fold, "params": params, "error": str(e)}
+    metrics = summarize(
+        result["equity"], window["time"], result["trades"],
+        config["initial_capital"], result["final_balance"], config.get("interval"),
+    )
+    return {"fold": fold, "params": params, **metrics}
+
+
+def run_out_of_sample(arrays: Dict[str, np.ndarray], strategy, fold: Fold, capital: float, config: Dict) -> Dict:
+    """
+    Trade the out-of-sample window of a fold starting from `capital`. Vectorized
+    strategies see the in-sample bars as indicator warm-up but only act from the
+    first OOS bar; bar-loop strategies start cold on the OOS window.
+    """
+    is_start, _, oos_start, oos_end = fold
+    oos = slice_arrays(arrays, oos_start, oos_end)
+    run_config = {**config, "initial_capital": capital}
+
+    strategy.on_start({})
+    raw_signals = None
+    if capital > 0 and config["position_size_pct"] > 0:
+        raw_signals = strategy.generate_signals(slice_arrays(arrays, is_start, oos_end))
+    if raw_signals is None:
+        return backtest_arrays(oos, strategy, run_config)
+
+    return simulate_signals(
+        oos, raw_signals[oos_start - is_start:], capital, config["fee_rate"], config["position_size_pct"]
+    )
+
+
+def _pick_best(results: List[Dict], metric: str) -> Dict:
+    higher_is_better = SWEEP_METRICS[metric]
+    missing = float("-inf") if higher_is_better else float("inf")
+    key = lambda r: r[metric] if r[metric] is not None else missing
+    return max(results, key=key) if higher_is_better else min(results, key=key)
+
+
+def run_walk_forward(
+    arrays: Dict[str, np.ndarray],
+    strategy: str,
+    param_grid: List[Dict],
+    folds: List[Fold],
+    initial_capital: float,
+    fee_rate: float,
+    position_size_pct: float,
+    metric: str = "total_return",
+    workers: int = None,
+    interval: str = None,
+) -> Dict:
+    """
+    Optimize on every in-sample window (all folds x all params in one
+    evaluate_grid call on the shared sweep pool), then trade each fold's
+    winner on its out-of-sample window. OOS windows are chained: each starts
+    with the previous window's final balance, giving one stitched OOS equity
+    curve. Blocking: call it from a thread when used from a request handler.
+    """
+    config = {
+        "strategy": strategy,
+        "initial_capital": initial_capital,
+        "fee_rate": fee_rate,
+        "position_size_pct": position_size_pct,
+        "interval": interval,
+    }
+    tasks = [(k, fold[0], fold[1], params) for k, fold in enumerate(folds) for params in param_grid]
+    workers = clamp_workers(workers, len(tasks))
+
+    started = time.perf_counter()
+    results = evaluate_grid(arrays, config, tasks, workers, evaluate=evaluate_window)
+    optimize_sec = time.perf_counter() - started
+
+    by_fold: Dict[int, List[Dict]] = {}
+    failed = []
+    for r in results:
+        if "error" in r:
+            failed.append(r)
+        else:
+            by_fold.setdefault(r["fold"], []).append(r)
+
+    times = arrays["time"]
+    capital = initial_capital
+    fold_reports, equity_parts, time_parts, oos_trades = [], [], [], []
+    for k, fold in enumerate(folds):
+        if k not in by_fold:
+            continue
+        best = _pick_best(by_fold[k], metric)
+        best_params = best["params"]
+        strategy_obj = STRATEGY_REGISTRY[strategy](StrategyParams(**best_params))
+        start_capital = capital
+        oos = run_out_of_sample(arrays, strategy_obj, fold, capital, config)
+        capital = oos["final_balance"]
+
+        oos_times = times[fold[2]:fold[3]]
+        equity_parts.append(oos["equity"])
+        time_parts.append(oos_times)
+        oos_trades.extend(oos["trades"])
+
+        in_sample_metrics = {key: value for key, value in best.items() if key not in ("fold", "params")}
+        fold_reports.append({
+            "fold": k,
+            "in_sample": {"start": int(times[fold[0]]), "end": int(times[fold[1] - 1]), "bars": fold[1] - fold[0]},
+            "out_of_sample": {"start": int(oos_times[0]), "end": int(oos_times[-1]), "bars": fold[3] - fold[2]},
+            "best_params": best_params,
+            "in_sample_metrics": in_sample_metrics,
+            "out_of_sample_metrics": summarize(
+                oos["equity"], oos_times, oos["trades"], start_capital, capital, interval
+            ),
+        })
+    elapsed = time.perf_counter() - started
+
+    if equity_parts:
+        equity = np.concatenate(equity_parts)
+        stitched_times = np.concatenate(time_parts)
+    else:
+        equity = np.empty(0)
+        stitched_times = np.empty(0, dtype=np.int64)
+
+    return {
+        "folds": fold_reports,
+        "failed": failed,
+        "out_of_sample": summarize(equity, stitched_times, oos_trades, initial_capital, capital, interval),
+        "equity_curve": [
+            {"time": t, "value": v} for t, v in zip(stitched_times.tolist(), equity.tolist())
+        ],
+        "trades": oos_trades,
+        "evaluations": len(tasks),
+        "workers": workers,
+        "optimize_sec": round(optimize_sec, 4),
+        "elapsed_sec": round(elapsed, 4),
+    }
@@ -0,0 +1,344 @@
+# app/services/write_behind.py
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+
+DUPLICATE_KEY = 11000
+
+
+class WriteBehindWriter:
+    """
+    Queues Mongo writes and flushes them in batches (insert_many / bulk_write)
+    when the queue reaches `batch_size` or every `flush_interval` seconds.
+
+    - Inserts get a client-side _id, so a retried batch is idempotent.
+    - $set updates on the same (collection, filter) are coalesced: only the
+      merged latest fields are written.
+    - At most `max_pending` operations are buffered, failed ones included;
+      callers wait (backpressure) until a flush makes room, but no longer than
+      `enqueue_timeout` seconds. A write that times out goes to the dead-letter
+      list instead of blocking the trade path.
+    - A failed write is retried with exponential backoff, at most
+      `max_retries` times, then moved to the dead-letter list.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.5, max_pending: int = 10000,
+                 max_retries: int = 8, max_retry_delay: float = 30.0, enqueue_timeout: float = 1.0,
+                 dead_letter_max: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.max_retry_delay = max_retry_delay
+        self.enqueue_timeout = enqueue_timeout
+
+        self.collections: Dict[str, object] = {}
+        self.inserts: Dict[str, List[dict]] = {}
+        self.updates: "OrderedDict[Tuple[str, tuple], dict]" = OrderedDict()
+        self.insert_attempts: Dict[ObjectId, int] = {}   # failed attempts per queued insert _id
+        self.oldest_pending: Optional[float] = None
+        self.in_flight = 0          # ops taken by the running flush
+        self.dead_letters: Deque[dict] = deque(maxlen=dead_letter_max)
+        self.failed_flushes = 0     # consecutive flushes with a failed batch
+        self.retry_at = 0.0         # monotonic time before which the flusher backs off
+
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._flush_lock = asyncio.Lock()
+
+        self.stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushed": 0,
+            "batches": 0,
+            "failures": 0,
+            "retries": 0,
+            "dead_lettered": 0,
+            "backpressure_waits": 0,
+            "backpressure_timeouts": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_lag_ms": 0.0,
+        }
+
+    @property
+    def queued(self) -> int:
+        return sum(len(docs) for docs in self.inserts.values()) + len(self.updates)
+
+    @property
+    def pending(self) -> int:
+        """Queued ops plus the ones a running flush is writing."""
+        return self.queued + self.in_flight
+
+    # -------------------------
+    # Enqueue
+    # -------------------------
+    async def _reserve(self) -> bool:
+        """Wait for room in the queue; False once `enqueue_timeout` has passed without any."""
+        deadline = time.monotonic() + self.enqueue_timeout
+        while self.pending >= self.max_pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats["backpressure_timeouts"] += 1
+                return False
+            self.stats["backpressure_waits"] += 1
+            self._space.clear()
+            self._wake.set()
+            try:
+                await asyncio.wait_for(self._space.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        return True
+
+    def _enqueued(self):
+        self.start()
+        self.stats["enqueued"] += 1
+        if self.oldest_pending is None:
+            self.oldest_pending = time.monotonic()
+        if self.queued >= self.batch_size:
+            self._wake.set()
+
+    def _dead_letter(self, name: str, kind: str, payload: dict, reason: str, attempts: int = 0):
+        self.dead_letters.append({
+            "collection": name,
+            "kind": kind,
+            "payload": payload,
+            "reason": reason,
+            "attempts": attempts,
+            "at": time.time(),
+        })
+        self.stats["dead_lettered"] += 1
+
+    async def insert(self, collection, doc: dict) -> bool:
+        """Queue an insert; False if it was dead-lettered because the queue stayed full."""
+        doc.setdefault("_id", ObjectId())
+        if not await self._reserve():
+            self._dead_letter(collection.name, "insert", doc, "queue full")
+            print(f"⚠️ Write-behind queue full, insert on {collection.name} dead-lettered")
+            return False
+        self.collections[collection.name] = collection
+        self.inserts.setdefault(collection.name, []).append(doc)
+        self._enqueued()
+        return True
+
+    async def set(self, collection, filter: dict, fields: dict, upsert: bool = False) -> bool:
+        """Queue a $set (merged into a pending one on the same filter); False if dead-lettered."""
+        key = (collection.name, tuple(sorted(filter.items())))
+        if key in self.updates:
+            pending = self.updates[key]
+            pending["fields"].update(fields)
+            pending["upsert"] = pending["upsert"] or upsert
+            self.stats["coalesced"] += 1
+            return True
+        op = {"filter": filter, "fields": dict(fields), "upsert": upsert, "attempts": 0}
+        if not await self._reserve():
+            self._dead_letter(collection.name, "update", op, "queue full")
+            print(f"⚠️ Write-behind queue full, update on {collection.name} dead-lettered")
+            return False
+        if key in self.updates:
+            # Queued by another caller while this one waited for room
+            self.updates[key]["fields"].update(fields)
+            self.updates[key]["upsert"] = self.updates[key]["upsert"] or upsert
+            self.stats["coalesced"] += 1
+            return True
+        self.collections[collection.name] = collection
+        self.updates[key] = op
+        self._enqueued()
+        return True
+
+    # -------------------------
+    # Flush
+    # -------------------------
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            started = time.monotonic()
+            lag_ms = (started - self.oldest_pending) * 1000 if self.oldest_pending else 0.0
+            inserts, self.inserts = self.inserts, {}
+            updates, self.updates = self.updates, OrderedDict()
+            self.oldest_pending = None
+            self.in_flight = sum(len(docs) for docs in inserts.values()) + len(updates)
+            failed = False
+
+            for name, docs in inserts.items():
+                retry = await self._insert_batch(self.collections[name], docs)
+                if self.insert_attempts:
+                    retry_ids = {doc["_id"] for doc in retry}
+                    for doc in docs:
+                        if doc["_id"] not in retry_ids:
+                            self.insert_attempts.pop(doc["_id"], None)
+                if retry:
+                    failed = True
+                    self._requeue_inserts(name, retry)
+
+            by_collection: Dict[str, List] = {}
+            for (name, _), op in updates.items():
+                by_collection.setdefault(name, []).append(op)
+            for name, ops in by_collection.items():
+                if not await self._update_batch(self.collections[name], ops):
+                    failed = True
+                    self._requeue_updates(name, ops)
+
+            # Failed writes stay counted against max_pending until they land or are dead-lettered
+            self.in_flight = 0
+            if self.pending < self.max_pending:
+                self._space.set()
+            self._backoff(failed)
+
+            self.stats["batches"] += 1
+            self.stats["last_flush_ms"] = round((time.monotonic() - started) * 1000, 3)
+            self.stats["max_flush_lag_ms"] = max(self.stats["max_flush_lag_ms"], round(lag_ms, 3))
+
+    def _backoff(self, failed: bool):
+        if not failed:
+            self.failed_flushes = 0
+            self.retry_at = 0.0
+            return
+        self.failed_flushes += 1
+        delay = min(self.flush_interval * 2 ** (self.failed_flushes - 1), self.max_retry_delay)
+        self.retry_at = time.monotonic() + delay
+
+    async def _insert_batch(self, collection, docs: List[dict]) -> List[dict]:
+        """Insert docs; returns the ones that need a retry."""
+        try:
+            await collection.insert_many(docs, ordered=False)
+            self.stats["flushed"] += len(docs)
+            return []
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            retry = [docs[err["index"]] for err in errors if err.get("code") != DUPLICATE_KEY]
+            self.stats["flushed"] += len(docs) - len(retry)
+            if retry:
+                self.stats["failures"] += 1
+                print(f"Write-behind insert errors on {collection.name}: {len(retry)} docs will be retried")
+            return retry
+        except Exception as e:
+            self.stats["failures"] += 1
+            print(f"Write-behind insert failed on {collection.name}: {e}")
+            return docs
+
+    async def _update_batch(self, collection, ops: List[dict]) -> bool:
+        requests = [UpdateOne(op["filter"], {"$set": op["fields"]}, upsert=op["upsert"]) for op in ops]
+        try:
+            await collection.bulk_write(requests, ordered=False)
+            self.stats["flushed"] += len(requests)
+            return True
+        except Exception as e:
+            self.stats["failures"] += 1
+            print(f"Write-behind bulk_write failed on {collection.name}: {e}")
+            return False
+
+    def _requeue_inserts(self, name: str, docs: List[dict]):
+        retry = []
+        for doc in docs:
+            attempts = self.insert_attempts.get(doc["_id"], 0) + 1
+            if attempts > self.max_retries:
+                self.insert_attempts.pop(doc["_id"], None)
+                self._dead_letter(name, "insert", doc, "retries exhausted", attempts)
+            else:
+                self.insert_attempts[doc["_id"]] = attempts
+                retry.append(doc)
+        if not retry:
+            return
+        self.stats["retries"] += len(retry)
+        self.inserts[name] = retry + self.inserts.get(name, [])
+        self.oldest_pending = self.oldest_pending or time.monotonic()
+
+    def _requeue_updates(self, name: str, ops: List[dict]):
+        for op in ops:
+            op["attempts"] += 1
+            key = (name, tuple(sorted(op["filter"].items())))
+            if op["attempts"] > self.max_retries:
+                self._dead_letter(name, "update", op, "retries exhausted", op["attempts"])
+                continue
+            self.stats["retries"] += 1
+            if key in self.updates:
+                # Newer updates queued meanwhile win over the failed ones
+                pending = self.updates[key]
+                pending["fields"] = {**op["fields"], **pending["fields"]}
+                pending["upsert"] = pending["upsert"] or op["upsert"]
+                pending["attempts"] = max(pending["attempts"], op["attempts"])
+            else:
+                self.updates[key] = op
+        if self.queued:
+            self.oldest_pending = self.oldest_pending or time.monotonic()
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping or time.monotonic() < self.retry_at:
+                continue
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Write-behind flush error: {e}")
+
+    def start(self):
+        if self._stopping:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and write out everything still queued."""
+        # A stop flag rather than task.cancel(): wait_for() can swallow a
+        # cancellation that races with the wake event.
+        self._stopping = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+        # Whatever the last flush could not write would be lost with the process
+        for name, docs in self.inserts.items():
+            for doc in docs:
+                self._dead_letter(name, "insert", doc, "shutdown", self.insert_attempts.get(doc["_id"], 0))
+        for (name, _), op in self.updates.items():
+            self._dead_letter(name, "update", op, "shutdown", op["attempts"])
+        if self.pending:
+            print(f"⚠️ Write-behind stopped with {self.pending} unwritten ops (dead-lettered)")
+        self.inserts, self.updates = {}, OrderedDict()
+        self.insert_attempts.clear()
+        self.oldest_pending = None
+        self._space.set()
+        self._backoff(False)
+        self._stopping = False
+
+    def metrics(self) -> dict:
+        lag_ms = (time.monotonic() - self.oldest_pending) * 1000 if self.oldest_pending else 0.0
+        return {
+            **self.stats,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "dead_letter_size": len(self.dead_letters),
+            "retry_in_s": round(max(self.retry_at - time.monotonic(), 0.0), 3),
+            "flush_lag_ms": round(lag_ms, 3),
+            "running": self._task is not None and not self._task.done(),
+        }
+
+
+write_behind = WriteBehindWriter(
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+    max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    max_retries=settings.WRITE_BEHIND_MAX_RETRIES,
+    max_retry_delay=settings.WRITE_BEHIND_MAX_RETRY_DELAY,
+    enqueue_timeout=settings.WRITE_BEHIND_ENQUEUE_TIMEOUT,
+)
@@ -1,9 +1,15 @@
 # app/strategies/base.py
-from typing import Dict
+from typing import Dict, Optional
+import numpy as np
+
+# Array-level signal codes used by generate_signals()
+BUY = 1
+SELL = -1
+HOLD = 0
 
 class Signal:
     def __init__(self, action: str):
-        self.action = action  
+        self.action = action
 
 class StrategyBase:
     def __init__(self, params: Dict):
@@ -16,3 +22,80 @@ class StrategyBase:
     def on_bar(self, candle: Dict) -> Signal:
         """Process one candle and return Signal"""
         raise NotImplementedError
+
+    def generate_signals(self, arrays: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Optional array-level version of on_bar for the vectorized engine.
+        Returns an int8 array (BUY / SELL / HOLD) with one entry per candle, matching
+        what on_bar would emit bar by bar, or None to fall back to the bar loop.
+        """
+        return None
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of each trailing window, aligned so out[i] covers values[i - window + 1 .. i]
+    (NaN before the first full window). Each sum is exact and then correctly
+    rounded, bit for bit what indicators.WindowSum reports: the series is scaled
+    to integers (every float64 is an integer times a power of two) and each
+    window is a difference of their exact prefix sums. O(n) for any window.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if window <= 0 or n < window:
+        return out
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    clean = np.where(finite, values, 0.0)
+    mantissa, exponent = np.frexp(clean)
+    digits = (mantissa * 2.0 ** 53).astype(np.int64)
+    exponent = exponent.astype(np.int64) - 53
+    nonzero = digits != 0
+    if not nonzero.any():
+        out[window - 1:] = 0.0
+    else:
+        # Finest power of two any value is a multiple of (its lowest set bit)
+        lowest_bit = np.frexp((digits & -digits)[nonzero].astype(np.float64))[1] - 1
+        grain = int((exponent[nonzero] + lowest_bit).min())
+        scaled = np.ldexp(clean, -grain)        # exact integers
+        if np.abs(scaled).max() * window < 2.0 ** 62:
+            # Every window sum fits in int64; the prefix sums may wrap, but
+            # their differences are exact modulo 2**64. int64 -> float64
+            # then rounds to nearest, as the exact sums should.
+            prefix = np.concatenate(([0], np.cumsum(scaled.astype(np.int64))))
+            exact = prefix[window:] - prefix[:-window]
+            out[window - 1:] = np.ldexp(exact.astype(np.float64), grain)
+        else:
+            lowest = min(int(exponent[nonzero].min()), 0)
+            big = digits.astype(object) << (exponent - lowest).clip(0).astype(object)
+            prefix = np.concatenate(([0], np.cumsum(big)))
+            exact = prefix[window:] - prefix[:-window]
+            # int / int is correctly rounded in Python
+            out[window - 1:] = (exact / (1 << -lowest)).astype(np.float64)
+
+    if not finite.all():
+        # inf / nan swamp the finite part of their windows, as in a plain sum
+        special = np.where(finite, 0.0, values)
+        swamped = special[:n - window + 1].copy()
+        for k in range(1, window):
+            swamped += special[k:n - window + 1 + k]
+        counts = np.concatenate(([0], np.cumsum(~finite)))
+        has_special = (counts[window:] - counts[:-window]) > 0
+        out[window - 1:][has_special] = swamped[has_special]
+    return out
+
+
+def effective_signals(signals: np.ndarray) -> np.ndarray:
+    """
+    Indices of the signals a long-only position actually acts on: BUY only when
+    flat, SELL only when holding. The position after any bar equals the last
+    non-HOLD signal seen, so a signal fills exactly when it differs from the
+    previous non-HOLD signal (starting flat).
+    """
+    idx = np.flatnonzero(signals != HOLD)
+    values = signals[idx]
+    previous = np.empty_like(values)
+    if len(values):
+        previous[0] = SELL
+        previous[1:] = values[:-1]
+    return idx[values != previous]
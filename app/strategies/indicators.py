@@ -0,0 +1,302 @@
+# app/strategies/indicators.py
+"""
+Streaming indicators with O(1) updates and fixed memory.
+
+Each indicator takes one value per bar through update() and returns the
+current reading, or None until it has seen enough bars. `value` holds the
+last reading and `ready` tells whether it is available.
+"""
+import math
+from collections import deque
+from typing import Optional
+
+
+class WindowSum:
+    """
+    Sum over the last `period` values, updated in O(1) with `+= new; -= old`.
+
+    Every float is an integer times a power of two, so the running total is
+    kept as an exact integer scaled to the finest power seen and the updates
+    never round. `total` is that exact sum correctly rounded: it depends only
+    on the values in the window, never on the bars that already left it, so
+    there is no drift and two averages that tie stay tied. rolling_sum in
+    base.py computes the same numbers for the vectorized engine.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = deque(maxlen=period)
+        self.ratios = deque(maxlen=period)     # as_integer_ratio() of each value, None if not finite
+        self.total = 0.0
+        self._exact = 0         # window sum * _scale
+        self._scale = 1         # power of two, only grows
+        self._nonfinite = 0
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        if len(self.values) == self.period:
+            ratio = self.ratios[0]
+            if ratio is None:
+                self._nonfinite -= 1
+            else:
+                self._exact -= ratio[0] * (self._scale // ratio[1])
+
+        if math.isfinite(x):
+            numerator, denominator = ratio = x.as_integer_ratio()
+            if denominator > self._scale:
+                self._exact *= denominator // self._scale
+                self._scale = denominator
+            self._exact += numerator * (self._scale // denominator)
+        else:
+            ratio = None
+            self._nonfinite += 1
+        self.values.append(x)
+        self.ratios.append(ratio)
+
+        if self._nonfinite:
+            # inf / nan swamp the finite part, as they would in a plain sum
+            self.total = sum(v for v in self.values if not math.isfinite(v))
+        else:
+            self.total = self._exact / self._scale
+        return self.total
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.period
+
+    def clear(self):
+        self.values.clear()
+        self.ratios.clear()
+        self.total = 0.0
+        self._exact = 0
+        self._scale = 1
+        self._nonfinite = 0
+
+
+class SMA:
+    """Simple moving average."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = WindowSum(period)
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, x: float) -> Optional[float]:
+        total = self.window.update(x)
+        if self.window.full:
+            self.value = total / self.period
+        return self.value
+
+    def reset(self):
+        self.window.clear()
+        self.value = None
+
+
+class EMA:
+    """Exponential moving average, seeded with the SMA of the first `period` values."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.seed = 0.0
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, x: float) -> Optional[float]:
+        if self.value is None:
+            self.count += 1
+            self.seed += x
+            if self.count == self.period:
+                self.value = self.seed / self.period
+            return self.value
+        self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def reset(self):
+        self.count = 0
+        self.seed = 0.0
+        self.value = None
+
+
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 100.0
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+class RSI:
+    """
+    Relative Strength Index over closing prices.
+
+    wilder=True uses Wilder's smoothing (seeded with the simple average of the
+    first `period` changes). wilder=False uses the simple average of the last
+    `period` changes, as the built-in strategies always have.
+    """
+
+    def __init__(self, period: int, wilder: bool = True):
+        self.period = period
+        self.wilder = wilder
+        self.prev_close: Optional[float] = None
+        self.gains = WindowSum(period)
+        self.losses = WindowSum(period)
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+
+        change = close - self.prev_close
+        self.prev_close = close
+        gain = max(change, 0)
+        loss = abs(min(change, 0))
+
+        if self.wilder and self.avg_gain is not None:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        else:
+            self.gains.update(gain)
+            self.losses.update(loss)
+            if not self.gains.full:
+                return self.value
+            self.avg_gain = self.gains.total / self.period
+            self.avg_loss = self.losses.total / self.period
+
+        self.value = _rsi_from_averages(self.avg_gain, self.avg_loss)
+        return self.value
+
+    def reset(self):
+        self.prev_close = None
+        self.gains.clear()
+        self.losses.clear()
+        self.avg_gain = None
+        self.avg_loss = None
+        self.value = None
+
+
+class RollingStd:
+    """Population standard deviation over the last `period` values."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.sum = WindowSum(period)
+        self.sum_sq = WindowSum(period)
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, x: float) -> Optional[float]:
+        total = self.sum.update(x)
+        total_sq = self.sum_sq.update(x * x)
+        if self.sum.full:
+            mean = total / self.period
+            variance = max(total_sq / self.period - mean * mean, 0.0)
+            self.value = variance ** 0.5
+        return self.value
+
+    def reset(self):
+        self.sum.clear()
+        self.sum_sq.clear()
+        self.value = None
+
+
+class ATR:
+    """Average True Range with Wilder smoothing, seeded with the SMA of the first `period` ranges."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.count = 0
+        self.seed = 0.0
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        if self.value is None:
+            self.count += 1
+            self.seed += true_range
+            if self.count == self.period:
+                self.value = self.seed / self.period
+            return self.value
+        self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+    def reset(self):
+        self.prev_close = None
+        self.count = 0
+        self.seed = 0.0
+        self.value = None
+
+
+class _RollingExtreme:
+    """Monotonic deque of (index, value); the front is the window's extreme."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.index = 0
+        self.window = deque()
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def _dominates(self, a: float, b: float) -> bool:
+        raise NotImplementedError
+
+    def update(self, x: float) -> Optional[float]:
+        # Amortized O(1): every value is pushed and popped at most once
+        while self.window and not self._dominates(self.window[-1][1], x):
+            self.window.pop()
+        self.window.append((self.index, x))
+        if self.window[0][0] <= self.index - self.period:
+            self.window.popleft()
+        self.index += 1
+        if self.index >= self.period:
+            self.value = self.window[0][1]
+        return self.value
+
+    def reset(self):
+        self.index = 0
+        self.window.clear()
+        self.value = None
+
+
+class RollingMax(_RollingExtreme):
+    """Highest value over the last `period` values."""
+
+    def _dominates(self, a: float, b: float) -> bool:
+        return a > b
+
+
+class RollingMin(_RollingExtreme):
+    """Lowest value over the last `period` values."""
+
+    def _dominates(self, a: float, b: float) -> bool:
+        return a < b
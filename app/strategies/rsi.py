@@ -1,46 +1,58 @@
 # app/strategies/rsi.py
-from .base import StrategyBase, Signal
-from typing import Dict, List
+from .base import StrategyBase, Signal, BUY, SELL, HOLD, rolling_sum
+from .indicators import RSI
+from typing import Dict
+import numpy as np
+
+
+def rsi_series(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    RSI for every bar as on_bar computes it (simple average of the last `period`
+    gains/losses, 100 when there were no losses). NaN until `period` price
+    changes have been seen.
+    """
+    out = np.full(len(close), np.nan)
+    if len(close) < 2:
+        return out
+    change = close[1:] - close[:-1]
+    gains = np.maximum(change, 0.0)
+    losses = np.abs(np.minimum(change, 0.0))
+
+    # change j is seen on bar j + 1
+    avg_gain = rolling_sum(gains, period) / period
+    avg_loss = rolling_sum(losses, period) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        out[1:] = np.where(avg_loss != 0, 100 - (100 / (1 + rs)), 100.0)
+    return out
+
 
 class RSI_Strategy(StrategyBase):
     def __init__(self, params: Dict):
         super().__init__(params)
         self.period = params.period
-        self.gains: List[float] = []
-        self.losses: List[float] = []
-        self.prev_close = None
+        self.rsi = RSI(self.period, wilder=False)
 
     def on_start(self, state):
-        self.gains.clear()
-        self.losses.clear()
-        self.prev_close = None
+        self.rsi.reset()
 
     def on_bar(self, candle: Dict) -> Signal:
-        close = float(candle["close"])
-        if self.prev_close is None:
-            self.prev_close = close
-            return Signal("HOLD")
-
-        change = close - self.prev_close
-        self.prev_close = close
-
-        self.gains.append(max(change, 0))
-        self.losses.append(abs(min(change, 0)))
-
-        if len(self.gains) > self.period:
-            self.gains.pop(0)
-            self.losses.pop(0)
-
-        if len(self.gains) < self.period:
+        rsi = self.rsi.update(float(candle["close"]))
+        if rsi is None:
             return Signal("HOLD")
 
-        avg_gain = sum(self.gains) / self.period
-        avg_loss = sum(self.losses) / self.period
-        rs = avg_gain / avg_loss if avg_loss != 0 else 100
-        rsi = 100 - (100 / (1 + rs))
-
         if rsi > 70:
             return Signal("SELL")
         elif rsi < 30:
             return Signal("BUY")
         return Signal("HOLD")
+
+    def generate_signals(self, arrays: Dict[str, np.ndarray]):
+        if not self.period or self.period <= 0:
+            return None
+        rsi = rsi_series(arrays["close"], self.period)
+        signals = np.full(len(rsi), HOLD, dtype=np.int8)
+        with np.errstate(invalid="ignore"):
+            signals[rsi > 70] = SELL
+            signals[rsi < 30] = BUY
+        return signals
@@ -1,7 +1,8 @@
 # app/strategies/sma_cross.py
-from .base import StrategyBase, Signal
-from collections import deque
-from typing import Dict, List
+from .base import StrategyBase, Signal, BUY, SELL, HOLD, rolling_sum, effective_signals
+from .indicators import SMA
+from typing import Dict
+import numpy as np
 from app.schemas.backtest import StrategyParams
 
 
@@ -10,32 +11,27 @@ class SMA_Crossover(StrategyBase):
         super().__init__(params)
         self.short = params.short
         self.long = params.long
-        self.prices = []
-        self.short_q = deque(maxlen=self.short)
-        self.long_q = deque(maxlen=self.long)
+        self.short_sma = SMA(self.short)
+        self.long_sma = SMA(self.long)
         self.prev_short_sma = None
         self.prev_long_sma = None
         self.position = 0  # 0 = no position, 1 = long
 
     def on_start(self, state):
-        self.prices.clear()
-        self.short_q.clear()
-        self.long_q.clear()
+        self.short_sma.reset()
+        self.long_sma.reset()
         self.prev_short_sma = None
         self.prev_long_sma = None
         self.position = 0
 
     def on_bar(self, candle: Dict) -> Signal:
         price = float(candle["close"])
-        self.prices.append(price)
-        self.short_q.append(price)
-        self.long_q.append(price)
+        short_sma = self.short_sma.update(price)
+        long_sma = self.long_sma.update(price)
 
-        if len(self.short_q) < self.short or len(self.long_q) < self.long:
+        if short_sma is None or long_sma is None:
             return 
 
-        short_sma = sum(self.short_q) / self.short
-        long_sma = sum(self.long_q) / self.long
         signal = Signal("HOLD")
 
         # CROSSOVER DETECTION
@@ -54,3 +50,30 @@ class SMA_Crossover(StrategyBase):
         self.prev_long_sma = long_sma
 
         return signal
+
+    def generate_signals(self, arrays: Dict[str, np.ndarray]):
+        if not self.short or not self.long or self.short <= 0 or self.long <= 0:
+            return None
+        close = arrays["close"]
+        short_sma = rolling_sum(close, self.short) / self.short
+        long_sma = rolling_sum(close, self.long) / self.long
+
+        ready = ~(np.isnan(short_sma) | np.isnan(long_sma))
+        both_ready = np.zeros(len(close), dtype=bool)
+        both_ready[1:] = ready[1:] & ready[:-1]
+        prev_short = np.roll(short_sma, 1)
+        prev_long = np.roll(long_sma, 1)
+
+        with np.errstate(invalid="ignore"):
+            cross_up = both_ready & (short_sma > long_sma) & (prev_short <= prev_long)
+            cross_down = both_ready & (short_sma < long_sma) & (prev_short >= prev_long)
+
+        crosses = np.full(len(close), HOLD, dtype=np.int8)
+        crosses[cross_up] = BUY
+        crosses[cross_down] = SELL
+
+        # on_bar only emits a cross that flips its own position
+        signals = np.full(len(close), HOLD, dtype=np.int8)
+        fills = effective_signals(crosses)
+        signals[fills] = crosses[fills]
+        return signals
@@ -1,7 +1,9 @@
 # app/strategies/sma_rsi_combo.py
-from .base import StrategyBase, Signal
-from collections import deque
-from typing import Dict, List
+from .base import StrategyBase, Signal, BUY, SELL, HOLD, rolling_sum
+from .indicators import SMA, RSI
+from .rsi import rsi_series
+from typing import Dict
+import numpy as np
 
 class SMA_RSI_Strategy(StrategyBase):
     def __init__(self, params: Dict):
@@ -9,71 +11,43 @@ class SMA_RSI_Strategy(StrategyBase):
         # SMA params
         self.short = params.short
         self.long = params.long
-        self.prices: List[float] = []
-        self.short_q = deque(maxlen=self.short)
-        self.long_q = deque(maxlen=self.long)
+        self.short_sma = SMA(self.short)
+        self.long_sma = SMA(self.long)
 
         # RSI params
         self.rsi_period = params.period
-        self.rsi_gains: List[float] = []
-        self.rsi_losses: List[float] = []
-        self.prev_close = None
+        self.rsi = RSI(self.rsi_period, wilder=False)
 
     def on_start(self, state):
-        self.prices.clear()
-        self.short_q.clear()
-        self.long_q.clear()
-        self.rsi_gains.clear()
-        self.rsi_losses.clear()
-        self.prev_close = None
+        self.short_sma.reset()
+        self.long_sma.reset()
+        self.rsi.reset()
 
     def on_bar(self, candle: Dict) -> Signal:
         close = float(candle["close"])
-        self.prices.append(close)
-        self.short_q.append(close)
-        self.long_q.append(close)
+        short_sma = self.short_sma.update(close)
+        long_sma = self.long_sma.update(close)
+        rsi = self.rsi.update(close)
 
-        # ---------- SMA calculation ----------
-        if len(self.short_q) < self.short or len(self.long_q) < self.long:
+        # ---------- SMA signal ----------
+        if short_sma is None or long_sma is None:
             sma_signal = "HOLD"
+        elif short_sma > long_sma:
+            sma_signal = "BUY"
+        elif short_sma < long_sma:
+            sma_signal = "SELL"
         else:
-            short_sma = sum(self.short_q) / self.short
-            long_sma = sum(self.long_q) / self.long
-            if short_sma > long_sma:
-                sma_signal = "BUY"
-            elif short_sma < long_sma:
-                sma_signal = "SELL"
-            else:
-                sma_signal = "HOLD"
+            sma_signal = "HOLD"
 
-        # ---------- RSI calculation ----------
-        if self.prev_close is None:
-            self.prev_close = close
+        # ---------- RSI signal ----------
+        if rsi is None:
             rsi_signal = "HOLD"
+        elif rsi > 70:
+            rsi_signal = "SELL"  # overbought
+        elif rsi < 30:
+            rsi_signal = "BUY"   # oversold
         else:
-            change = close - self.prev_close
-            self.prev_close = close
-
-            self.rsi_gains.append(max(change, 0))
-            self.rsi_losses.append(abs(min(change, 0)))
-
-            if len(self.rsi_gains) > self.rsi_period:
-                self.rsi_gains.pop(0)
-                self.rsi_losses.pop(0)
-
-            if len(self.rsi_gains) < self.rsi_period:
-                rsi_signal = "HOLD"
-            else:
-                avg_gain = sum(self.rsi_gains) / self.rsi_period
-                avg_loss = sum(self.rsi_losses) / self.rsi_period
-                rs = avg_gain / avg_loss if avg_loss != 0 else 100
-                rsi = 100 - (100 / (1 + rs))
-                if rsi > 70:
-                    rsi_signal = "SELL"  # overbought
-                elif rsi < 30:
-                    rsi_signal = "BUY"   # oversold
-                else:
-                    rsi_signal = "HOLD"
+            rsi_signal = "HOLD"
 
         # ---------- Combine signals ----------
         # Only take BUY if both SMA trend and RSI agree
@@ -83,3 +57,25 @@ class SMA_RSI_Strategy(StrategyBase):
             return Signal("SELL")
         else:
             return Signal("HOLD")
+
+    def generate_signals(self, arrays: Dict[str, np.ndarray]):
+        if not self.short or not self.long or not self.rsi_period:
+            return None
+        if min(self.short, self.long, self.rsi_period) <= 0:
+            return None
+        close = arrays["close"]
+        short_sma = rolling_sum(close, self.short) / self.short
+        long_sma = rolling_sum(close, self.long) / self.long
+        rsi = rsi_series(close, self.rsi_period)
+
+        with np.errstate(invalid="ignore"):
+            sma_buy = short_sma > long_sma
+            sma_sell = short_sma < long_sma
+            rsi_buy = rsi < 30
+            rsi_sell = rsi > 70
+
+        # Only take BUY if both SMA trend and RSI agree
+        signals = np.full(len(close), HOLD, dtype=np.int8)
+        signals[sma_buy & ~rsi_sell] = BUY
+        signals[sma_sell & ~rsi_buy] = SELL
+        return signals
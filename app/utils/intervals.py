@@ -0,0 +1,50 @@
+# app/utils/intervals.py
+from datetime import datetime, timezone
+
+# CoinDCX candle intervals -> milliseconds
+INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+    "3d": 3 * 24 * 60 * 60_000,
+    "1w": 7 * 24 * 60 * 60_000,
+    "1M": 30 * 24 * 60 * 60_000,  # nominal; months are not fixed-length
+}
+
+
+def interval_to_ms(interval: str) -> int:
+    """Length of one candle in milliseconds. Raises ValueError for unknown intervals."""
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"Unknown candle interval '{interval}'")
+
+
+def to_ms(value) -> int:
+    """
+    Convert a timestamp to epoch milliseconds.
+    Accepts ms or seconds (int, float or numeric string) and ISO strings.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            value = float(value)
+        except ValueError:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return int(dt.timestamp() * 1000)
+    value = int(value)
+    # Anything below ~year 5000 in seconds is treated as seconds
+    return value * 1000 if value < 100_000_000_000 else value
+
+
+def now_ms() -> int:
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
@@ -0,0 +1,63 @@
+"""
+Encode cost of a websocket fan-out as the subscriber count grows.
+
+Compares json.dumps per recipient (the old send_json path) with
+ClientManager.broadcast, which encodes each distinct payload once.
+
+    python bench_fanout.py
+"""
+import asyncio
+import json
+import time
+
+from app.core.client_manager import ClientManager
+from app.core.fanout import fanout
+
+SYMBOLS = [f"SYM{i}USDT" for i in range(200)]
+MESSAGE = {
+    "e": "tick",
+    "data": [{"s": s, "p": 100.0 + i, "q": 1.25, "t": 1_700_000_000_000 + i} for i, s in enumerate(SYMBOLS)],
+}
+ROUNDS = 20
+
+
+class NullSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        pass
+
+
+async def per_recipient(subscribers):
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        for _ in range(subscribers):
+            json.dumps(MESSAGE)
+    return (time.process_time() - started) / ROUNDS
+
+
+async def serialize_once(subscribers):
+    manager = ClientManager()
+    for _ in range(subscribers):
+        ws = NullSocket()
+        await manager.connect(ws)
+        manager.subscribe(ws, "prices", SYMBOLS)
+    before = fanout.encodes
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        await manager.broadcast("prices", MESSAGE)
+    return (time.process_time() - started) / ROUNDS, (fanout.encodes - before) // ROUNDS
+
+
+async def main():
+    print(f"encoder: {fanout.metrics()['encoder']}, {len(SYMBOLS)} items per message")
+    print(f"{'subscribers':>11} {'per-recipient ms':>17} {'serialize-once ms':>18} {'encodes/msg':>12}")
+    for subscribers in (1, 10, 100, 1000):
+        old = await per_recipient(subscribers)
+        new, encodes = await serialize_once(subscribers)
+        print(f"{subscribers:>11} {old * 1000:>17.2f} {new * 1000:>18.2f} {encodes:>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
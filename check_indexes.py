@@ -0,0 +1,27 @@
+"""
+Create the declared Mongo indexes and explain every hot query against the
+configured database. Exits non-zero if any hot query scans a collection.
+
+    python check_indexes.py
+"""
+import asyncio
+import sys
+
+from app.core.indexes import ensure_indexes, explain_hot_queries, uncovered_hot_queries
+
+
+async def main() -> int:
+    missing = uncovered_hot_queries()
+    for query in missing:
+        print(f"❌ No declared index for {query}")
+    await ensure_indexes()
+    failed = bool(missing)
+    for row in await explain_hot_queries():
+        ok = row["indexed"] and not row["collection_scan"] and not row["in_memory_sort"]
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {row['collection']:<24} filter={row['filter']} sort={row['sort']} plan={row['stages']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
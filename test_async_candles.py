@@ -0,0 +1,119 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.coindcx_rest_apis.async_candles import (
+    MAX_RANGE_CANDLES, AsyncCandleClient, fetch_coindcx_candle_arrays_async, range_candle_count,
+)
+from app.routes.backtest import _validate_candle_window
+from app.schemas.backtest import CandleParams
+from app.services.candle_store import merge_ranges
+
+MINUTE = 60_000
+START = 1_600_000_000_000 // MINUTE * MINUTE      # long closed, so every page can be covered
+
+
+def candle(t):
+    return {"time": t, "open": 1.0, "high": 1.0, "low": 1.0, "close": float(t), "volume": 1.0}
+
+
+class StubPages:
+    """fetch_page stand-in serving one candle per minute, except `missing` open times."""
+
+    def __init__(self, missing=(), overlap=0, delay=0.0):
+        self.missing = set(missing)
+        self.overlap = overlap          # extra candles returned past the page end
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, pair, interval, start=None, end=None, limit=None):
+        self.calls.append((start, end, limit))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        times = range(start, end + self.overlap * MINUTE + 1, MINUTE)
+        return [candle(t) for t in times if t not in self.missing]
+
+
+def client_with(stub, **kwargs):
+    client = AsyncCandleClient(**kwargs)
+    client.fetch_page = stub
+    return client
+
+
+def test_range_is_paged_and_stitched_in_order():
+    stub = StubPages(overlap=2)             # pages overlap: duplicates must be dropped
+    client = client_with(stub, page_limit=10)
+    end = START + 34 * MINUTE
+    arrays, covered = asyncio.run(client.fetch_range("B-BTC_USDT", "1m", START, end))
+
+    assert [(s, e) for s, e, _ in stub.calls] == [
+        (START, START + 9 * MINUTE), (START + 10 * MINUTE, START + 19 * MINUTE),
+        (START + 20 * MINUTE, START + 29 * MINUTE), (START + 30 * MINUTE, end),
+    ]
+    assert all(limit == 10 for _, _, limit in stub.calls)
+    assert arrays["time"].tolist() == list(range(START, end + 2 * MINUTE + 1, MINUTE))
+    assert np.array_equal(arrays["close"], arrays["time"].astype(float))
+
+
+def test_covered_spans_merge_across_pages_and_exchange_gaps():
+    # Minutes the exchange has no candle for are still fetched, i.e. covered
+    stub = StubPages(missing=[START + 3 * MINUTE, START + 10 * MINUTE, START + 11 * MINUTE])
+    client = client_with(stub, page_limit=10)
+    end = START + 29 * MINUTE
+    arrays, covered = asyncio.run(client.fetch_range("B-BTC_USDT", "1m", START, end))
+
+    assert len(arrays["time"]) == 27
+    assert merge_ranges(covered, MINUTE) == [(START, end)]
+
+
+def test_full_page_only_covers_what_it_returned():
+    # A page that comes back full may have been cut short by the exchange
+    async def truncated(pair, interval, start=None, end=None, limit=None):
+        return [candle(start + k * MINUTE) for k in range(2, 2 + limit)]
+
+    client = client_with(truncated, page_limit=5)
+    _, covered = asyncio.run(client.fetch_range("B-BTC_USDT", "1m", START, START + 4 * MINUTE))
+    assert covered == [(START + 2 * MINUTE, START + 4 * MINUTE)]
+
+
+def test_pages_in_flight_are_bounded_by_the_semaphore():
+    stub = StubPages(delay=0.005)
+    client = client_with(stub, page_limit=10, max_concurrency=3)
+
+    async def run():
+        # Two ranges at once still share one bound
+        await asyncio.gather(
+            client.fetch_range("B-BTC_USDT", "1m", START, START + 199 * MINUTE),
+            client.fetch_range("B-ETH_USDT", "1m", START, START + 99 * MINUTE),
+        )
+
+    asyncio.run(run())
+    assert len(stub.calls) == 30
+    assert stub.max_in_flight == 3
+
+
+def test_windows_over_the_cap_are_rejected():
+    end = START + MAX_RANGE_CANDLES * MINUTE
+    assert range_candle_count("1m", 500, START, end) == MAX_RANGE_CANDLES + 1
+    assert range_candle_count("1m", 500, START, START + 99 * MINUTE) == 100
+    assert range_candle_count("1m", 500) <= 500
+
+    with pytest.raises(ValueError):
+        asyncio.run(fetch_coindcx_candle_arrays_async("B-BTC_USDT", "1m", startTime=START, endTime=end))
+
+    params = CandleParams(interval="1m", pair="B-BTC_USDT", startTime=str(START), endTime=str(end))
+    with pytest.raises(HTTPException) as e:
+        _validate_candle_window(params)
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException) as e:
+        _validate_candle_window(CandleParams(interval="1m", pair="B-BTC_USDT", limit=10**9, startTime=None, endTime=None))
+    assert e.value.status_code == 400
+    _validate_candle_window(params.model_copy(update={"endTime": str(START + 99 * MINUTE)}))
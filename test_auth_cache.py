@@ -0,0 +1,52 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.auth import TokenCache, create_access_token, get_current_user, token_cache
+
+
+def authenticate(token):
+    return asyncio.run(get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+
+def test_verified_tokens_are_served_from_cache():
+    token_cache.clear()
+    hits = token_cache.hits
+    token = create_access_token({"sub": "admin"})
+    assert authenticate(token) == "admin"
+    assert authenticate(token) == "admin"
+    assert token_cache.hits == hits + 1
+
+    with pytest.raises(HTTPException):
+        authenticate(token[:-2] + "xx")
+    assert len(token_cache.entries) == 1       # rejected tokens are not cached
+
+
+def test_entries_expire_at_token_exp_and_lru_evicts():
+    cache = TokenCache(max_entries=2)
+    cache.put("a", "alice", time.time() - 1)
+    assert cache.get("a") is None
+    assert cache.metrics()["expired"] == 1
+
+    later = time.time() + 60
+    cache.put("a", "alice", later)
+    cache.put("b", "bob", later)
+    assert cache.get("a") == "alice"            # a is now most recent
+    cache.put("c", "carol", later)
+    assert cache.get("b") is None
+    assert cache.get("a") == "alice" and cache.get("c") == "carol"
+    assert cache.metrics()["evictions"] == 1
+
+    cache.put("d", "dave", None)                # no exp claim: not cached
+    assert cache.get("d") is None
+
+
+def test_expired_token_is_rejected():
+    token_cache.clear()
+    token = create_access_token({"sub": "admin"}, expires_delta=timedelta(seconds=-5))
+    with pytest.raises(HTTPException):
+        authenticate(token)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from app.schemas.backtest import StrategyParams
+from app.services.backtest_analytics import (
+    compute_metrics, drawdown_series, equity_curve_arrays, longest_run, periods_per_year,
+)
+from app.services.backtest_engine import run_backtest_vectorized
+from app.strategies import SMA_Crossover
+from test_backtest_engine import make_candles
+
+
+def test_drawdown_matches_loop():
+    equity = np.array([100, 120, 90, 130, 65, 140, 139], dtype=np.float64)
+    peak, expected = equity[0], []
+    for v in equity:
+        peak = max(peak, v)
+        expected.append((peak - v) / peak)
+    assert np.allclose(drawdown_series(equity), expected)
+
+
+def test_longest_run():
+    assert longest_run(np.array([], dtype=bool)) == 0
+    assert longest_run(np.array([True, True, False, True, True, True, False])) == 3
+    assert longest_run(np.array([False, False])) == 0
+
+
+def test_periods_per_year():
+    assert periods_per_year("1d") == 365
+    assert periods_per_year("1h") == 365 * 24
+    # Inferred from spacing when the interval is unknown, seconds or ms
+    assert periods_per_year(None, np.arange(0, 600, 60)) == pytest.approx(365 * 24 * 60)
+    assert periods_per_year(None, np.arange(0, 600, 60) * 1000 + 1_700_000_000_000) == pytest.approx(365 * 24 * 60)
+
+
+def test_metrics_match_reference_loops():
+    candles = make_candles(n=2000)
+    result = run_backtest_vectorized(candles, SMA_Crossover(StrategyParams(short=10, long=30)), 1000.0, 0.001, 1.0)
+    times, equity = equity_curve_arrays(result["equity_curve"])
+    m = compute_metrics(equity, times, result["trades"], 1000.0, result["final_balance"], "1m")
+
+    closed = [t for t in result["trades"] if t["side"] == "SELL"]
+    pnl = [t["pnl"] for t in closed]
+    assert m["total_trades"] == len(closed)
+    assert m["winning_trades"] == sum(p > 0 for p in pnl)
+    assert m["longest_win_streak"] == max(
+        len(run) for run in "".join("W" if p > 0 else "L" for p in pnl).split("L")
+    )
+
+    returns = np.diff(equity) / equity[:-1]
+    ppy = 365 * 24 * 60
+    assert m["sharpe_ratio"] == pytest.approx(returns.mean() / returns.std() * np.sqrt(ppy))
+    downside = np.sqrt(np.mean([min(r, 0) ** 2 for r in returns]))
+    assert m["sortino_ratio"] == pytest.approx(returns.mean() / downside * np.sqrt(ppy))
+    # volatility keeps its original per-bar definition; the annualized figure is separate
+    assert m["volatility"] == pytest.approx(returns.std() * 100)
+    assert m["annualized_volatility"] == pytest.approx(returns.std() * np.sqrt(ppy) * 100)
+
+    # Bars holding a position: entry bar up to (not including) the exit bar
+    buys = [t["entry_time"] for t in result["trades"] if t["side"] == "BUY"]
+    held = sum(
+        sum(1 for t in times if entry <= t < exit_["exit_time"])
+        for entry, exit_ in zip(buys, closed)
+    )
+    assert m["exposure_pct"] == pytest.approx(held / len(times) * 100)
+    assert m["avg_holding_hours"] == pytest.approx(
+        np.mean([(x["exit_time"] - e) / 3600 for e, x in zip(buys, closed)])
+    )
+
+
+def test_metrics_without_trades():
+    m = compute_metrics(np.full(5, 1000.0), np.arange(5) * 60, [], 1000.0, 1000.0, "1m")
+    assert m["total_trades"] == 0
+    assert m["max_drawdown"] == 0
+    assert m["sharpe_ratio"] == 0
+    assert m["exposure_pct"] == 0
@@ -0,0 +1,73 @@
+import time
+
+from app.schemas.backtest import BacktestRequest
+from app.services import backtest_cache as backtest_cache_module
+from app.services.backtest_cache import BacktestCache, backtest_request_key, source_fingerprint
+
+
+def make_request(**candle_params):
+    return BacktestRequest(
+        strategy="rsi", timeframe=None, initial_capital=1000, params={"period": 14},
+        candle_params={"pair": "B-BTC_USDT", "interval": "1h", **candle_params},
+    )
+
+
+def test_key_is_canonical_over_range_spelling():
+    iso = make_request(startTime="2024-01-01T00:00:00", endTime="2024-02-01T00:00:00")
+    epoch = make_request(startTime="1704067200000", endTime="1706745600")
+    key, expires_at = backtest_request_key(iso)
+    assert key == backtest_request_key(epoch)[0]
+    assert expires_at is None
+
+    other = make_request(startTime="2024-01-01T00:00:00", endTime="2024-02-01T00:00:00", limit=10)
+    assert backtest_request_key(other)[0] == key          # limit is ignored for full ranges
+    changed = iso.model_copy(update={"fee_rate": 0.002})
+    assert backtest_request_key(changed)[0] != key
+
+
+def test_key_changes_with_engine_version_and_sources(monkeypatch):
+    request = make_request(startTime="2024-01-01T00:00:00", endTime="2024-02-01T00:00:00")
+    key = backtest_request_key(request)[0]
+
+    monkeypatch.setattr(backtest_cache_module, "ENGINE_VERSION", backtest_cache_module.ENGINE_VERSION + 1)
+    bumped = backtest_request_key(request)[0]
+    assert bumped != key
+
+    monkeypatch.setattr(backtest_cache_module, "source_fingerprint", lambda: "edited-source")
+    assert backtest_request_key(request)[0] not in (key, bumped)
+
+
+def test_source_fingerprint_covers_strategies_and_engine():
+    source_fingerprint.cache_clear()
+    fingerprint = source_fingerprint()
+    assert len(fingerprint) == 16
+    assert "app.strategies" in backtest_cache_module.RESULT_SOURCES
+    assert "app.services.backtest_engine" in backtest_cache_module.RESULT_SOURCES
+    assert source_fingerprint() == fingerprint
+
+
+def test_open_range_expires():
+    key, expires_at = backtest_request_key(make_request(startTime=None, endTime=None))
+    assert key is not None
+    assert time.time() < expires_at <= time.time() + 3600
+
+
+def test_lru_byte_budget_and_disk_tier(tmp_path):
+    cache = BacktestCache(str(tmp_path), max_bytes=100, disk_max_bytes=1000)
+    cache.put("k1", b"a" * 60)
+    cache.put("k2", b"b" * 60)        # evicts k1 from memory
+    assert cache.metrics()["entries"] == 1
+    assert cache.get("k1") == b"a" * 60
+    assert cache.metrics()["disk_hits"] == 1
+    assert cache.get("k1") == b"a" * 60
+    assert cache.metrics()["memory_hits"] == 1
+    assert cache.get("missing") is None
+    assert cache.metrics()["misses"] == 1
+
+
+def test_expiring_entries_stay_in_memory(tmp_path):
+    cache = BacktestCache(str(tmp_path), max_bytes=100, disk_max_bytes=1000)
+    cache.put("open", b"x", expires_at=time.time() - 1)
+    assert not list(tmp_path.glob("*/*.json"))
+    assert cache.get("open") is None
+    assert cache.metrics()["expired"] == 1
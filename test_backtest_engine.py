@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from app.schemas.backtest import StrategyParams
+from app.services.backtest_engine import candles_to_arrays, iter_backtest_chunks, run_backtest, run_backtest_vectorized
+from app.strategies import SMA_Crossover, RSI_Strategy, SMA_RSI_Strategy
+from app.strategies.test_strategy import TestStrategy
+
+
+def make_candles(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return [
+        {
+            "time": 1_700_000_000 + 60 * i,
+            "open": float(c),
+            "high": float(c) * 1.001,
+            "low": float(c) * 0.999,
+            "close": float(c),
+            "volume": 1.0,
+        }
+        for i, c in enumerate(close)
+    ]
+
+
+def make_tick_candles(n=3000, seed=7, tick=0.01):
+    """Closes rounded to `tick` with flat stretches, so short and long SMAs tie exactly."""
+    rng = np.random.default_rng(seed)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.004, n))) / tick) * tick
+    for start in rng.integers(0, n - 60, n // 100):
+        close[start:start + rng.integers(5, 60)] = close[start]
+    return [
+        {"time": 1_700_000_000 + 60 * i, "open": c, "high": c, "low": c, "close": c, "volume": 1.0}
+        for i, c in enumerate(close.tolist())
+    ]
+
+
+PARITY_CASES = [
+    (SMA_Crossover, StrategyParams(short=10, long=30)),
+    (SMA_Crossover, StrategyParams(short=5, long=12)),
+    (RSI_Strategy, StrategyParams(period=14)),
+    (SMA_RSI_Strategy, StrategyParams(short=10, long=30, period=14)),
+]
+
+
+@pytest.mark.parametrize("strategy_cls, params", PARITY_CASES)
+@pytest.mark.parametrize("position_size_pct", [1.0, 0.4])
+def test_vectorized_matches_bar_loop(strategy_cls, params, position_size_pct):
+    candles = make_candles()
+    expected = run_backtest(candles, strategy_cls(params), 1000.0, 0.001, position_size_pct)
+    result = run_backtest_vectorized(candles, strategy_cls(params), 1000.0, 0.001, position_size_pct)
+
+    assert expected["trades"]
+    assert result == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("strategy_cls, params", PARITY_CASES)
+def test_vectorized_matches_bar_loop_on_tick_rounded_prices(seed, strategy_cls, params):
+    candles = make_tick_candles(seed=seed)
+    expected = run_backtest(candles, strategy_cls(params), 1000.0, 0.001, 1.0)
+    result = run_backtest_vectorized(candles, strategy_cls(params), 1000.0, 0.001, 1.0)
+
+    assert expected["trades"]
+    assert result["trades"] == expected["trades"]
+    assert result["signals"] == expected["signals"]
+    assert result["final_balance"] == expected["final_balance"]
+
+
+def test_vectorized_falls_back_to_bar_loop():
+    candles = make_candles(n=10)
+    expected = run_backtest(candles, TestStrategy())
+    assert run_backtest_vectorized(candles, TestStrategy()) == expected
+
+
+@pytest.mark.parametrize("engine", ["vectorized", "loop"])
+@pytest.mark.parametrize("strategy_cls, params", [
+    (SMA_Crossover, StrategyParams(short=10, long=30)),
+    (RSI_Strategy, StrategyParams(period=14)),
+])
+def test_chunked_run_matches_full_run(engine, strategy_cls, params):
+    candles = make_candles(n=2500)
+    expected = run_backtest(candles, strategy_cls(params), 1000.0, 0.001, 0.5)
+
+    items = list(iter_backtest_chunks(
+        candles_to_arrays(candles), strategy_cls(params), 1000.0, 0.001, 0.5, chunk_size=700, engine=engine,
+    ))
+    chunks, final = items[:-1], items[-1]
+    assert [c["start"] for c in chunks] == [0, 700, 1400, 2100]
+    assert [pt for c in chunks for pt in c["equity_curve"]] == expected["equity_curve"]
+    assert [s for c in chunks for s in c["signals"]] == expected["signals"]
+    assert [t for c in chunks for t in c["trades"]] + final["closing_trades"] == expected["trades"]
+    assert [c for chunk in chunks for c in chunk["candles"]] == candles
+    assert final["trades"] == expected["trades"]
+    assert final["final_balance"] == expected["final_balance"]
+    assert final["equity"].tolist() == [pt["value"] for pt in expected["equity_curve"]]
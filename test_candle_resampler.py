@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from app.coindcx_rest_apis import fetch_candles
+from app.services import candle_resampler
+from app.services.candle_resampler import RESAMPLABLE_INTERVALS, bucket_counts, resample
+from app.services.candle_store import CandleStore, candles_to_columns
+
+MINUTE = 60_000
+HOUR = 60 * MINUTE
+
+
+def minute_candles(start, n, drop=()):
+    rng = np.random.default_rng(5)
+    candles = []
+    for i in range(n):
+        if i in drop:
+            continue
+        o = float(100 + rng.normal())
+        c = float(o + rng.normal())
+        candles.append({"time": start + i * MINUTE, "open": o, "high": max(o, c) + 1, "low": min(o, c) - 1,
+                        "close": c, "volume": float(rng.uniform(1, 5))})
+    return candles
+
+
+def naive_resample(candles, step):
+    buckets = {}
+    for c in candles:
+        buckets.setdefault(c["time"] // step * step, []).append(c)
+    return [
+        {"time": t, "open": cs[0]["open"], "high": max(c["high"] for c in cs), "low": min(c["low"] for c in cs),
+         "close": cs[-1]["close"], "volume": sum(c["volume"] for c in cs)}
+        for t, cs in sorted(buckets.items())
+    ]
+
+
+def test_resample_matches_naive_with_gaps_and_partial_buckets():
+    # Starts mid-hour, has a missing stretch and a fully empty hour, ends mid-hour
+    start = 1_700_000_000_000 // HOUR * HOUR + 17 * MINUTE
+    candles = minute_candles(start, 400, drop=set(range(50, 60)) | set(range(103, 180)))
+    arrays = candles_to_columns(candles)
+
+    out = resample(arrays, HOUR)
+    expected = candles_to_columns(naive_resample(candles, HOUR))
+    for col in expected:
+        assert np.allclose(out[col], expected[col]), col
+    assert np.all(out["time"] % HOUR == 0)
+    counts = bucket_counts(arrays, HOUR)
+    assert counts.sum() == len(candles)
+    assert counts[0] == 43          # partial first bucket
+
+
+def test_resamplable_intervals():
+    assert {"5m", "15m", "1h", "4h", "1d"} <= RESAMPLABLE_INTERVALS
+    assert not {"1m", "3d", "1w", "1M"} & RESAMPLABLE_INTERVALS
+
+
+def test_fetch_serves_higher_timeframe_from_stored_minutes(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    monkeypatch.setattr(candle_resampler, "candle_store", store)
+    monkeypatch.setattr(fetch_candles, "candle_store", store)
+
+    start = 1_700_000_000_000 // HOUR * HOUR
+    candles = minute_candles(start, 6 * 60)
+    store.write("B-BTC_USDT", "1m", candles_to_columns(candles), [(start, start + (6 * 60 - 1) * MINUTE)], MINUTE)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("should not hit the network")
+    monkeypatch.setattr(fetch_candles, "fetch_coindcx_candles_remote", no_network)
+
+    out = fetch_candles.fetch_coindcx_candle_arrays(
+        "B-BTC_USDT", "1h", 500, startTime=start, endTime=start + 5 * HOUR
+    )
+    expected = candles_to_columns(naive_resample(candles, HOUR))
+    assert out["time"].tolist() == expected["time"].tolist()
+    assert np.allclose(out["volume"], expected["volume"])
+
+    # Not covered by 1m data: falls through to a direct fetch
+    with pytest.raises(AssertionError):
+        fetch_candles.fetch_coindcx_candle_arrays("B-BTC_USDT", "1h", 500, startTime=start, endTime=start + 10 * HOUR)
+
+
+def test_cold_store_fetches_the_target_interval_directly(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    monkeypatch.setattr(candle_resampler, "candle_store", store)
+    start = 1_700_000_000_000 // HOUR * HOUR
+    end = start + 499 * HOUR                        # 500 1h candles: one page direct, 30 pages of 1m
+
+    assert candle_resampler.plan_resample("B-BTC_USDT", "1h", start, end, allow_fetch=True) is None
+
+    # Mostly stored: topping up the last few hours of 1m is cheaper than one 1h page
+    stored_end = end - 3 * HOUR
+    candles = minute_candles(start, (stored_end - start) // MINUTE)
+    store.write("B-BTC_USDT", "1m", candles_to_columns(candles), [(start, stored_end - MINUTE)], MINUTE)
+    assert candle_resampler.plan_resample("B-BTC_USDT", "1h", start, end, allow_fetch=True) == (
+        start, end + HOUR - MINUTE,
+    )
+    assert candle_resampler.plan_resample("B-BTC_USDT", "1h", start, end, allow_fetch=False) is None
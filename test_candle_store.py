@@ -0,0 +1,178 @@
+import json
+import multiprocessing
+
+import numpy as np
+
+from app.coindcx_rest_apis import fetch_candles
+from app.services.candle_store import CANDLE_COLUMNS, CandleStore, columns_to_candles, merge_ranges, subtract_ranges
+
+STEP = 60_000
+PAIR, INTERVAL = "B-BTC_USDT", "1m"
+
+
+def bars(start, count, close=100.0):
+    """`count` one-minute bars from open time `start` (ms), all at `close`."""
+    times = start + STEP * np.arange(count, dtype=np.int64)
+    closes = np.full(count, close)
+    return {"time": times, "open": closes, "high": closes, "low": closes, "close": closes,
+            "volume": np.ones(count)}
+
+
+def span(start, count):
+    return (start, start + STEP * (count - 1))
+
+
+def test_range_helpers_merge_adjacent_and_find_gaps():
+    assert merge_ranges([(600_000, 900_000), (0, 240_000), (300_000, 360_000)], STEP) == [
+        (0, 360_000), (600_000, 900_000),
+    ]
+    covered = [(0, 360_000), (600_000, 900_000)]
+    assert subtract_ranges(0, 1_200_000, covered, STEP) == [(420_000, 540_000), (960_000, 1_200_000)]
+    assert subtract_ranges(60_000, 300_000, covered, STEP) == []
+
+
+def test_write_merges_rows_with_new_rows_winning(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write(PAIR, INTERVAL, bars(0, 10, close=1.0), [span(0, 10)], STEP)
+    store.write(PAIR, INTERVAL, bars(5 * STEP, 10, close=2.0), [span(5 * STEP, 10)], STEP)
+
+    arrays = store.read_range(PAIR, INTERVAL, 0, 20 * STEP)
+    assert arrays["time"].tolist() == [STEP * i for i in range(15)]
+    assert arrays["close"].tolist() == [1.0] * 5 + [2.0] * 10
+    assert set(arrays) == set(CANDLE_COLUMNS)
+
+    window = store.read_range(PAIR, INTERVAL, 3 * STEP, 6 * STEP)
+    assert window["time"].tolist() == [3 * STEP, 4 * STEP, 5 * STEP, 6 * STEP]
+
+
+def test_coverage_tracks_fetched_ranges_not_stored_rows(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.missing_ranges(PAIR, INTERVAL, 0, 9 * STEP, STEP) == [(0, 9 * STEP)]
+
+    store.write(PAIR, INTERVAL, bars(0, 3), [span(0, 3)], STEP)
+    store.write(PAIR, INTERVAL, bars(7 * STEP, 3), [span(7 * STEP, 3)], STEP)
+    # A still-forming candle is neither recorded as fetched nor stored
+    store.write(PAIR, INTERVAL, bars(10 * STEP, 1), [], STEP)
+    store.write(PAIR, INTERVAL, bars(11 * STEP, 2), [span(11 * STEP, 1)], STEP)
+
+    assert store.coverage(PAIR, INTERVAL) == [(0, 2 * STEP), (7 * STEP, 9 * STEP), (11 * STEP, 11 * STEP)]
+    assert store.missing_ranges(PAIR, INTERVAL, 0, 12 * STEP, STEP) == [
+        (3 * STEP, 6 * STEP), (10 * STEP, 10 * STEP), (12 * STEP, 12 * STEP),
+    ]
+    assert len(store.read_range(PAIR, INTERVAL, 0, 12 * STEP)["time"]) == 7
+
+    store.write(PAIR, INTERVAL, bars(3 * STEP, 4), [span(3 * STEP, 4)], STEP)
+    assert store.coverage(PAIR, INTERVAL) == [(0, 9 * STEP), (11 * STEP, 11 * STEP)]
+
+
+def part_files(store):
+    segment = store._segment_dir(PAIR, INTERVAL)
+    return {p.parent.name: p.stat().st_mtime_ns for p in segment.glob("*/time.npy")}
+
+
+def test_appends_write_new_parts_and_leave_stored_rows_alone(tmp_path):
+    store = CandleStore(str(tmp_path), max_parts=4)
+    store.write(PAIR, INTERVAL, bars(0, 100), [span(0, 100)], STEP)
+    before = part_files(store)
+
+    store.write(PAIR, INTERVAL, bars(100 * STEP, 5), [span(100 * STEP, 5)], STEP)
+    after = part_files(store)
+    assert len(after) == 2
+    assert {name: after[name] for name in before} == before      # first part untouched
+
+    # Re-fetching the still-forming candle writes nothing at all
+    store.write(PAIR, INTERVAL, bars(105 * STEP, 1), [], STEP)
+    assert part_files(store) == after
+
+
+def test_overlapping_write_rewrites_only_the_parts_it_touches(tmp_path):
+    store = CandleStore(str(tmp_path), max_parts=8)
+    for block in range(3):
+        store.write(PAIR, INTERVAL, bars(block * 10 * STEP, 5, close=1.0), [span(block * 10 * STEP, 5)], STEP)
+    before = part_files(store)
+
+    # Overlaps only the middle block
+    store.write(PAIR, INTERVAL, bars(12 * STEP, 6, close=2.0), [span(12 * STEP, 6)], STEP)
+    after = part_files(store)
+    assert len(after) == 3
+    assert len(set(before) & set(after)) == 2
+
+    arrays = store.read_range(PAIR, INTERVAL, 0, 30 * STEP)
+    assert arrays["time"].tolist() == sorted({STEP * t for t in [*range(5), *range(10, 18), *range(20, 25)]})
+    assert arrays["close"][5:13].tolist() == [1.0, 1.0] + [2.0] * 6
+
+
+def test_compaction_keeps_parts_bounded(tmp_path):
+    store = CandleStore(str(tmp_path), max_parts=4)
+    for block in range(20):
+        store.write(PAIR, INTERVAL, bars(block * 5 * STEP, 5), [span(block * 5 * STEP, 5)], STEP)
+    segment = store._segment_dir(PAIR, INTERVAL)
+    meta = store._read_meta(segment)
+    assert len(meta["parts"]) == 4
+    assert sorted(p.name for p in segment.iterdir() if p.is_dir()) == sorted(p["dir"] for p in meta["parts"])
+    assert meta["rows"] == 100
+    assert store.read_range(PAIR, INTERVAL, 0, 100 * STEP)["time"].tolist() == [STEP * t for t in range(100)]
+    assert store.coverage(PAIR, INTERVAL) == [(0, 99 * STEP)]
+
+
+def test_reads_the_single_version_layout(tmp_path):
+    store = CandleStore(str(tmp_path))
+    segment = store._segment_dir(PAIR, INTERVAL)
+    (segment / "v3").mkdir(parents=True)
+    for col, values in bars(0, 5).items():
+        np.save(segment / "v3" / f"{col}.npy", values)
+    meta = {"pair": PAIR, "interval": INTERVAL, "version": 3, "rows": 5, "coverage": [list(span(0, 5))]}
+    (segment / "meta.json").write_text(json.dumps(meta))
+
+    assert store.read_range(PAIR, INTERVAL, 0, 10 * STEP)["time"].tolist() == [STEP * t for t in range(5)]
+    store.write(PAIR, INTERVAL, bars(3 * STEP, 4, close=5.0), [span(3 * STEP, 4)], STEP)
+    arrays = store.read_range(PAIR, INTERVAL, 0, 10 * STEP)
+    assert arrays["close"].tolist() == [100.0] * 3 + [5.0] * 4
+    assert not (segment / "v3").exists()
+
+
+def _write_blocks(root, first, blocks):
+    store = CandleStore(root)
+    for block in range(first, first + blocks):
+        store.write(PAIR, INTERVAL, bars(block * 10 * STEP, 5), [span(block * 10 * STEP, 5)], STEP)
+
+
+def test_concurrent_writers_in_separate_processes_lose_nothing(tmp_path):
+    # Separate processes, like uvicorn workers: only the file lock orders them
+    ctx = multiprocessing.get_context("fork")
+    writers = [ctx.Process(target=_write_blocks, args=(str(tmp_path), k * 25, 25)) for k in range(4)]
+    for p in writers:
+        p.start()
+    for p in writers:
+        p.join()
+    assert all(p.exitcode == 0 for p in writers)
+
+    store = CandleStore(str(tmp_path))
+    assert store.coverage(PAIR, INTERVAL) == [span(block * 10 * STEP, 5) for block in range(100)]
+    assert len(store.read_range(PAIR, INTERVAL, 0, 1000 * 10 * STEP)["time"]) == 500
+
+
+def test_fetch_serves_the_forming_candle_without_storing_it(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    monkeypatch.setattr(fetch_candles, "candle_store", store)
+    now = 1_700_000_000_000 // STEP * STEP                   # the candle opening now is still forming
+    monkeypatch.setattr(fetch_candles, "now_ms", lambda: now)
+    forming = now // STEP * STEP
+
+    calls = []
+
+    def remote(pair, interval, limit, start, end):
+        calls.append((start, end))
+        return columns_to_candles(bars(start, (end - start) // STEP + 1, close=float(len(calls))))
+    monkeypatch.setattr(fetch_candles, "fetch_coindcx_candles_remote", remote)
+
+    first = fetch_candles.fetch_coindcx_candle_arrays(PAIR, INTERVAL, 10)
+    assert first["time"].tolist() == [forming - STEP * k for k in range(9, -1, -1)]
+    assert store.read_range(PAIR, INTERVAL, 0, forming)["time"][-1] == forming - STEP
+
+    # Only the forming candle is fetched again, and it comes back fresh
+    second = fetch_candles.fetch_coindcx_candle_arrays(PAIR, INTERVAL, 10)
+    assert calls[-1] == (forming, forming)
+    assert second["time"].tolist() == first["time"].tolist()
+    assert second["close"].tolist() == [1.0] * 9 + [2.0]
+    assert len(store.read_range(PAIR, INTERVAL, 0, forming)["time"]) == 9
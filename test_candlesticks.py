@@ -0,0 +1,42 @@
+import asyncio
+
+from app.coindxc_sockets.candlesticks import CandleStick
+
+
+def tick(t, close, volume=1.0):
+    return {"t": t, "o": 100.0, "h": max(100.0, close), "l": min(100.0, close), "c": close, "v": volume}
+
+
+def test_updates_are_throttled_deduplicated_and_closes_always_delivered():
+    async def run():
+        feed = CandleStick("B-BTC_USDT", "1m", hub=None)
+        received = []
+
+        async def cb(candle):
+            received.append(candle)
+
+        feed.register_callback(cb, min_interval=0.05)
+        throttle = feed.throttles[0]
+
+        await feed.on_message(tick(0, 101))            # first update goes straight out
+        await feed.on_message(tick(0, 101))            # unchanged: skipped
+        await feed.on_message(tick(0, 102))            # held ...
+        await feed.on_message(tick(0, 103))            # ... and replaced by the latest
+        assert [c["c"] for c in received] == [101]
+        await asyncio.sleep(0.08)                      # trailing edge delivers the latest state
+        assert [c["c"] for c in received] == [101, 103]
+
+        await feed.on_message(tick(0, 104))            # held
+        await feed.on_message(tick(60_000, 200))       # next candle: close of the previous one is immediate
+        complete = [c for c in received if c["is_complete"]]
+        assert len(complete) == 1 and complete[0]["c"] == 104
+        await asyncio.sleep(0.08)
+        last = received[-1]
+        assert (last["t"], last["c"], last["is_new_candle"]) == (60_000, 200, True)
+        await feed.stop()
+        return throttle
+
+    throttle = asyncio.run(run())
+    assert throttle.unchanged == 1
+    assert throttle.coalesced == 1
+    assert throttle.delivered == 4
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from datetime import datetime
+
+from app.core.client_manager import ClientManager
+from app.core.fanout import Fanout, fanout
+
+
+class FakeSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("closed")
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        pass
+
+
+async def drain(manager):
+    for outbox in list(manager.outboxes.outboxes.values()):
+        await outbox.join()
+
+
+def test_broadcast_reaches_only_subscribed_symbols():
+    async def run():
+        manager = ClientManager()
+        a, b, c = FakeSocket(), FakeSocket(), FakeSocket()
+        for ws in (a, b, c):
+            await manager.connect(ws)
+        manager.subscribe(a, "prices", ["BTCUSDT", "ETHUSDT"])
+        manager.subscribe(b, "prices", ["ETHUSDT"])
+        manager.subscribe(c, "trades", ["BTCUSDT"])
+
+        await manager.broadcast("prices", {"e": "tick", "data": [{"s": "BTCUSDT"}, {"s": "ETHUSDT"}, {"s": "XRPUSDT"}]})
+        await drain(manager)
+        assert [d["s"] for d in a.sent[0]["data"]] == ["BTCUSDT", "ETHUSDT"]
+        assert [d["s"] for d in b.sent[0]["data"]] == ["ETHUSDT"]
+        assert b.sent[0]["e"] == "tick"
+        assert c.sent == []
+        return manager, a, b, c
+
+    manager, a, b, c = asyncio.run(run())
+    channels = {ch["name"]: sorted(ch["symbols"]) for ch in manager.get_backend_channels()}
+    assert channels == {"prices": ["BTCUSDT", "ETHUSDT"], "trades": ["BTCUSDT"]}
+
+    manager.unsubscribe(a, "prices", ["BTCUSDT"])
+    channels = {ch["name"]: sorted(ch["symbols"]) for ch in manager.get_backend_channels()}
+    assert channels["prices"] == ["ETHUSDT"]
+
+    manager.disconnect(b)
+    manager.disconnect(c)
+    assert {ch["name"] for ch in manager.get_backend_channels()} == {"prices"}
+    manager.disconnect(a)
+    assert manager.get_backend_channels() == []
+    assert not manager.index
+
+
+def test_dead_clients_are_dropped():
+    async def run():
+        manager = ClientManager()
+        dead = FakeSocket(fail=True)
+        await manager.connect(dead)
+        manager.subscribe(dead, "prices", ["BTCUSDT"])
+        await manager.broadcast("prices", {"data": [{"s": "BTCUSDT"}]})
+        await drain(manager)
+        return manager
+
+    manager = asyncio.run(run())
+    assert not manager.clients
+    assert not manager.outboxes.outboxes
+    assert manager.get_backend_channels() == []
+
+
+def test_identical_subsets_are_encoded_once():
+    async def run():
+        manager = ClientManager()
+        sockets = [FakeSocket() for _ in range(50)]
+        for ws in sockets:
+            await manager.connect(ws)
+            manager.subscribe(ws, "prices", ["BTCUSDT"])
+        odd = FakeSocket()
+        await manager.connect(odd)
+        manager.subscribe(odd, "prices", ["BTCUSDT", "ETHUSDT"])
+
+        before = fanout.encodes
+        await manager.broadcast("prices", {"data": [{"s": "BTCUSDT"}, {"s": "ETHUSDT"}]})
+        assert fanout.encodes - before == 2
+        await drain(manager)
+        assert all(ws.sent == [{"data": [{"s": "BTCUSDT"}]}] for ws in sockets)
+        assert [d["s"] for d in odd.sent[0]["data"]] == ["BTCUSDT", "ETHUSDT"]
+
+    asyncio.run(run())
+
+
+def test_shared_payload_memo():
+    memo = Fanout(memo_size=2)
+    payload = {"B-BTC_USDT": 1.5, "at": datetime(2024, 1, 1)}
+    text = memo.encode_shared(payload, "data")
+    assert json.loads(text) == {"data": {"B-BTC_USDT": 1.5, "at": "2024-01-01T00:00:00"}}
+    assert memo.encode_shared(payload, "data") is text
+    assert json.loads(memo.encode_shared(payload)) == json.loads(text)["data"]
+    assert memo.metrics()["encodes"] == 2 and memo.metrics()["memo_hits"] == 1
+    # An equal but distinct object is not assumed unchanged
+    memo.encode_shared(dict(payload), "data")
+    assert memo.metrics()["encodes"] == 3
@@ -0,0 +1,26 @@
+from pymongo import ASCENDING, DESCENDING
+
+from app.core.indexes import index_covers, plan_stages, uncovered_hot_queries
+
+
+def test_every_hot_query_has_a_declared_index():
+    assert uncovered_hot_queries() == []
+
+
+def test_index_covers():
+    keys = (("user_id", ASCENDING), ("_id", DESCENDING))
+    assert index_covers(keys, ["user_id"], None)
+    assert index_covers(keys, ["user_id"], [("_id", ASCENDING)])       # walked backwards
+    assert not index_covers(keys, ["symbol"], None)
+    assert not index_covers(keys, ["user_id"], [("timestamp", DESCENDING)])
+    assert not index_covers(keys, [], [("_id", DESCENDING)])
+
+
+def test_plan_stages_walks_the_winning_plan():
+    plan = {
+        "stage": "PROJECTION_SIMPLE",
+        "inputStage": {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+    }
+    assert plan_stages(plan) == ["PROJECTION_SIMPLE", "LIMIT", "FETCH", "IXSCAN"]
+    sbe = {"queryPlan": {"stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}
+    assert sorted(plan_stages(sbe)) == ["COLLSCAN", "IXSCAN", "OR"]
@@ -0,0 +1,279 @@
+import math
+from collections import deque
+
+import numpy as np
+import pytest
+
+from app.schemas.backtest import StrategyParams
+from app.strategies import SMA_Crossover, RSI_Strategy, SMA_RSI_Strategy
+from app.strategies.base import rolling_sum
+from app.strategies.indicators import SMA, EMA, RSI, RollingStd, ATR, RollingMin, RollingMax, WindowSum
+
+
+def random_walk(n=5000, seed=3):
+    rng = np.random.default_rng(seed)
+    return (100 * np.exp(np.cumsum(rng.normal(0, 0.005, n)))).tolist()
+
+
+def tick_walk(n=5000, seed=3, tick=0.01):
+    """Random walk rounded to `tick`, with flat stretches where close repeats."""
+    rng = np.random.default_rng(seed)
+    prices = np.round(np.array(random_walk(n, seed)) / tick) * tick
+    for start in rng.integers(0, n - 60, n // 100):
+        prices[start:start + rng.integers(5, 60)] = prices[start]
+    return prices.tolist()
+
+
+def stream(indicator, values):
+    return [indicator.update(v) for v in values]
+
+
+# Reference implementations, as the strategies computed them before the port but
+# with each window summed exactly (math.fsum): sum(deque) rounds at every step
+def legacy_sma(values, period):
+    q = deque(maxlen=period)
+    out = []
+    for v in values:
+        q.append(v)
+        out.append(math.fsum(q) / period if len(q) == period else None)
+    return out
+
+
+def legacy_rsi(values, period):
+    gains, losses, prev, out = [], [], None, []
+    for close in values:
+        if prev is None:
+            prev = close
+            out.append(None)
+            continue
+        change = close - prev
+        prev = close
+        gains.append(max(change, 0))
+        losses.append(abs(min(change, 0)))
+        if len(gains) > period:
+            gains.pop(0)
+            losses.pop(0)
+        if len(gains) < period:
+            out.append(None)
+            continue
+        avg_gain = math.fsum(gains) / period
+        avg_loss = math.fsum(losses) / period
+        if avg_loss == 0:
+            # Legacy read 99.01 here (rs=100); the indicator reports 100. Both are overbought.
+            out.append(100.0)
+            continue
+        rs = avg_gain / avg_loss
+        out.append(100 - (100 / (1 + rs)))
+    return out
+
+
+PRICE_SERIES = {"random_walk": random_walk, "tick_walk": tick_walk}
+
+
+@pytest.mark.parametrize("series", PRICE_SERIES)
+@pytest.mark.parametrize("period", [1, 5, 20, 200])
+def test_sma_matches_legacy(series, period):
+    values = PRICE_SERIES[series]()
+    assert stream(SMA(period), values) == legacy_sma(values, period)
+
+
+@pytest.mark.parametrize("series", PRICE_SERIES)
+@pytest.mark.parametrize("period", [5, 14])
+def test_simple_rsi_matches_legacy(series, period):
+    values = PRICE_SERIES[series]()
+    assert stream(RSI(period, wilder=False), values) == legacy_rsi(values, period)
+
+
+@pytest.mark.parametrize("series", PRICE_SERIES)
+@pytest.mark.parametrize("period", [1, 20, 200])
+def test_window_sum_is_exact_and_matches_sum_deque(series, period):
+    values = PRICE_SERIES[series]()
+    window, q = WindowSum(period), deque(maxlen=period)
+    for v in values:
+        q.append(v)
+        total = window.update(v)
+        assert total == math.fsum(q)
+        assert total == pytest.approx(sum(q), rel=1e-13, abs=0)
+
+
+def test_window_sum_does_not_drift():
+    # After any history, a flat window sums to exactly what a fresh one does
+    values = tick_walk(20000)
+    window = WindowSum(30)
+    for v in values:
+        window.update(v)
+    for _ in range(30):
+        window.update(101.37)
+    fresh = WindowSum(30)
+    for _ in range(30):
+        fresh.update(101.37)
+    assert window.total == fresh.total == math.fsum([101.37] * 30)
+
+
+@pytest.mark.parametrize("series", PRICE_SERIES)
+@pytest.mark.parametrize("period", [1, 14, 200])
+def test_rolling_sum_matches_window_sum_bit_for_bit(series, period):
+    values = PRICE_SERIES[series]()
+    window = WindowSum(period)
+    streamed = [window.update(v) for v in values]
+    assert rolling_sum(np.array(values), period)[period - 1:].tolist() == streamed[period - 1:]
+
+
+def test_window_sums_with_non_finite_values():
+    values = [1.0, 2.0, float("inf"), 3.0, 4.0, float("-inf"), 5.0, 6.0, float("nan"), 7.0, 8.0, 9.0]
+    window = WindowSum(2)
+    streamed = [window.update(v) for v in values][1:]
+    expected = [sum(values[i - 1:i + 1]) for i in range(1, len(values))]
+    assert np.array_equal(np.array(streamed), np.array(expected), equal_nan=True)
+    assert np.array_equal(rolling_sum(np.array(values), 2)[1:], np.array(streamed), equal_nan=True)
+
+
+def test_rsi_without_losses_is_100():
+    assert stream(RSI(3, wilder=False), [1, 2, 3, 4, 5])[-1] == 100.0
+    assert stream(RSI(3), [1, 2, 3, 4, 5, 6])[-1] == 100.0
+
+
+def test_wilder_rsi():
+    values = random_walk(500)
+    period = 14
+    changes = np.diff(values)
+    gains, losses = np.maximum(changes, 0), np.maximum(-changes, 0)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    expected = [100 - 100 / (1 + avg_gain / avg_loss)]
+    for g, l in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + g) / period
+        avg_loss = (avg_loss * (period - 1) + l) / period
+        expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+
+    actual = stream(RSI(period), values)
+    assert actual[:period] == [None] * period
+    np.testing.assert_allclose(actual[period:], expected, rtol=1e-9)
+
+
+def test_ema():
+    values = random_walk(300)
+    period = 10
+    alpha = 2 / (period + 1)
+    ema = np.mean(values[:period])
+    expected = [ema]
+    for v in values[period:]:
+        ema = alpha * v + (1 - alpha) * ema
+        expected.append(ema)
+
+    actual = stream(EMA(period), values)
+    assert actual[:period - 1] == [None] * (period - 1)
+    np.testing.assert_allclose(actual[period - 1:], expected, rtol=1e-9)
+
+
+def test_rolling_std():
+    values = random_walk(1000)
+    period = 20
+    expected = [np.std(values[i - period + 1:i + 1]) for i in range(period - 1, len(values))]
+    actual = stream(RollingStd(period), values)
+    np.testing.assert_allclose(actual[period - 1:], expected, rtol=1e-6)
+
+
+def test_atr():
+    rng = np.random.default_rng(1)
+    close = np.array(random_walk(400))
+    high = close * (1 + rng.uniform(0, 0.01, len(close)))
+    low = close * (1 - rng.uniform(0, 0.01, len(close)))
+    period = 14
+
+    prev_close = np.concatenate([[close[0]], close[:-1]])
+    tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    atr = tr[:period].mean()
+    expected = [atr]
+    for r in tr[period:]:
+        atr = (atr * (period - 1) + r) / period
+        expected.append(atr)
+
+    atr_ind = ATR(period)
+    actual = [atr_ind.update(h, l, c) for h, l, c in zip(high, low, close)]
+    np.testing.assert_allclose(actual[period - 1:], expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("period", [1, 7, 50])
+def test_rolling_min_max(period):
+    values = random_walk(2000)
+    expected_max = [max(values[i - period + 1:i + 1]) for i in range(period - 1, len(values))]
+    expected_min = [min(values[i - period + 1:i + 1]) for i in range(period - 1, len(values))]
+    assert stream(RollingMax(period), values)[period - 1:] == expected_max
+    assert stream(RollingMin(period), values)[period - 1:] == expected_min
+
+
+def test_memory_is_bounded():
+    sma, rsi = SMA(10), RSI(10, wilder=False)
+    for v in random_walk(5000):
+        sma.update(v)
+        rsi.update(v)
+    assert len(sma.window.values) == 10
+    assert len(rsi.gains.values) == 10
+
+
+# Ported strategies against the original list/deque implementations
+class LegacySMACrossover:
+    def __init__(self, short, long):
+        self.short, self.long = short, long
+        self.short_q, self.long_q = deque(maxlen=short), deque(maxlen=long)
+        self.prev_short = self.prev_long = None
+        self.position = 0
+
+    def on_bar(self, price):
+        self.short_q.append(price)
+        self.long_q.append(price)
+        if len(self.short_q) < self.short or len(self.long_q) < self.long:
+            return "HOLD"
+        s, l = math.fsum(self.short_q) / self.short, math.fsum(self.long_q) / self.long
+        signal = "HOLD"
+        if self.prev_short is not None:
+            if self.position == 0 and s > l and self.prev_short <= self.prev_long:
+                signal, self.position = "BUY", 1
+            elif self.position == 1 and s < l and self.prev_short >= self.prev_long:
+                signal, self.position = "SELL", 0
+        self.prev_short, self.prev_long = s, l
+        return signal
+
+
+def run_strategy(strategy, values):
+    strategy.on_start({})
+    out = []
+    for v in values:
+        result = strategy.on_bar({"close": v})
+        out.append(getattr(result, "action", "HOLD"))
+    return out
+
+
+@pytest.mark.parametrize("series", PRICE_SERIES)
+def test_sma_crossover_signals_match_legacy(series):
+    values = PRICE_SERIES[series](10000)
+    legacy = LegacySMACrossover(10, 30)
+    assert run_strategy(SMA_Crossover(StrategyParams(short=10, long=30)), values) == [legacy.on_bar(v) for v in values]
+
+
+@pytest.mark.parametrize("series", PRICE_SERIES)
+def test_rsi_strategy_signals_match_legacy(series):
+    values = PRICE_SERIES[series](10000)
+    expected = ["HOLD" if r is None else "SELL" if r > 70 else "BUY" if r < 30 else "HOLD"
+                for r in legacy_rsi(values, 14)]
+    assert run_strategy(RSI_Strategy(StrategyParams(period=14)), values) == expected
+
+
+@pytest.mark.parametrize("series", PRICE_SERIES)
+def test_sma_rsi_signals_match_legacy(series):
+    values = PRICE_SERIES[series](10000)
+    short, long = legacy_sma(values, 10), legacy_sma(values, 30)
+    rsi = legacy_rsi(values, 14)
+    expected = []
+    for s, l, r in zip(short, long, rsi):
+        sma = "HOLD" if s is None or l is None else "BUY" if s > l else "SELL" if s < l else "HOLD"
+        rsi_signal = "HOLD" if r is None else "SELL" if r > 70 else "BUY" if r < 30 else "HOLD"
+        if sma == "BUY" and rsi_signal != "SELL":
+            expected.append("BUY")
+        elif sma == "SELL" and rsi_signal != "BUY":
+            expected.append("SELL")
+        else:
+            expected.append("HOLD")
+
+    params = StrategyParams(short=10, long=30, period=14)
+    assert run_strategy(SMA_RSI_Strategy(params), values) == expected
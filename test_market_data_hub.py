@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+from app.coindxc_sockets.candlesticks import CandleStick, _open_time
+from app.services.market_data_hub import MarketDataHub, Subscription
+
+
+def attach(hub, channel, event, callback, max_pending=None, coalesce_key=None):
+    """Register a subscriber without the upstream socket (subscribe() would connect)."""
+    subscription = Subscription(channel, event, callback, max_pending=max_pending, coalesce_key=coalesce_key)
+    hub.subscribers[(event, channel)].append(subscription)
+    hub.events[event].add(channel)
+    hub.refcounts[channel] = hub.refcounts.get(channel, 0) + 1
+    return subscription
+
+
+def candle(t, c=None):
+    return {"data": json.dumps({"t": t, "c": 100 + t if c is None else c}), "channel": "B-BTC_USDT_1m"}
+
+
+def test_slow_subscriber_does_not_delay_the_others():
+    async def run():
+        hub = MarketDataHub("wss://unused")
+        release = asyncio.Event()
+        slow_seen, fast_seen = [], []
+
+        async def slow(parsed):
+            await release.wait()
+            slow_seen.append(parsed["t"])
+
+        async def fast(parsed):
+            fast_seen.append(parsed["t"])
+
+        attach(hub, "B-BTC_USDT_1m", "candlestick", slow)
+        attach(hub, "B-BTC_USDT_1m", "candlestick", fast)
+
+        for t in range(3):
+            # _dispatch never waits on a subscriber
+            await asyncio.wait_for(hub._dispatch("candlestick", candle(t)), timeout=0.1)
+        await asyncio.sleep(0.01)
+        assert fast_seen == [0, 1, 2]
+        assert slow_seen == []
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert slow_seen == [0, 1, 2]       # in order, nothing lost
+        return hub
+
+    hub = asyncio.run(run())
+    assert hub.stats()["dropped"] == 0
+
+
+def test_backlog_is_bounded_and_drops_the_oldest():
+    async def run():
+        hub = MarketDataHub("wss://unused")
+        release = asyncio.Event()
+        seen = []
+
+        async def stalled(parsed):
+            await release.wait()
+            seen.append(parsed["t"])
+
+        attach(hub, "B-BTC_USDT_1m", "candlestick", stalled, max_pending=3)
+        await hub._dispatch("candlestick", candle(0))
+        await asyncio.sleep(0)              # delivery task picks up 0 and stalls on it
+        for t in range(1, 10):
+            await hub._dispatch("candlestick", candle(t))
+        assert hub.stats()["max_subscriber_backlog"] == 3
+        release.set()
+        await asyncio.sleep(0.01)
+        return hub, seen
+
+    hub, seen = asyncio.run(run())
+    assert seen == [0, 7, 8, 9]
+    assert hub.stats()["dropped"] == 6
+
+
+def test_callback_errors_are_isolated_and_unsubscribe_stops_delivery():
+    async def run():
+        hub = MarketDataHub("wss://unused")
+        seen = []
+
+        async def broken(parsed):
+            raise RuntimeError("boom")
+
+        async def ok(parsed):
+            seen.append(parsed["t"])
+
+        bad = attach(hub, "B-BTC_USDT_1m", "candlestick", broken)
+        good = attach(hub, "B-BTC_USDT_1m", "candlestick", ok)
+        await hub._dispatch("candlestick", candle(0))
+        await asyncio.sleep(0.01)
+        await hub.unsubscribe(good)
+        await hub._dispatch("candlestick", candle(1))
+        await asyncio.sleep(0.01)
+        return bad, good, seen
+
+    bad, good, seen = asyncio.run(run())
+    assert seen == [0]
+    assert bad.errors == 2
+    assert good.closed and good.task.done()
+
+
+def test_keyed_backlog_skips_intrabar_updates_but_keeps_every_bar():
+    async def run():
+        hub = MarketDataHub("wss://unused")
+        release = asyncio.Event()
+        seen = []
+
+        async def stalled(parsed):
+            await release.wait()
+            seen.append((parsed["t"], parsed["c"]))
+
+        attach(hub, "B-BTC_USDT_1m", "candlestick", stalled, max_pending=3, coalesce_key=_open_time)
+        await hub._dispatch("candlestick", candle(0, 0))
+        await asyncio.sleep(0)              # delivery task stalls on the first update
+        for t in range(10):
+            for c in range(1, 6):
+                await hub._dispatch("candlestick", candle(t, c))
+        release.set()
+        await asyncio.sleep(0.01)
+        return hub, seen
+
+    hub, seen = asyncio.run(run())
+    assert seen == [(0, 0)] + [(t, 5) for t in range(10)]
+    assert hub.stats()["dropped"] == 0
+
+
+def test_slow_candle_feed_still_gets_every_closing_candle():
+    async def run():
+        hub = MarketDataHub("wss://unused")
+        feed = CandleStick("B-BTC_USDT", "1m", hub=hub)
+        closes = []
+
+        async def slow(candle):
+            if candle["is_complete"]:
+                closes.append((candle["t"], candle["c"]))
+            await asyncio.sleep(0.001)
+
+        feed.register_callback(slow, min_interval=0)
+        attach(hub, feed.channel, "candlestick", feed.on_message, max_pending=2, coalesce_key=_open_time)
+        for t in range(20):
+            for c in range(1, 4):
+                await hub._dispatch("candlestick", candle(t * 60_000, c))
+        await asyncio.sleep(0.2)
+        await feed.stop()
+        return closes
+
+    assert asyncio.run(run()) == [(t * 60_000, 3) for t in range(19)]
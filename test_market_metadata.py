@@ -0,0 +1,67 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.services.market_metadata import MarketMetadataService
+
+MARKETS = [
+    {"symbol": "BTCUSDT", "pair": "B-BTC_USDT", "status": "active"},
+    {"symbol": "ETHUSDT", "pair": "B-ETH_USDT", "status": "active"},
+    {"symbol": "OLDUSDT", "pair": "B-OLD_USDT", "status": "inactive"},
+]
+
+
+def service(tmp_path, ttl=3600.0):
+    svc = MarketMetadataService(str(tmp_path / "markets.json"), ttl)
+    svc.calls = 0
+
+    async def fetch():
+        svc.calls += 1
+        await asyncio.sleep(0.01)
+        return MARKETS
+
+    svc._fetch = fetch
+    return svc
+
+
+def test_concurrent_misses_share_one_download(tmp_path):
+    svc = service(tmp_path)
+
+    async def run():
+        return await asyncio.gather(*[svc.get_pair(s) for s in ["BTCUSDT", "ETHUSDT"] * 5])
+
+    assert asyncio.run(run()) == ["B-BTC_USDT", "B-ETH_USDT"] * 5
+    assert svc.calls == 1
+    assert svc.by_pair["B-OLD_USDT"]["status"] == "inactive"
+    assert json.loads((tmp_path / "markets.json").read_text())["markets"] == MARKETS
+
+
+def test_cold_start_from_snapshot_and_unknown_symbols(tmp_path):
+    (tmp_path / "markets.json").write_text(json.dumps({"fetched_at": time.time(), "markets": MARKETS}))
+    svc = service(tmp_path)
+
+    async def run():
+        assert await svc.get_pair("BTCUSDT") == "B-BTC_USDT"
+        assert svc.calls == 0
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                await svc.get_pair("OLDUSDT")
+        assert svc.calls == 1          # one refresh for misses, then rate limited
+
+    asyncio.run(run())
+
+
+def test_stale_data_is_served_while_refreshing(tmp_path):
+    (tmp_path / "markets.json").write_text(json.dumps({"fetched_at": time.time() - 7200, "markets": MARKETS[:1]}))
+    svc = service(tmp_path)
+
+    async def run():
+        assert await svc.get_pair("BTCUSDT") == "B-BTC_USDT"   # answered from the stale snapshot
+        assert svc.calls == 0
+        await asyncio.sleep(0.05)
+        assert svc.calls == 1 and not svc.is_stale()
+        assert await svc.get_pair("ETHUSDT") == "B-ETH_USDT"
+
+    asyncio.run(run())
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.routes.backtest import MAX_BAND_POINTS, MAX_SIMULATIONS, _validate_monte_carlo
+from app.schemas.backtest import BacktestMonteCarloRequest, StrategyParams
+from app.services.backtest_engine import run_backtest_vectorized
+from app.services.monte_carlo import BAND_ELEMENTS, run_monte_carlo, trade_returns
+from app.strategies import SMA_Crossover
+from test_backtest_engine import make_candles
+
+
+@pytest.fixture(scope="module")
+def backtest():
+    candles = make_candles(n=5000)
+    return run_backtest_vectorized(candles, SMA_Crossover(StrategyParams(short=10, long=30)), 1000.0, 0.001, 0.5)
+
+
+def test_shuffle_keeps_final_equity(backtest):
+    # Without fee/slippage noise, reordering trades cannot change the end balance
+    out = run_monte_carlo(backtest["trades"], 1000.0, 0.001, 0.5, simulations=500, method="shuffle", seed=3)
+    assert out["trades"] == len(trade_returns(backtest["trades"]))
+    for p in ("p5", "p50", "p95"):
+        assert out["final_equity"][p] == pytest.approx(backtest["final_balance"], abs=1e-4)
+    assert out["equity_bands"]["trade_index"][0] == 0
+    assert out["equity_bands"]["p50"][0] == 1000.0
+
+
+def test_bootstrap_distribution(backtest):
+    out = run_monte_carlo(backtest["trades"], 1000.0, 0.001, 0.5, simulations=2000, seed=1,
+                          fee_jitter_pct=20, slippage_bps=5, band_points=50)
+    eq = out["final_equity"]
+    assert eq["p5"] <= eq["p25"] <= eq["p50"] <= eq["p75"] <= eq["p95"]
+    assert sum(eq["histogram"]["counts"]) == 2000
+    assert 0 <= out["risk_of_ruin"] <= out["probability_of_loss"] <= 1
+    assert len(out["equity_bands"]["p95"]) == len(out["equity_bands"]["trade_index"]) <= 50
+    assert np.all(np.array(out["equity_bands"]["p5"]) <= np.array(out["equity_bands"]["p95"]))
+
+    again = run_monte_carlo(backtest["trades"], 1000.0, 0.001, 0.5, simulations=2000, seed=1,
+                            fee_jitter_pct=20, slippage_bps=5, band_points=50)
+    assert again["final_equity"] == eq
+
+
+def test_no_trades():
+    assert run_monte_carlo([], 1000.0)["trades"] == 0
+
+
+@pytest.mark.parametrize("field, value", [
+    ("band_points", 0),
+    ("band_points", -5),
+    ("band_points", MAX_BAND_POINTS + 1),
+    ("simulations", MAX_SIMULATIONS + 1),
+    ("simulations", 0),
+    ("simulations", -1),
+    ("method", "nope"),
+    ("fee_jitter_pct", -1),
+    ("slippage_bps", -1),
+    ("ruin_threshold_pct", 150),
+])
+def test_route_rejects_bad_settings_with_400(field, value):
+    body = BacktestMonteCarloRequest(
+        strategy="sma_crossover", timeframe=None, initial_capital=1000, params={"short": 10, "long": 30},
+        candle_params={"pair": "B-BTC_USDT", "interval": "1m", "startTime": None, "endTime": None},
+    )
+    _validate_monte_carlo(body)
+    with pytest.raises(HTTPException) as e:
+        _validate_monte_carlo(body.model_copy(update={field: value}))
+    assert e.value.status_code == 400
+
+
+def test_band_buffer_is_bounded(backtest):
+    body = BacktestMonteCarloRequest(
+        strategy="sma_crossover", timeframe=None, initial_capital=1000, params={"short": 10, "long": 30},
+        candle_params={"pair": "B-BTC_USDT", "interval": "1m", "startTime": None, "endTime": None},
+    )
+    # Each cap is allowed on its own, but not both at once
+    _validate_monte_carlo(body.model_copy(update={"simulations": MAX_SIMULATIONS, "band_points": 100}))
+    assert MAX_SIMULATIONS * MAX_BAND_POINTS > BAND_ELEMENTS
+    with pytest.raises(HTTPException) as e:
+        _validate_monte_carlo(body.model_copy(update={"simulations": MAX_SIMULATIONS, "band_points": MAX_BAND_POINTS}))
+    assert e.value.status_code == 400
+    with pytest.raises(ValueError):
+        run_monte_carlo(backtest["trades"], 1000.0, simulations=BAND_ELEMENTS, band_points=2)
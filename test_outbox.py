@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from app.core.outbox import ClientOutbox, OutboxGroup, coalesce_key
+
+
+class StalledSocket:
+    """Socket whose sends block until released."""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+        self.closed = False
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+
+
+def message(msg_type, n, symbol="BTCUSDT"):
+    return json.dumps({"type": msg_type, "n": n}), msg_type, symbol
+
+
+def test_candle_updates_coalesce_and_trades_are_kept_in_order():
+    async def run():
+        ws = StalledSocket()
+        outbox = ClientOutbox(ws, max_size=10)
+        outbox.put(*message("candle_update", 0))
+        await asyncio.sleep(0)              # writer picks up the first candle and stalls on it
+        for n in range(1, 50):
+            outbox.put(*message("candle_update", n))
+        outbox.put(*message("trade_executed", 1))
+        outbox.put(*message("candle_update", 50))
+        outbox.put(*message("candle_update", 0, symbol="ETHUSDT"))
+        outbox.put(*message("trade_executed", 2))
+        assert len(outbox.queue) == 4
+        ws.release.set()
+        await outbox.join()
+        return ws, outbox
+
+    ws, outbox = asyncio.run(run())
+    assert [(m["type"], m["n"]) for m in ws.sent] == [
+        ("candle_update", 0), ("candle_update", 50), ("trade_executed", 1),
+        ("candle_update", 0), ("trade_executed", 2),
+    ]
+    assert outbox.coalesced == 49
+    assert outbox.sent == 5
+
+
+def test_closing_candle_is_not_replaced_by_the_next_bar():
+    def candle_update(open_time, close, is_complete):
+        msg = {"type": "candle_update", "symbol": "BTCUSDT", "is_complete": is_complete,
+               "candle": {"time": open_time, "close": close}}
+        return json.dumps(msg), msg["type"], coalesce_key(msg)
+
+    async def run():
+        ws = StalledSocket()
+        outbox = ClientOutbox(ws, max_size=10)
+        outbox.put(json.dumps({"type": "trade_executed"}), "trade_executed", "BTCUSDT")
+        await asyncio.sleep(0)              # writer stalls on the trade
+        outbox.put(*candle_update(60, 1.0, False))
+        outbox.put(*candle_update(60, 2.0, True))       # replaces bar 60's live update
+        outbox.put(*candle_update(120, 3.0, False))     # must not replace bar 60's close
+        outbox.put(*candle_update(120, 4.0, False))
+        ws.release.set()
+        await outbox.join()
+        return ws, outbox
+
+    ws, outbox = asyncio.run(run())
+    candles = [(m["candle"]["time"], m["candle"]["close"], m["is_complete"]) for m in ws.sent[1:]]
+    assert candles == [(60, 2.0, True), (120, 4.0, False)]
+    assert outbox.coalesced == 2
+
+
+def test_overflow_disconnects_only_the_slow_client():
+    async def run():
+        closed = []
+        group = OutboxGroup(max_size=5, on_close=closed.append)
+        slow, fast = StalledSocket(), StalledSocket()
+        fast.release.set()
+        group.open("slow", slow)
+        group.open("fast", fast)
+        for n in range(10):
+            for key in ("slow", "fast"):
+                outbox = group.get(key)
+                if outbox is not None:
+                    outbox.put(*message("trade_executed", n))
+            await asyncio.sleep(0)
+        await group.get("fast").join()
+        await asyncio.sleep(0)
+        return closed, group, slow, fast
+
+    closed, group, slow, fast = asyncio.run(run())
+    assert closed == ["slow"]
+    assert slow.closed
+    assert len(fast.sent) == 10
+    metrics = group.metrics()
+    assert metrics["clients"] == 1
+    assert metrics["overflow_disconnects"] == 1
+    assert metrics["dropped"] == 5
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.routes.backtest import MAX_SWEEP_COMBOS, _validated_param_ranges
+from app.schemas.backtest import BacktestSweepRequest, CandleParams
+from app.services import parameter_sweep
+from app.services.backtest_engine import candles_to_arrays
+from app.services.parameter_sweep import (
+    build_param_grid, clamp_workers, evaluate_params, grid_size, rank_results, run_sweep, shutdown_pool,
+)
+
+
+def make_arrays(n=1500, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return candles_to_arrays([
+        {"time": 1_700_000_000 + 60 * i, "open": float(c), "high": float(c) * 1.001,
+         "low": float(c) * 0.999, "close": float(c), "volume": 1.0}
+        for i, c in enumerate(close)
+    ])
+
+
+def sweep_request(**kwargs):
+    options = {
+        "strategy": "sma_crossover",
+        "initial_capital": 1000.0,
+        "param_ranges": {"short": {"start": 5, "stop": 10}, "long": {"start": 20, "stop": 40, "step": 5}},
+        "candle_params": CandleParams(interval="1m", pair="B-BTC_USDT", startTime=None, endTime=None),
+    }
+    return BacktestSweepRequest(**{**options, **kwargs})
+
+
+@pytest.fixture(scope="module")
+def pool():
+    shutdown_pool()                 # other test modules may have started it at the default size
+    parameter_sweep.start_pool(2)
+    yield
+    shutdown_pool()
+
+
+def test_grid_expansion_is_inclusive_and_matches_grid_size():
+    ranges = {"short": {"start": 5, "stop": 9, "step": 2}, "long": {"start": 20, "stop": 30, "step": 10}}
+    grid = build_param_grid(ranges)
+    assert grid == [
+        {"short": 5, "long": 20}, {"short": 5, "long": 30},
+        {"short": 7, "long": 20}, {"short": 7, "long": 30},
+        {"short": 9, "long": 20}, {"short": 9, "long": 30},
+    ]
+    assert grid_size(ranges) == len(grid)
+    assert grid_size({"period": {"start": 10, "stop": 5, "step": 1}}) == 0
+
+
+def test_grid_over_max_combos_is_rejected():
+    body = sweep_request()
+    assert len(build_param_grid(_validated_param_ranges(body))) == 6 * 5
+
+    with pytest.raises(HTTPException) as e:
+        _validated_param_ranges(sweep_request(max_combos=29))
+    assert e.value.status_code == 400 and "max_combos=29" in e.value.detail
+
+
+def test_server_cap_applies_whatever_max_combos_the_client_sends():
+    big = {"short": {"start": 1, "stop": 100}, "long": {"start": 1, "stop": MAX_SWEEP_COMBOS // 100 + 1}}
+    with pytest.raises(HTTPException) as e:
+        _validated_param_ranges(sweep_request(param_ranges=big, max_combos=10**9))
+    assert f"max_combos={MAX_SWEEP_COMBOS}" in e.value.detail
+
+
+def test_invalid_grids_are_rejected():
+    for body in (
+        sweep_request(strategy="nope"),
+        sweep_request(metric="nope"),
+        sweep_request(param_ranges={"bogus": {"start": 1, "stop": 2}}),
+        sweep_request(param_ranges={"short": {"start": 1, "stop": 2, "step": 0}}),
+        sweep_request(param_ranges={"short": {"start": 5, "stop": 1}}),
+    ):
+        with pytest.raises(HTTPException):
+            _validated_param_ranges(body)
+
+
+def test_workers_are_capped_at_the_pool_size(pool):
+    assert clamp_workers(None, 100) == 2
+    assert clamp_workers(64, 100) == 2
+    assert clamp_workers(64, 1) == 1
+    assert clamp_workers(-3, 100) == 1
+
+
+def test_rank_results_orders_by_metric_with_missing_values_last():
+    results = [
+        {"params": {"short": 1}, "total_return": 5.0, "max_drawdown": 10.0, "profit_factor": None},
+        {"params": {"short": 2}, "total_return": 9.0, "max_drawdown": 30.0, "profit_factor": 1.5},
+        {"params": {"short": 3}, "total_return": -2.0, "max_drawdown": 5.0, "profit_factor": 0.8},
+    ]
+    assert [r["params"]["short"] for r in rank_results(results, "total_return")] == [2, 1, 3]
+    assert [r["params"]["short"] for r in rank_results(results, "max_drawdown")] == [3, 1, 2]
+    assert [r["params"]["short"] for r in rank_results(results, "profit_factor")] == [2, 3, 1]
+
+
+def test_pool_sweep_matches_serial_evaluation_and_ranks_top_n(pool):
+    arrays = make_arrays()
+    grid = build_param_grid({"short": {"start": 5, "stop": 12}, "long": {"start": 20, "stop": 40, "step": 5}})
+    sweep = run_sweep(arrays, "sma_crossover", grid, 1000.0, 0.001, 1.0, metric="sharpe_ratio", workers=8)
+
+    config = {"strategy": "sma_crossover", "initial_capital": 1000.0, "fee_rate": 0.001,
+              "position_size_pct": 1.0, "interval": None}
+    expected = rank_results([evaluate_params(arrays, config, params) for params in grid], "sharpe_ratio")
+
+    assert sweep["workers"] == 2
+    assert sweep["total_combos"] == len(grid) and not sweep["failed"]
+    assert sweep["results"] == expected
+    top = sweep["results"][:5]
+    assert [r["sharpe_ratio"] for r in top] == sorted((r["sharpe_ratio"] for r in expected), reverse=True)[:5]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.schemas.backtest import StrategyParams
+from app.services.backtest_engine import candles_to_arrays, run_backtest
+from app.services.portfolio_backtest import align_closes, run_portfolio_backtest
+from app.strategies import RSI_Strategy, SMA_Crossover
+from app.strategies.test_strategy import TestStrategy
+from test_backtest_engine import make_candles
+
+
+def arrays(n, seed, offset=0):
+    a = candles_to_arrays(make_candles(n=n, seed=seed))
+    a["time"] = a["time"] + offset
+    return a
+
+
+def test_align_closes_forward_fills():
+    a = {"time": np.array([0, 60, 180]), "close": np.array([1.0, 2.0, 3.0])}
+    b = {"time": np.array([60, 120]), "close": np.array([10.0, 20.0])}
+    times, closes = align_closes({"A": a, "B": b})
+    assert times.tolist() == [0, 60, 120, 180]
+    assert np.isnan(closes[0, 1])
+    assert closes[:, 0].tolist() == [1.0, 2.0, 2.0, 3.0]
+    assert closes[1:, 1].tolist() == [10.0, 20.0, 20.0]
+
+
+@pytest.mark.parametrize("strategy", [SMA_Crossover(StrategyParams(short=10, long=30)), TestStrategy()])
+def test_single_pair_matches_run_backtest(strategy):
+    candles = make_candles(n=2000)
+    expected = run_backtest(candles, strategy, 1000.0, 0.001, 0.5)
+    report = run_portfolio_backtest(
+        {"A": candles_to_arrays(candles)}, {"A": strategy}, 1000.0, 0.001, "cash_fraction", None, 0.5,
+    )
+    assert report["final_balance"] == pytest.approx(expected["final_balance"], rel=1e-12)
+    assert [pt["value"] for pt in report["equity_curve"]] == pytest.approx(
+        [pt["value"] for pt in expected["equity_curve"]], rel=1e-12
+    )
+
+
+def test_shared_capital_and_attribution():
+    pair_arrays = {"A": arrays(3000, 1), "B": arrays(2500, 2, offset=500 * 60), "C": arrays(3000, 3)}
+    strategies = {
+        "A": SMA_Crossover(StrategyParams(short=10, long=30)),
+        "B": SMA_Crossover(StrategyParams(short=5, long=20)),
+        "C": RSI_Strategy(StrategyParams(period=14)),
+    }
+    report = run_portfolio_backtest(pair_arrays, strategies, 1000.0, 0.001, "target_weight", {"C": 2}, interval="1m")
+
+    equity = np.array([pt["value"] for pt in report["equity_curve"]])
+    assert len(equity) == 3000
+    assert np.all(equity > 0)
+    attribution = {a["pair"]: a for a in report["attribution"]}
+    assert attribution["C"]["weight"] == 0.5
+    # Realized PnL per pair adds up to the portfolio result
+    assert sum(a["pnl"] for a in report["attribution"]) == pytest.approx(report["final_balance"] - 1000.0, abs=1e-3)
+    assert all(t["pair"] in pair_arrays for t in report["trades"])
+    assert len(report["correlation"]["pnl"]) == 3
+    assert report["correlation"]["returns"][0][0] == 1.0
@@ -0,0 +1,46 @@
+import pytest
+
+from app.services.position_book import PositionBook
+
+
+def test_vwap_entry_realized_and_unrealized_pnl():
+    book = PositionBook()
+    book.apply_buy("BTC", 100.0, 1.0, fee=0.1)
+    book.apply_buy("BTC", 130.0, 2.0, fee=0.26)
+    position = book.get("BTC")
+    assert position.qty == 3.0
+    assert position.avg_entry == pytest.approx(120.0)
+
+    realized = book.apply_sell("BTC", 150.0, 1.0, fee=0.15)
+    assert realized == pytest.approx(30.0)
+    assert position.avg_entry == pytest.approx(120.0)      # selling keeps the average entry
+    assert position.unrealized_pnl(110.0) == pytest.approx(-20.0)
+
+    book.apply_sell("BTC", 90.0, 2.0)
+    assert not position.is_open
+    assert position.realized_pnl == pytest.approx(30.0 - 60.0)
+    assert position.fees == pytest.approx(0.51)
+
+    # Reopening starts a fresh average
+    book.apply_buy("BTC", 80.0, 0.5)
+    assert position.avg_entry == pytest.approx(80.0)
+
+    summary = book.summary({"BTC": 100.0})
+    assert summary["market_value"] == pytest.approx(50.0)
+    assert summary["unrealized_pnl"] == pytest.approx(10.0)
+    assert summary["net_realized_pnl"] == pytest.approx(-30.0 - 0.51)
+
+
+def test_round_trip_through_position_docs():
+    book = PositionBook()
+    book.apply_buy("ETH", 10.0, 4.0, fee=0.04)
+    book.apply_buy("XRP", 1.0, 10.0)
+    book.apply_sell("XRP", 2.0, 10.0)
+    docs = [{"symbol": s, **p.to_doc()} for s, p in book.positions.items()]
+
+    loaded = PositionBook.from_docs(docs)
+    assert loaded.qty("ETH") == 4.0
+    assert loaded.get("ETH").avg_entry == 10.0
+    assert loaded.qty("XRP") == 0.0
+    assert loaded.get("XRP").realized_pnl == pytest.approx(10.0)
+    assert loaded.market_value({"ETH": 12.0}) == pytest.approx(48.0)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from app.schemas.backtest import StrategyParams
+from app.services.signal_evaluator import SignalEvaluator
+from app.strategies import STRATEGY_REGISTRY
+
+
+def test_identical_sessions_share_one_evaluation_per_candle():
+    evaluator = SignalEvaluator()
+    a = evaluator.acquire("rsi", StrategyParams(period=5), "B-BTC_USDT", "1m")
+    b = evaluator.acquire("rsi", {"period": 5}, "B-BTC_USDT", "1m")
+    other = evaluator.acquire("rsi", {"period": 5}, "B-ETH_USDT", "1m")
+    assert a == b != other
+    assert evaluator.metrics()["instances"] == 2
+
+    reference = STRATEGY_REGISTRY["rsi"](StrategyParams(period=5))
+    closes = 100 + np.cumsum(np.random.default_rng(2).normal(size=40))
+    for i, close in enumerate(closes):
+        candle = {"time": i * 60, "close": float(close)}
+        expected = reference.on_bar(candle).action
+        assert evaluator.evaluate(a, candle) == expected
+        assert evaluator.evaluate(b, candle) == expected
+
+    entry = evaluator.entries[a]
+    assert entry.evaluations == 40 and entry.reuses == 40
+
+    evaluator.release(a)
+    assert a in evaluator.entries
+    evaluator.release(b)
+    assert a not in evaluator.entries
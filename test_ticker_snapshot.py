@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.ticker_snapshot import TickerSnapshotService
+
+TICKER = [
+    {"market": "BTCUSDT", "last_price": "65000.5", "bid": "65000", "ask": "65001"},
+    {"market": "ETHUSDT", "last_price": "", "bid": "3000", "ask": "3001"},
+    {"market": "NOPRICE", "last_price": None, "ask": None},
+]
+
+
+def service():
+    svc = TickerSnapshotService(interval=10, stale_after=30, hub=None)
+    svc.calls = 0
+
+    async def fetch():
+        svc.calls += 1
+        await asyncio.sleep(0.01)
+        return TICKER
+
+    svc._fetch = fetch
+    return svc
+
+
+def test_lookups_and_staleness():
+    svc = service()
+    svc.apply_ticker(TICKER, at=time.time() - 60)
+    assert svc.get("BTCUSDT")["price"] == 65000.5
+    assert svc.get("ETHUSDT")["price"] == 3001.0          # falls back to ask
+    assert svc.get("NOPRICE") is None
+    quotes = svc.get_many(["BTCUSDT", "XRPUSDT"])
+    assert quotes["BTCUSDT"]["stale"] and quotes["BTCUSDT"]["age"] >= 60
+    assert quotes["XRPUSDT"] is None
+
+    asyncio.run(svc.on_prices({"prices": {"BTCUSDT": "66000", "SOLUSDT": 150}}))
+    assert svc.get("BTCUSDT")["price"] == 66000.0 and not svc.get("BTCUSDT")["stale"]
+    assert svc.get("BTCUSDT")["bid"] == 65000.0
+    assert svc.prices(["SOLUSDT", "XRPUSDT"]) == {"SOLUSDT": 150.0}
+
+
+def test_get_price_refreshes_once_for_concurrent_callers():
+    svc = service()
+
+    async def run():
+        prices = await asyncio.gather(*[svc.get_price("BTCUSDT") for _ in range(10)])
+        assert prices == [65000.5] * 10
+        assert await svc.get_price("ETHUSDT") == 3001.0     # fresh: no new download
+        with pytest.raises(ValueError):
+            await svc.get_price("XRPUSDT")
+
+    asyncio.run(run())
+    assert svc.calls == 2       # the first batch, then the unknown market
@@ -0,0 +1,88 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from app.core import repository
+from app.services.trade_export import csv_chunks, ndjson_chunks
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeTrades:
+    """Just enough of a Motor collection for keyset queries on _id."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        id_range = query.get("_id", {})
+        docs = [
+            d for d in self.docs
+            if d["user_id"] == query["user_id"]
+            and all({"$gt": d["_id"] > v, "$gte": d["_id"] >= v, "$lt": d["_id"] < v}[op] for op, v in id_range.items())
+        ]
+        return FakeCursor(docs)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, n):
+        return self.docs[:n]
+
+
+def make_trades(n):
+    return [
+        {"_id": ObjectId.from_datetime(START + timedelta(minutes=i)), "user_id": "u", "symbol": "BTC",
+         "side": "BUY" if i % 2 == 0 else "SELL", "price": 100.0 + i, "qty": 1.0, "fee": 0.1}
+        for i in range(n)
+    ]
+
+
+def test_keyset_pages_cover_everything_once(monkeypatch):
+    monkeypatch.setattr(repository, "trades", FakeTrades(make_trades(25)))
+
+    async def run(descending):
+        seen, cursor = [], None
+        while True:
+            page, cursor = await repository.page_trades("u", limit=10, after=cursor, descending=descending)
+            seen.extend(t["price"] for t in page)
+            if cursor is None:
+                return seen
+
+    assert asyncio.run(run(False)) == [100.0 + i for i in range(25)]
+    assert asyncio.run(run(True)) == [100.0 + i for i in reversed(range(25))]
+
+
+def test_time_range_and_batched_export(monkeypatch):
+    fake = FakeTrades(make_trades(25))
+    monkeypatch.setattr(repository, "trades", fake)
+    start, end = (START + timedelta(minutes=5)).isoformat(), (START + timedelta(minutes=20)).isoformat()
+
+    async def run():
+        batches = [b async for b in repository.iter_trade_batches("u", start=start, end=end, batch_size=4)]
+        text = b"".join([c async for c in csv_chunks(repository.iter_trade_batches("u", start=start, end=end))])
+        lines = b"".join([c async for c in ndjson_chunks(repository.iter_trade_batches("u", batch_size=7))])
+        return batches, text.decode(), lines.decode()
+
+    batches, text, lines = asyncio.run(run())
+    assert [len(b) for b in batches] == [4, 4, 4, 3]
+    assert [t["price"] for b in batches for t in b] == [100.0 + i for i in range(5, 20)]
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 15 and rows[0]["created_at"].startswith("2024-01-01T00:05")
+    assert len([json.loads(line) for line in lines.splitlines()]) == 25
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.schemas.backtest import StrategyParams
+from app.services.backtest_engine import candles_to_arrays, run_backtest_arrays
+from app.services.walk_forward import build_folds, run_out_of_sample, run_walk_forward, slice_arrays
+from app.strategies import SMA_Crossover
+from test_backtest_engine import make_candles
+
+CONFIG = {"initial_capital": 1000.0, "fee_rate": 0.001, "position_size_pct": 1.0, "interval": "1m"}
+
+
+def test_rolling_folds_tile_out_of_sample():
+    folds = build_folds(1000, 300, 100)
+    assert folds[0] == (0, 300, 300, 400)
+    assert folds[-1] == (600, 900, 900, 1000)
+    assert all(b[2] == a[3] for a, b in zip(folds, folds[1:]))
+
+
+def test_anchored_folds_grow_in_sample():
+    folds = build_folds(1000, 300, 100, step=200, anchored=True)
+    assert folds == [(0, 300, 300, 400), (0, 500, 500, 600), (0, 700, 700, 800), (0, 900, 900, 1000)]
+    assert build_folds(350, 300, 100) == []
+
+
+def test_out_of_sample_uses_in_sample_warmup():
+    arrays = candles_to_arrays(make_candles(n=1200))
+    fold = (0, 800, 800, 1200)
+    params = StrategyParams(short=10, long=30)
+    oos = run_out_of_sample(arrays, SMA_Crossover(params), fold, 1000.0, CONFIG)
+
+    # Same signals as the full-history run, but trading only from the OOS start
+    full = SMA_Crossover(params).generate_signals(slice_arrays(arrays, 0, 1200))
+    signals = full[800:]
+    expected = run_backtest_arrays(slice_arrays(arrays, 800, 1200), SMA_Crossover(params), 1000.0, 0.001, 1.0,
+                                   raw_signals=signals)
+    assert oos["final_balance"] == expected["final_balance"]
+    assert oos["equity"].tolist() == [pt["value"] for pt in expected["equity_curve"]]
+
+
+def test_walk_forward_stitches_out_of_sample_equity():
+    arrays = candles_to_arrays(make_candles(n=1500))
+    folds = build_folds(1500, 500, 250)
+    grid = [{"short": s, "long": l} for s in (5, 10) for l in (20, 40)]
+    report = run_walk_forward(arrays, "sma_crossover", grid, folds, 1000.0, 0.001, 1.0, "total_return", 2, "1m")
+
+    assert len(report["folds"]) == len(folds)
+    assert len(report["equity_curve"]) == sum(f[3] - f[2] for f in folds)
+    assert report["evaluations"] == len(folds) * len(grid)
+    # Each OOS window starts from the previous window's final balance
+    balances = [1000.0] + [f["out_of_sample_metrics"]["final_balance"] for f in report["folds"]]
+    for fold, start in zip(report["folds"], balances):
+        assert fold["out_of_sample_metrics"]["final_balance"] == pytest.approx(
+            start * (1 + fold["out_of_sample_metrics"]["total_return"] / 100), rel=1e-3
+        )
+    assert report["out_of_sample"]["final_balance"] == balances[-1]
@@ -0,0 +1,235 @@
+import asyncio
+
+from app.services.write_behind import WriteBehindWriter
+
+
+class FakeCollection:
+    """Records insert_many / bulk_write calls; raises while `down` is set."""
+
+    def __init__(self, name):
+        self.name = name
+        self.docs = {}
+        self.updates = []
+        self.down = False
+        self.calls = 0
+
+    async def insert_many(self, docs, ordered=False):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("mongo down")
+        for doc in docs:
+            self.docs[doc["_id"]] = doc
+
+    async def bulk_write(self, requests, ordered=False):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("mongo down")
+        self.updates.extend(requests)
+
+
+def writer(**kwargs):
+    options = {"batch_size": 1000, "flush_interval": 60, "max_pending": 100, "max_retries": 3,
+               "max_retry_delay": 0.0, "enqueue_timeout": 0.05}
+    return WriteBehindWriter(**{**options, **kwargs})
+
+
+def test_updates_on_the_same_document_are_coalesced():
+    async def run():
+        w = writer()
+        wallets = FakeCollection("wallets")
+        for balance in range(10):
+            await w.set(wallets, {"user_id": "u"}, {"available_balance": balance})
+        await w.set(wallets, {"user_id": "u"}, {"currency": "USDT"}, upsert=True)
+        await w.set(wallets, {"user_id": "v"}, {"available_balance": 5})
+        assert w.pending == 2
+        await w.flush()
+        await w.stop()
+        return w, wallets
+
+    w, wallets = asyncio.run(run())
+    assert len(wallets.updates) == 2
+    first = wallets.updates[0]._doc["$set"]
+    assert first == {"available_balance": 9, "currency": "USDT"}
+    assert wallets.updates[0]._upsert
+    assert w.stats["coalesced"] == 10
+    assert w.pending == 0
+
+
+def test_failed_writes_are_retried_then_dead_lettered():
+    async def run():
+        w = writer(max_retries=2)
+        trades, wallets = FakeCollection("trades"), FakeCollection("wallets")
+        trades.down = wallets.down = True
+        await w.insert(trades, {"n": 1})
+        await w.set(wallets, {"user_id": "u"}, {"available_balance": 1})
+
+        for _ in range(2):
+            await w.flush()
+            assert w.pending == 2          # requeued, still counted
+        await w.flush()                    # third failure exceeds max_retries
+        assert w.pending == 0
+        assert w.stats["retries"] == 4
+        assert w.stats["dead_lettered"] == 2
+        assert {d["kind"] for d in w.dead_letters} == {"insert", "update"}
+        assert all(d["reason"] == "retries exhausted" for d in w.dead_letters)
+        assert not w.insert_attempts
+
+        # Mongo back: new writes go through, nothing old is replayed
+        trades.down = wallets.down = False
+        await w.insert(trades, {"n": 2})
+        await w.flush()
+        await w.stop()
+        return trades
+
+    trades = asyncio.run(run())
+    assert [d["n"] for d in trades.docs.values()] == [2]
+
+
+def test_retry_succeeds_once_mongo_is_back():
+    async def run():
+        w = writer()
+        trades = FakeCollection("trades")
+        trades.down = True
+        for n in range(5):
+            await w.insert(trades, {"n": n})
+        await w.flush()
+        assert w.pending == 5 and w.failed_flushes == 1
+        trades.down = False
+        await w.flush()
+        await w.stop()
+        return w, trades
+
+    w, trades = asyncio.run(run())
+    assert sorted(d["n"] for d in trades.docs.values()) == list(range(5))
+    assert w.failed_flushes == 0 and not w.insert_attempts and not w.dead_letters
+
+
+def test_newer_update_wins_over_a_failed_one():
+    async def run():
+        w = writer()
+        wallets = FakeCollection("wallets")
+        wallets.down = True
+        await w.set(wallets, {"user_id": "u"}, {"available_balance": 1, "total_balance": 10})
+        flushing = asyncio.create_task(w.flush())
+        await asyncio.sleep(0)
+        await w.set(wallets, {"user_id": "u"}, {"available_balance": 2})
+        await flushing
+        wallets.down = False
+        await w.flush()
+        await w.stop()
+        return wallets
+
+    wallets = asyncio.run(run())
+    assert wallets.updates[-1]._doc["$set"] == {"available_balance": 2, "total_balance": 10}
+
+
+def test_full_queue_times_out_instead_of_blocking():
+    async def run():
+        w = writer(max_pending=3, enqueue_timeout=0.05)
+        trades = FakeCollection("trades")
+        trades.down = True
+        for n in range(3):
+            assert await w.insert(trades, {"n": n})
+        await w.flush()                    # fails: the three stay queued
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        accepted = await w.insert(trades, {"n": 3})
+        waited = loop.time() - started
+        return w, accepted, waited
+
+    w, accepted, waited = asyncio.run(run())
+    assert accepted is False
+    assert waited < 1
+    assert w.pending == 3
+    assert w.stats["backpressure_timeouts"] == 1
+    assert w.dead_letters[-1]["reason"] == "queue full"
+    assert w.dead_letters[-1]["payload"]["n"] == 3
+
+
+def test_full_queue_wakes_the_flusher_and_the_writer_gets_room():
+    async def run():
+        w = writer(max_pending=2, enqueue_timeout=5, flush_interval=60)
+        trades = FakeCollection("trades")
+        await w.insert(trades, {"n": 0})
+        await w.insert(trades, {"n": 1})
+        assert await asyncio.wait_for(w.insert(trades, {"n": 2}), timeout=1)
+        await w.stop()
+        return w, trades
+
+    w, trades = asyncio.run(run())
+    assert len(trades.docs) == 3
+    assert w.stats["backpressure_waits"] >= 1
+    assert not w.dead_letters
+
+
+def test_pending_counts_writes_in_flight():
+    async def run():
+        w = writer(max_pending=2, enqueue_timeout=0.05)
+        trades = FakeCollection("trades")
+        release = asyncio.Event()
+        insert_many = trades.insert_many
+
+        async def slow_insert_many(docs, ordered=False):
+            await release.wait()
+            await insert_many(docs, ordered)
+
+        trades.insert_many = slow_insert_many
+        await w.insert(trades, {"n": 0})
+        await w.insert(trades, {"n": 1})
+        flushing = asyncio.create_task(w.flush())
+        await asyncio.sleep(0)
+        assert w.pending == 2
+        assert not await w.insert(trades, {"n": 2})   # still full while the batch is written
+        release.set()
+        await flushing
+        assert w.pending == 0
+        await w.stop()
+
+    asyncio.run(run())
+
+
+def test_stop_flushes_everything_queued():
+    async def run():
+        w = writer(flush_interval=60)
+        trades, wallets = FakeCollection("trades"), FakeCollection("wallets")
+        for n in range(20):
+            await w.insert(trades, {"n": n})
+        await w.set(wallets, {"user_id": "u"}, {"available_balance": 1})
+        assert w.metrics()["running"]
+        await w.stop()
+        return w, trades, wallets
+
+    w, trades, wallets = asyncio.run(run())
+    assert len(trades.docs) == 20 and len(wallets.updates) == 1
+    assert w.pending == 0 and not w.dead_letters
+    assert not w.metrics()["running"]
+
+
+def test_stop_dead_letters_what_it_cannot_write():
+    async def run():
+        w = writer()
+        trades = FakeCollection("trades")
+        trades.down = True
+        await w.insert(trades, {"n": 0})
+        await w.stop()
+        return w
+
+    w = asyncio.run(run())
+    assert w.pending == 0
+    assert [d["reason"] for d in w.dead_letters] == ["shutdown"]
+
+
+def test_background_flusher_backs_off_after_failures():
+    async def run():
+        w = writer(flush_interval=0.01, max_retry_delay=10, max_retries=100)
+        trades = FakeCollection("trades")
+        trades.down = True
+        await w.insert(trades, {"n": 0})
+        await asyncio.sleep(0.3)
+        calls = trades.calls
+        await w.stop()
+        return w, calls
+
+    w, calls = asyncio.run(run())
+    # 0.01, 0.02, 0.04, 0.08, 0.16 ... rather than one attempt every 10ms
+    assert 3 <= calls <= 7